@@ -0,0 +1,214 @@
+"""
+Pool of YouTube Data API keys with per-key quota and health-aware rotation.
+
+Every key keeps its own QuotaLedger, so daily quota is tracked per key and
+shared with other processes. Each request is routed to the healthiest key
+that can still afford it: the one with the most remaining units, discounted
+by its recent error rate. Keys that are rate limited or keep failing are put
+on an exponentially growing cooldown; keys the API rejects as invalid are
+dropped for the rest of the run; a quotaExceeded response exhausts only the
+key that received it.
+
+Keys are read from a comma-separated list, e.g. YOUTUBE_API_KEYS in .env.
+
+Example:
+    # Show remaining quota and health for each key
+    python api_key_pool.py --api_keys "KEY_ONE,KEY_TWO"
+"""
+
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from quota_ledger import (QuotaLedger, QuotaExhausted, ENDPOINT_COSTS,
+                          DEFAULT_DAILY_QUOTA, DEFAULT_QUOTA_LEDGER_FILE)
+
+# Error reasons after which a key is unusable for the rest of the run. 'forbidden' is
+# not among them: it refers to the requested resource, and another key gets the same answer.
+INVALID_KEY_REASONS = {'keyInvalid', 'keyExpired', 'accessNotConfigured', 'ipRefererBlocked'}
+
+
+class KeysCoolingDown(Exception):
+    """Raised when every key with quota left is cooling down."""
+
+    def __init__(self, wait: float):
+        super().__init__(f"All API keys are cooling down for {wait:.1f}s")
+        self.wait = wait
+
+
+@dataclass
+class KeyState:
+    """Health of one key in this process"""
+    api_key: str
+    ledger: QuotaLedger
+    error_rate: float = 0.0
+    consecutive_errors: int = 0
+    cooldown_until: float = 0.0
+    requests: int = 0
+    disabled: bool = False
+
+
+def parse_api_keys(value: Optional[str]) -> List[str]:
+    """Split a comma-separated key list, dropping blanks and duplicates."""
+    keys = []
+    for key in (value or '').split(','):
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class ApiKeyPool:
+    """Routes requests across several API keys by remaining quota and recent health."""
+
+    def __init__(self,
+                 api_keys: Iterable[str],
+                 daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 ledger_file: Path = DEFAULT_QUOTA_LEDGER_FILE,
+                 base_cooldown: float = 30,
+                 max_cooldown: float = 900,
+                 error_threshold: int = 3):
+        """
+        Args:
+            api_keys (Iterable[str]): API keys to rotate between
+            daily_quota (int): Units available per key and Pacific-time day
+            ledger_file (Path): Path to the shared quota ledger
+            base_cooldown (float): First cooldown in seconds after error_threshold consecutive errors
+            max_cooldown (float): Longest cooldown in seconds
+            error_threshold (int): Consecutive errors before a key is cooled down
+        """
+        self._keys = {key: KeyState(key, QuotaLedger(key, daily_quota, ledger_file)) for key in api_keys}
+        if not self._keys:
+            raise ValueError("At least one API key is required")
+        self._base_cooldown = base_cooldown
+        self._max_cooldown = max_cooldown
+        self._error_threshold = error_threshold
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def remaining(self) -> int:
+        """Units left today across all usable keys."""
+        return sum(state.ledger.remaining() for state in self._keys.values() if not state.disabled)
+
+    def used(self) -> int:
+        """Units spent today across all keys, by every process sharing the ledger."""
+        return sum(state.ledger.used() for state in self._keys.values())
+
+    def _score(self, state: KeyState, remaining: int) -> float:
+        return remaining * (1.0 - state.error_rate)
+
+    def acquire(self, endpoint: str) -> str:
+        """
+        Pick a key for one request to endpoint and reserve its cost on that key.
+
+        Returns:
+            str: The API key to use
+
+        Raises:
+            KeysCoolingDown: If keys with quota exist but all are cooling down
+            QuotaExhausted: If no key has quota left for the request
+        """
+        cost = ENDPOINT_COSTS[endpoint]
+        now = time.time()
+        candidates = []
+        cooling = []
+        for state in self._keys.values():
+            if state.disabled:
+                continue
+            remaining = state.ledger.remaining()
+            if remaining < cost:
+                continue
+            if state.cooldown_until > now:
+                cooling.append(state.cooldown_until - now)
+            else:
+                candidates.append((self._score(state, remaining), state))
+
+        # Another process may spend a key's last units between remaining() and reserve()
+        for _, state in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+            try:
+                state.ledger.reserve(endpoint)
+            except QuotaExhausted:
+                continue
+            state.requests += 1
+            return state.api_key
+
+        if cooling:
+            raise KeysCoolingDown(min(cooling))
+        raise QuotaExhausted(f"No API key has {cost} units left for {endpoint} today")
+
+    def record_success(self, api_key: str) -> None:
+        state = self._keys[api_key]
+        state.error_rate *= 0.9
+        state.consecutive_errors = 0
+
+    def record_error(self, api_key: str, reason: str = '', status: int = 0) -> None:
+        """
+        Update a key's health after a failed request.
+
+        Args:
+            api_key (str): Key the request was sent with
+            reason (str): Error reason from the API response, e.g. 'quotaExceeded'
+            status (int): HTTP status, 0 for connection errors
+        """
+        state = self._keys[api_key]
+        state.error_rate = state.error_rate * 0.9 + 0.1
+        state.consecutive_errors += 1
+
+        if reason in ('quotaExceeded', 'dailyLimitExceeded'):
+            state.ledger.mark_exhausted()
+            logging.warning(f"API key {state.ledger.key_id} exhausted its daily quota")
+        elif reason in INVALID_KEY_REASONS:
+            state.disabled = True
+            logging.error(f"API key {state.ledger.key_id} rejected ({reason}); not used again this run")
+        elif status == 429 or reason in ('rateLimitExceeded', 'userRateLimitExceeded') \
+                or state.consecutive_errors >= self._error_threshold:
+            exponent = max(0, state.consecutive_errors - self._error_threshold)
+            cooldown = min(self._base_cooldown * 2 ** exponent, self._max_cooldown)
+            state.cooldown_until = time.time() + cooldown
+            logging.warning(f"API key {state.ledger.key_id} cooling down for {cooldown:.0f}s")
+
+    def status(self) -> List[dict]:
+        """Return a summary per key for logging."""
+        now = time.time()
+        return [
+            {
+                'key_id': state.ledger.key_id,
+                'remaining': state.ledger.remaining(),
+                'error_rate': round(state.error_rate, 3),
+                'cooldown': max(0.0, state.cooldown_until - now),
+                'requests': state.requests,
+                'disabled': state.disabled
+            }
+            for state in self._keys.values()
+        ]
+
+    def close(self) -> None:
+        for state in self._keys.values():
+            state.ledger.close()
+
+
+def main():
+    """Print quota and health for each key in the pool."""
+    parser = argparse.ArgumentParser(description='Show remaining quota per API key')
+    parser.add_argument('--api_keys', default=os.getenv('YOUTUBE_API_KEYS') or os.getenv('YOUTUBE_API_KEY'),
+                        help='Comma-separated API keys (default: $YOUTUBE_API_KEYS or $YOUTUBE_API_KEY)')
+    parser.add_argument('--daily_quota', type=int, default=DEFAULT_DAILY_QUOTA, help='Daily quota units per key')
+    parser.add_argument('--ledger_file', default=str(DEFAULT_QUOTA_LEDGER_FILE), help='Path to the quota ledger')
+    args = parser.parse_args()
+
+    pool = ApiKeyPool(parse_api_keys(args.api_keys), args.daily_quota, args.ledger_file)
+    try:
+        for key in pool.status():
+            print(f"{key['key_id']}: {key['remaining']} units remaining today")
+        print(f"Total: {pool.remaining()} units across {len(pool)} keys")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark YouTube Data API client creation against a local stand-in server.
+
+Starts a minimal in-process HTTP server that serves the discovery document and
+channels.list, then times three ways of issuing the same requests:
+
+    discovery   build() per call, downloading the discovery document each time
+                (what googleapiclient < 2.0 does without a working cache)
+    static      build() per call from the bundled discovery document
+    reused      get_youtube_client(): one client and connection per thread
+
+No API key or quota is used.
+
+Usage:
+    python benchmark_api_client.py [--calls N] [--threads N] [--latency MS]
+
+Example:
+    python benchmark_api_client.py --calls 500 --threads 10 --latency 20
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import mean
+from urllib.parse import parse_qs, urlparse
+
+from googleapiclient.discovery import build
+
+from youtube_api_client import get_youtube_client, load_discovery_document
+
+DISCOVERY_PATH = '/discovery/v1/apis/youtube/v3/rest'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the discovery document and a fake channels.list."""
+    protocol_version = 'HTTP/1.1'
+    discovery_document = b''
+    latency = 0.0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == DISCOVERY_PATH:
+            self._send(self.discovery_document)
+            return
+        if parsed.path == '/youtube/v3/channels':
+            time.sleep(self.latency)
+            ids = parse_qs(parsed.query).get('id', [''])[0].split(',')
+            items = [
+                {'id': channel_id, 'snippet': {'title': channel_id}, 'statistics': {'subscriberCount': '1000'}}
+                for channel_id in ids if channel_id
+            ]
+            self._send(json.dumps({'items': items}).encode())
+            return
+        self.send_error(404)
+
+    def _send(self, body: bytes):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when a pooled client opens many at once
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_stand_in(latency: float) -> ThreadingHTTPServer:
+    """Start the stand-in server on a free local port."""
+    StandInHandler.discovery_document = json.dumps(load_discovery_document()).encode()
+    StandInHandler.latency = latency
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_path(name: str, make_client, calls: int, threads: int) -> dict:
+    """Issue calls channels.list requests with threads workers and time each call."""
+    timings = []
+
+    def call(i):
+        start = time.perf_counter()
+        make_client().channels().list(id=f'UC{i:022d}', part='snippet,statistics').execute()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'path': name,
+        'first_ms': timings[0] if calls == 1 else None,
+        'mean_ms': mean(timings),
+        'p95_ms': timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0],
+        'calls_per_s': calls / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark YouTube API client reuse against a local stand-in')
+    parser.add_argument('--calls', type=int, default=300, help='Requests per client path (default: 300)')
+    parser.add_argument('--threads', type=int, default=10, help='Worker threads (default: 10)')
+    parser.add_argument('--latency', type=float, default=0, help='Simulated server latency in ms (default: 0)')
+    args = parser.parse_args()
+
+    server = start_stand_in(args.latency / 1000)
+    endpoint = f'http://127.0.0.1:{server.server_address[1]}/'
+    options = {'api_endpoint': endpoint}
+
+    paths = {
+        'discovery': lambda: build('youtube', 'v3', developerKey='bench', client_options=options,
+                                   discoveryServiceUrl=endpoint.rstrip('/') + DISCOVERY_PATH,
+                                   static_discovery=False, cache_discovery=False),
+        'static': lambda: build('youtube', 'v3', developerKey='bench', client_options=options),
+        'reused': lambda: get_youtube_client('bench', endpoint),
+    }
+
+    print(f"{'path':<10} {'first ms':>9} {'mean ms':>9} {'p95 ms':>9} {'calls/s':>9}")
+    try:
+        for name, make_client in paths.items():
+            first = run_path(name, make_client, 1, 1)
+            result = run_path(name, make_client, args.calls, args.threads)
+            print(f"{name:<10} {first['first_ms']:>9.2f} {result['mean_ms']:>9.2f} "
+                  f"{result['p95_ms']:>9.2f} {result['calls_per_s']:>9.0f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
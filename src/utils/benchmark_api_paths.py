@@ -0,0 +1,259 @@
+"""
+Benchmark each YouTube Data API client path against the local stand-in.
+
+Starts youtube_api_stand_in with the bundled channel CSVs and fetches the same
+channels through every way the repo talks to the API:
+
+    per_id      googleapiclient, one channels.list per channel ID, on threads
+    batched     AsyncYouTubeClient, 50 IDs per channels.list, concurrently
+    handles     AsyncYouTubeClient, channels.list forHandle per channel
+    validator   YoutubeCSVValidator over a CSV of channel and @handle URLs
+    search      search.list pages (youtube-api.py's discovery) plus channels.list
+    uploads     playlistItems.list and videos.list for each channel's latest uploads
+    refresh     refresh_scheduler.refresh_due over a stats database of the channels
+
+Each path uses its own API key, so units/channel is read from the stand-in's
+quota accounting rather than estimated. Latency, quota and failure injection
+are passed through to the stand-in.
+
+Example:
+    python benchmark_api_paths.py --channels 2000 --latency 50
+
+    # With 2% 5xx responses and a 20,000 unit quota per key
+    python benchmark_api_paths.py --channels 2000 --latency 50 --error_rate 0.02 --daily_quota 20000
+"""
+
+import argparse
+import asyncio
+import csv
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+import refresh_scheduler
+import stats_db
+from api_key_pool import ApiKeyPool
+from handle_map import HandleMap
+from youtube_api_async import AsyncYouTubeClient, YouTubeAPIError
+from youtube_api_client import get_youtube_client
+from youtube_api_stand_in import StandInChannel, StandInServer, start_stand_in
+from youtube_csv_validator_api import YoutubeCSVValidator
+
+SEARCH_QUERIES = ('music', 'gaming', 'news', 'kids', 'comedy', 'sports', 'tech', 'cooking')
+
+
+class PathContext:
+    """Channels, endpoint and scratch directory shared by the benchmark paths."""
+
+    def __init__(self, server: StandInServer, channels: List[StandInChannel], workdir: Path, threads: int):
+        self.server = server
+        self.channels = channels
+        self.workdir = workdir
+        self.threads = threads
+
+    def key_pool(self, api_key: str) -> ApiKeyPool:
+        """Key pool with a scratch ledger, so benchmark runs never touch the shared one."""
+        return ApiKeyPool([api_key], daily_quota=self.server.daily_quota, ledger_file=self.workdir / 'quota_ledger.db')
+
+
+def run_per_id(context: PathContext, api_key: str) -> int:
+    def fetch(channel):
+        try:
+            response = get_youtube_client(api_key, context.server.endpoint).channels().list(
+                id=channel.channel_id, part='snippet,statistics'
+            ).execute()
+        except Exception:
+            return 0
+        return len(response.get('items', []))
+
+    with ThreadPoolExecutor(max_workers=context.threads) as executor:
+        return sum(executor.map(fetch, context.channels))
+
+
+async def _gather_counts(coroutines) -> int:
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    return sum(result for result in results if isinstance(result, int))
+
+
+def run_batched(context: PathContext, api_key: str) -> int:
+    async def run():
+        async with AsyncYouTubeClient(None, context.server.endpoint, key_pool=context.key_pool(api_key)) as client:
+            async def fetch(batch):
+                return len((await client.channels_list(ids=batch)).get('items', []))
+
+            ids = [channel.channel_id for channel in context.channels]
+            return await _gather_counts(fetch(ids[i:i + 50]) for i in range(0, len(ids), 50))
+
+    return asyncio.run(run())
+
+
+def run_handles(context: PathContext, api_key: str) -> int:
+    async def run():
+        async with AsyncYouTubeClient(None, context.server.endpoint, key_pool=context.key_pool(api_key)) as client:
+            async def fetch(channel):
+                return len((await client.channels_list(for_handle=f'@{channel.handle}')).get('items', []))
+
+            return await _gather_counts(fetch(channel) for channel in context.channels if channel.handle)
+
+    return asyncio.run(run())
+
+
+def run_validator(context: PathContext, api_key: str) -> int:
+    # Mix channel URLs and @handle URLs, like the scraped CSVs
+    input_file = context.workdir / 'validator_input.csv'
+    with open(input_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['url'])
+        for i, channel in enumerate(context.channels):
+            if channel.handle and i % 2:
+                writer.writerow([f'https://www.youtube.com/@{channel.handle}'])
+            else:
+                writer.writerow([f'https://www.youtube.com/channel/{channel.channel_id}'])
+
+    validator = YoutubeCSVValidator(
+        str(input_file), 'url', api_key,
+        api_endpoint=context.server.endpoint,
+        key_pool=context.key_pool(api_key),
+        handle_map=HandleMap(context.workdir / 'handle_map.db')
+    )
+    validator.process()
+    return int((pd.read_csv(input_file)['is_valid'] == True).sum())
+
+
+def run_search(context: PathContext, api_key: str) -> int:
+    async def run():
+        async with AsyncYouTubeClient(None, context.server.endpoint, key_pool=context.key_pool(api_key)) as client:
+            channel_ids = set()
+            for query in SEARCH_QUERIES:
+                page_token = None
+                while len(channel_ids) < len(context.channels):
+                    try:
+                        response = await client.search_list(query, page_token=page_token)
+                    except YouTubeAPIError:
+                        break
+                    channel_ids.update(item['id']['channelId'] for item in response.get('items', []))
+                    page_token = response.get('nextPageToken')
+                    if not page_token:
+                        break
+            ids = sorted(channel_ids)
+
+            async def fetch(batch):
+                return len((await client.channels_list(ids=batch)).get('items', []))
+
+            return await _gather_counts(fetch(ids[i:i + 50]) for i in range(0, len(ids), 50))
+
+    return asyncio.run(run())
+
+
+def run_uploads(context: PathContext, api_key: str) -> int:
+    async def run():
+        async with AsyncYouTubeClient(None, context.server.endpoint, key_pool=context.key_pool(api_key)) as client:
+            async def fetch(channel):
+                page = await client.playlist_items_list(channel.uploads_playlist)
+                video_ids = [item['contentDetails']['videoId'] for item in page.get('items', [])]
+                videos = await client.videos_list(video_ids)
+                return 1 if videos.get('items') else 0
+
+            return await _gather_counts(fetch(channel) for channel in context.channels)
+
+    return asyncio.run(run())
+
+
+def run_refresh(context: PathContext, api_key: str) -> int:
+    conn = stats_db.connect(str(context.workdir / 'youtube_stats.db'))
+    try:
+        stale = int(time.time()) - 60 * 86400
+        stats_db.record_snapshot(conn, [
+            {'channel_id': channel.channel_id, 'name': channel.title, 'subscribers': channel.subscribers,
+             'url': f'https://youtube.com/channel/{channel.channel_id}'}
+            for channel in context.channels
+        ], stale)
+        refresh_scheduler.sync(conn, context.server.daily_quota)
+
+        async def run():
+            async with AsyncYouTubeClient(None, context.server.endpoint, key_pool=context.key_pool(api_key)) as client:
+                return await refresh_scheduler.refresh_due(conn, client, context.server.daily_quota)
+
+        refreshed, _ = asyncio.run(run())
+        return refreshed
+    finally:
+        conn.close()
+
+
+PATHS: Dict[str, Callable[[PathContext, str], int]] = {
+    'per_id': run_per_id,
+    'batched': run_batched,
+    'handles': run_handles,
+    'validator': run_validator,
+    'search': run_search,
+    'uploads': run_uploads,
+    'refresh': run_refresh,
+}
+
+
+def run_path(context: PathContext, name: str) -> dict:
+    """Run one path with a fresh key and return its throughput and quota use."""
+    api_key = f'bench-{name}'
+    requests_before = sum(context.server.requests.values())
+    errors_before = sum(context.server.errors.values())
+    start = time.perf_counter()
+    channels = PATHS[name](context, api_key)
+    elapsed = time.perf_counter() - start
+    units = context.server.units(api_key)
+    return {
+        'path': name,
+        'channels': channels,
+        'seconds': elapsed,
+        'channels_per_s': channels / elapsed if elapsed else 0.0,
+        'units': units,
+        'units_per_channel': units / channels if channels else float('nan'),
+        'requests': sum(context.server.requests.values()) - requests_before,
+        'errors': sum(context.server.errors.values()) - errors_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API client paths against the local stand-in')
+    parser.add_argument('--channels', type=int, default=1000, help='Channels fetched per path (default: 1000)')
+    parser.add_argument('--paths', default=','.join(PATHS), help=f"Comma-separated paths (default: {','.join(PATHS)})")
+    parser.add_argument('--threads', type=int, default=10, help='Worker threads for the per_id path (default: 10)')
+    parser.add_argument('--latency', type=float, default=0, help='Stand-in latency per request in ms (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0, help='Extra random latency up to this many ms')
+    parser.add_argument('--daily_quota', type=int, default=10 ** 9, help='Stand-in units per key (default: unlimited)')
+    parser.add_argument('--error_rate', type=float, default=0, help='Fraction of requests failing with 503')
+    parser.add_argument('--quota_error_rate', type=float, default=0, help='Fraction of requests failing with quotaExceeded')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the stand-in (default: 0)')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.paths.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PATHS]
+    if unknown:
+        parser.error(f"unknown paths {', '.join(unknown)}; choose from {', '.join(PATHS)}")
+
+    server = start_stand_in(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, daily_quota=args.daily_quota,
+        error_rate=args.error_rate, quota_error_rate=args.quota_error_rate, seed=args.seed
+    )
+    print(f"Stand-in serving {len(server.directory):,} channels at {server.endpoint}")
+    channels = server.directory.ranked[:args.channels]
+
+    print(f"{'path':<10} {'channels':>9} {'seconds':>8} {'channels/s':>11} {'units':>8} "
+          f"{'units/channel':>14} {'requests':>9} {'errors':>7}")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            context = PathContext(server, channels, Path(workdir), args.threads)
+            for name in names:
+                result = run_path(context, name)
+                print(f"{name:<10} {result['channels']:>9,} {result['seconds']:>8.2f} "
+                      f"{result['channels_per_s']:>11,.0f} {result['units']:>8,} "
+                      f"{result['units_per_channel']:>14.3f} {result['requests']:>9,} {result['errors']:>7,}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Micro-benchmark for channel page field extraction.
+
+Compares the previous extraction (up to ten unanchored regex searches over the
+page) with the literal-anchored lookups in YouTubeValidator, using HTML pages
+saved by youtube_url_download.py / youtube_url_download_async.py. Both
+extractors must return identical results for every page.
+
+Usage:
+    python benchmark_channel_scanner.py <html_folder> [--repeat N] [--limit N]
+
+Example:
+    python benchmark_channel_scanner.py ./output_dir --repeat 5
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+from youtube_url_validator import YouTubeValidator
+
+LEGACY_CHANNEL_ID_PATTERNS = [re.compile(p) for p in [
+    r'"channelId":"([^"]+)"',
+    r'"externalChannelId":"([^"]+)"',
+    r'"ucid":"([^"]+)"',
+    r'channel/([^/"]+)',
+]]
+LEGACY_HANDLE_PATTERNS = [re.compile(p) for p in [
+    r'"channelHandle":"(@[^"]+)"',
+    r'"vanityChannelUrl":"http://www.youtube.com/(@[^"]+)"',
+    r'youtube\.com/(@[^"\s/]+)',
+]]
+LEGACY_SUBSCRIBER_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r'"metadataParts":\[{"text":{"content":"([^"]+?\s*subscribers?)"}}\]',
+    r'"text":{"content":"([^"]+?\s*subscribers?)"}',
+    r'subscribers"[^>]*?>([^<]+?)\s*(?:subscriber|subscribers)',
+]]
+
+
+def legacy_extract_channel_info(html_content: str) -> Dict[str, Optional[str]]:
+    """Extraction as implemented before the patterns were literal-anchored."""
+    info = {}
+    for pattern in LEGACY_CHANNEL_ID_PATTERNS:
+        if match := pattern.search(html_content):
+            info['channel_id'] = match.group(1)
+            break
+    for pattern in LEGACY_HANDLE_PATTERNS:
+        if match := pattern.search(html_content):
+            info['handle'] = match.group(1)
+            break
+    for pattern in LEGACY_SUBSCRIBER_PATTERNS:
+        if match := pattern.search(html_content):
+            subscriber_count = match.group(1).strip()
+            info['subscribers'] = re.sub(r'\s*subscribers?\s*$', '', subscriber_count, flags=re.IGNORECASE)
+            break
+    return info
+
+
+def time_call(func, html_content: str, repeat: int) -> float:
+    """Return the median wall time of func(html_content) in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html_content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def run_benchmark(html_files: List[Path], repeat: int) -> int:
+    """Benchmark both extractors over the given pages and print a summary."""
+    validator = YouTubeValidator()
+    legacy_total = scanner_total = 0.0
+    mismatches = 0
+
+    print(f"{'page':<60} {'size KB':>8} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for html_file in html_files:
+        html_content = html_file.read_text(encoding='utf-8', errors='replace')
+
+        expected = legacy_extract_channel_info(html_content)
+        actual = validator._extract_channel_info(html_content)
+        if expected != actual:
+            mismatches += 1
+            print(f"MISMATCH {html_file.name}: legacy={expected} current={actual}")
+
+        legacy_ms = time_call(legacy_extract_channel_info, html_content, repeat)
+        scanner_ms = time_call(validator._extract_channel_info, html_content, repeat)
+        legacy_total += legacy_ms
+        scanner_total += scanner_ms
+
+        speedup = legacy_ms / scanner_ms if scanner_ms else float('inf')
+        print(f"{html_file.name[:60]:<60} {len(html_content) / 1024:>8.0f} "
+              f"{legacy_ms:>10.2f} {scanner_ms:>11.2f} {speedup:>7.2f}x")
+
+    print("-" * 100)
+    print(f"Pages: {len(html_files)}, mismatches: {mismatches}")
+    print(f"Total legacy: {legacy_total:.1f} ms, total current: {scanner_total:.1f} ms, "
+          f"speedup: {legacy_total / scanner_total if scanner_total else float('inf'):.2f}x")
+    return 1 if mismatches else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark channel page field extraction')
+    parser.add_argument('html_folder', help='Folder containing saved YouTube channel HTML pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions per page (default: 5)')
+    parser.add_argument('--limit', type=int, help='Maximum number of pages to benchmark')
+    args = parser.parse_args()
+
+    html_files = sorted(Path(args.html_folder).glob('*.html'))[:args.limit]
+    if not html_files:
+        print(f"No HTML files found in {args.html_folder}")
+        return 1
+
+    return run_benchmark(html_files, args.repeat)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Load-test the stats_api query service.
+
+Starts stats_api.py in a subprocess (or targets --url). Concurrent clients
+then send a mix of top-N, movers, channel and history requests for channels
+sampled from the database. Optionally a writer ingests a snapshot every few
+seconds, which invalidates the service's cache the way youtube-api.py does.
+Reports requests/s, p50/p99 latency and the cache hit rate.
+
+Example:
+    python benchmark_stats_api.py --db youtube_stats.db --duration 20 --concurrency 64
+
+    # With an ingest of 1000 channels every 5 seconds
+    python benchmark_stats_api.py --db youtube_stats.db --ingest_every 5
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import aiohttp
+
+import stats_db
+
+# (weight, path template); {id} is replaced with a sampled channel ID
+REQUEST_MIX = (
+    (30, '/top?limit=20'),
+    (10, '/top?limit=100'),
+    (15, '/movers?limit=20'),
+    (5, '/movers?limit=20&losers=1'),
+    (25, '/channels/{id}'),
+    (15, '/channels/{id}/history?days=90'),
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def sample_channel_ids(db_file: str, count: int, seed: int) -> List[str]:
+    """Channel IDs to request, drawn from the top and the long tail alike."""
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        channel_ids = [row[0] for row in conn.execute('SELECT channel_id FROM channel_latest')]
+    finally:
+        conn.close()
+    return random.Random(seed).sample(channel_ids, min(count, len(channel_ids)))
+
+
+async def ingest_loop(db_file: str, channel_ids: List[str], interval: float, stop: asyncio.Event) -> int:
+    """Record a snapshot of up to 1000 channels every interval seconds; return the number of ingests."""
+    conn = stats_db.connect(db_file)
+    ingests = 0
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            batch = channel_ids[:1000]
+            latest = dict(conn.execute(
+                f"SELECT channel_id, subscriber_count FROM channel_latest WHERE channel_id IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+            stats_db.record_snapshot(conn, [
+                {'channel_id': channel_id, 'name': channel_id, 'subscribers': count + random.randint(1, 1000),
+                 'url': f'https://youtube.com/channel/{channel_id}'}
+                for channel_id, count in latest.items()
+            ])
+            ingests += 1
+    finally:
+        conn.close()
+    return ingests
+
+
+async def run_load(url: str, channel_ids: List[str], duration: float, concurrency: int, seed: int) -> dict:
+    weights, templates = zip(*REQUEST_MIX)
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(session):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path = rng.choices(templates, weights)[0].replace('{id}', rng.choice(channel_ids))
+            start = time.perf_counter()
+            try:
+                async with session.get(url + path) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        async with session.get(url + '/health') as response:
+            health = await response.json()
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+    lookups = health['cache_hits'] + health['cache_misses']
+    return {
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': percentile(0.50),
+        'p99_ms': percentile(0.99),
+        'errors': errors,
+        'cache_hit_rate': health['cache_hits'] / lookups if lookups else 0.0,
+        'invalidations': health['cache_invalidations']
+    }
+
+
+async def benchmark(args, url: str) -> dict:
+    channel_ids = sample_channel_ids(args.db, args.channels, args.seed)
+    if not channel_ids:
+        raise SystemExit(f"No channels in {args.db}")
+    stop = asyncio.Event()
+    ingest = None
+    if args.ingest_every:
+        ingest = asyncio.create_task(ingest_loop(args.db, channel_ids, args.ingest_every, stop))
+    try:
+        result = await run_load(url, channel_ids, args.duration, args.concurrency, args.seed)
+    finally:
+        stop.set()
+    result['ingests'] = await ingest if ingest else 0
+    return result
+
+
+def start_service(args) -> subprocess.Popen:
+    """Start stats_api.py and wait until it answers /health."""
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, str(Path(__file__).with_name('stats_api.py')), '--db', args.db, '--port', str(port),
+        '--readers', str(args.readers), '--ttl', str(args.ttl)
+    ], stdout=subprocess.DEVNULL)
+    args.url = f'http://127.0.0.1:{port}'
+
+    async def wait_ready():
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(args.url + '/health') as response:
+                        if response.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError('stats_api.py did not start')
+
+    asyncio.run(wait_ready())
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the stats_api query service')
+    parser.add_argument('--db', default=stats_db.DEFAULT_STATS_DB, help='Statistics database to sample channels from')
+    parser.add_argument('--url', help='Service to test (default: start stats_api.py on --db)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run (default: 10)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients (default: 32)')
+    parser.add_argument('--channels', type=int, default=2000, help='Distinct channels requested (default: 2000)')
+    parser.add_argument('--readers', type=int, default=4, help='Read connections when starting the service')
+    parser.add_argument('--ttl', type=float, default=60, help='Cache TTL when starting the service')
+    parser.add_argument('--ingest_every', type=float, help='Seconds between simulated ingests (default: none)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    process: Optional[subprocess.Popen] = None if args.url else start_service(args)
+    try:
+        result = asyncio.run(benchmark(args, args.url.rstrip('/')))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"{result['requests']:,} requests in {args.duration:.0f}s with {args.concurrency} clients")
+    print(f"Throughput: {result['requests_per_s']:,.0f} requests/s")
+    print(f"Latency: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    print(f"Errors: {result['errors']:,}")
+    print(f"Cache hit rate: {result['cache_hit_rate']:.1%}, "
+          f"{result['invalidations']:,} invalidations from {result['ingests']:,} ingests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Persistent channel validation cache shared by the validators.
+
+Maps a canonical channel URL to the last ChannelInfo fetched for it, so input
+files that overlap (youtube_channel_500.csv, the 3000-row list, the 10000-row
+archive) only send stale or new URLs over the network. Valid and invalid
+results have separate TTLs, and the least recently used entries are evicted
+once the cache grows past max_entries.
+
+Each entry records its source. 'scraper' entries hold page text (subscribers
+like "1.2M", no title); 'api' entries hold Data API counts and titles. Each
+validator only reads entries of its own source, so its output columns keep one
+value format.
+
+Example:
+    # Show cache size and how many entries are still fresh
+    python channel_cache.py --stats
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from channel_url import canonical_channel_url, with_scheme
+from sqlite_store import open_store, select_in
+from youtube_url_validator import ChannelInfo
+
+DEFAULT_CACHE_FILE = Path(__file__).resolve().parents[2] / 'data' / 'channel_cache.db'
+SOURCES = ('scraper', 'api')
+# Fraction of max_entries freed beyond the excess when the cache is trimmed
+EVICT_HEADROOM = 0.01
+
+
+class ChannelCache:
+    """SQLite-backed cache of channel URL -> ChannelInfo with TTL and LRU eviction."""
+
+    def __init__(self,
+                 cache_file: Path = DEFAULT_CACHE_FILE,
+                 valid_ttl: float = 7 * 24 * 3600,
+                 invalid_ttl: float = 24 * 3600,
+                 max_entries: int = 2_000_000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            cache_file (Path): Path to the SQLite cache file
+            valid_ttl (float): Seconds a valid result stays fresh
+            invalid_ttl (float): Seconds an invalid result stays fresh
+            max_entries (int): Entries kept before least recently used ones are evicted
+        """
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = open_store(cache_file)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS channel_cache (
+                url TEXT PRIMARY KEY,
+                is_valid INTEGER NOT NULL,
+                channel_id TEXT,
+                handle TEXT,
+                subscribers TEXT,
+                channel_title TEXT,
+                error_message TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                source TEXT
+            )
+        ''')
+        # Caches written before sources were recorded; their entries have no source and are re-fetched by the API path
+        if 'source' not in {row[1] for row in self._conn.execute('PRAGMA table_info(channel_cache)')}:
+            self._conn.execute('ALTER TABLE channel_cache ADD COLUMN source TEXT')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed ON channel_cache (accessed_at)')
+        self._conn.commit()
+        # Kept up to date by put_many and prune, so writes do not count the table; entries added
+        # by other processes are picked up when the count is checked before evicting
+        self._count = len(self)
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM channel_cache').fetchone()[0]
+
+    def _is_fresh(self, is_valid: bool, fetched_at: float, now: float) -> bool:
+        ttl = self.valid_ttl if is_valid else self.invalid_ttl
+        return now - fetched_at < ttl
+
+    def get(self, url: str, source: Optional[str] = None) -> Optional[ChannelInfo]:
+        """Return the cached result for url if it is still fresh, otherwise None."""
+        return self.get_many([url], source).get(url)
+
+    def get_many(self, urls: Iterable[str], source: Optional[str] = None) -> Dict[str, ChannelInfo]:
+        """
+        Return fresh cached results for the given URLs, keyed by the URL as passed in.
+
+        Args:
+            urls (Iterable[str]): URLs to look up
+            source (Optional[str]): Only return entries from this source ('scraper' or 'api'); any when None
+
+        Returns:
+            Dict[str, ChannelInfo]: Results whose url is the requested URL with its scheme
+        """
+        keys = {}
+        for url in urls:
+            if isinstance(url, str) and url.strip():
+                keys.setdefault(canonical_channel_url(url), []).append(url)
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        rows = select_in(self._conn, '''
+            SELECT url, is_valid, channel_id, handle, subscribers, channel_title, error_message, fetched_at
+            FROM channel_cache WHERE (? IS NULL OR source = ?) AND url IN ({keys})
+        ''', keys, (source, source))
+        for key, is_valid, channel_id, handle, subscribers, channel_title, error_message, fetched_at in rows:
+            if not self._is_fresh(bool(is_valid), fetched_at, now):
+                continue
+            for url in keys[key]:
+                found[url] = ChannelInfo(
+                    url=with_scheme(url),
+                    is_valid=bool(is_valid),
+                    channel_id=channel_id,
+                    handle=handle,
+                    subscribers=subscribers,
+                    error_message=error_message,
+                    channel_title=channel_title
+                )
+
+        if found:
+            with self._conn:
+                self._conn.executemany(
+                    'UPDATE channel_cache SET accessed_at = ? WHERE url = ?',
+                    [(now, canonical_channel_url(url)) for url in found]
+                )
+        self.hits += len(found)
+        self.misses += sum(len(urls) for urls in keys.values()) - len(found)
+        return found
+
+    def channel_ids(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Return channel IDs recorded for valid URLs, including expired entries.
+
+        A channel's ID never changes, so a stale entry still saves resolving the URL again.
+        """
+        keys = {}
+        for url in urls:
+            if isinstance(url, str) and url.strip():
+                keys.setdefault(canonical_channel_url(url), []).append(url)
+
+        found = {}
+        for key, channel_id in select_in(self._conn, '''
+            SELECT url, channel_id FROM channel_cache
+            WHERE is_valid = 1 AND channel_id LIKE 'UC%' AND url IN ({keys})
+        ''', keys):
+            for url in keys[key]:
+                found[url] = channel_id
+        return found
+
+    def put(self, url: str, info: ChannelInfo, source: str) -> None:
+        """Store the result fetched for url."""
+        self.put_many({url: info}, source)
+
+    def put_many(self, results: Dict[str, ChannelInfo], source: str) -> None:
+        """
+        Store several results in one transaction and evict if the cache is over size.
+
+        Args:
+            results (Dict[str, ChannelInfo]): Requested URL -> result fetched for it
+            source (str): Where the results came from, 'scraper' or 'api'
+        """
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+        now = time.time()
+        rows = [
+            (
+                canonical_channel_url(url), int(bool(info.is_valid)), info.channel_id, info.handle,
+                None if info.subscribers is None else str(info.subscribers),
+                info.channel_title, info.error_message, now, now, source
+            )
+            for url, info in results.items()
+            if isinstance(url, str) and url.strip()
+        ]
+        if not rows:
+            return
+        keys = {row[0] for row in rows}
+        existing = sum(1 for _ in select_in(self._conn, 'SELECT url FROM channel_cache WHERE url IN ({keys})', keys))
+        with self._conn:
+            self._conn.executemany('''
+                INSERT OR REPLACE INTO channel_cache
+                    (url, is_valid, channel_id, handle, subscribers, channel_title, error_message, fetched_at, accessed_at,
+                     source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        self._count += len(keys) - existing
+        if self._count > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_entries, plus EVICT_HEADROOM of it."""
+        self._count = len(self)
+        excess = self._count - self.max_entries
+        if excess > 0:
+            # Freeing some room means a full cache is not counted and trimmed on every write
+            excess += int(self.max_entries * EVICT_HEADROOM)
+            with self._conn:
+                cursor = self._conn.execute('''
+                    DELETE FROM channel_cache WHERE url IN (
+                        SELECT url FROM channel_cache ORDER BY accessed_at LIMIT ?
+                    )
+                ''', (excess,))
+            self._count -= cursor.rowcount
+
+    def prune(self) -> int:
+        """Delete expired entries. Returns the number of entries removed."""
+        now = time.time()
+        with self._conn:
+            cursor = self._conn.execute('''
+                DELETE FROM channel_cache
+                WHERE (is_valid = 1 AND fetched_at <= ?) OR (is_valid = 0 AND fetched_at <= ?)
+            ''', (now - self.valid_ttl, now - self.invalid_ttl))
+        self._count = max(0, self._count - cursor.rowcount)
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Return entry counts and the hit rate of this process."""
+        now = time.time()
+        total, fresh_valid, fresh_invalid = self._conn.execute('''
+            SELECT COUNT(*),
+                   SUM(is_valid = 1 AND fetched_at > ?),
+                   SUM(is_valid = 0 AND fetched_at > ?)
+            FROM channel_cache
+        ''', (now - self.valid_ttl, now - self.invalid_ttl)).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': total,
+            'fresh_valid': fresh_valid or 0,
+            'fresh_invalid': fresh_invalid or 0,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """Inspect or prune the channel cache."""
+    parser = argparse.ArgumentParser(description='Inspect the shared channel validation cache')
+    parser.add_argument('--cache_file', default=str(DEFAULT_CACHE_FILE), help='Path to the cache file')
+    parser.add_argument('--stats', action='store_true', help='Print cache statistics')
+    parser.add_argument('--prune', action='store_true', help='Delete expired entries')
+    args = parser.parse_args()
+
+    cache = ChannelCache(args.cache_file)
+    try:
+        if args.prune:
+            print(f"Removed {cache.prune()} expired entries")
+        if args.stats or not args.prune:
+            for key, value in cache.stats().items():
+                print(f"{key}: {value}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Channel URL normalization shared by the caches, validators and downloaders.
+"""
+
+from urllib.parse import unquote, urlparse
+
+
+def canonical_channel_url(url: str) -> str:
+    """
+    Normalize a channel URL so equivalent spellings share one cache entry.
+
+    Scheme, 'www.'/'m.' prefixes, trailing tabs such as /videos and query
+    strings are dropped. Handles, /c/ and /user/ names are case-insensitive
+    on YouTube and are lowercased; /channel/UC... IDs keep their case.
+    Other URLs (e.g. /watch?v=...) keep their full path and query.
+    """
+    parsed = urlparse(url.strip() if '://' in url else 'https://' + url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    parts = [part for part in unquote(parsed.path).split('/') if part]
+    if parts and parts[0].startswith('@'):
+        return f"{host}/{parts[0].lower()}"
+    if len(parts) >= 2 and parts[0] == 'channel':
+        return f"{host}/channel/{parts[1]}"
+    if len(parts) >= 2 and parts[0] in ('c', 'user'):
+        return f"{host}/{parts[0]}/{parts[1].lower()}"
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{host}/{'/'.join(parts)}{query}"
+
+
+def with_scheme(url: str) -> str:
+    """Return url as the validators request it, with https:// added when it has no scheme."""
+    return url if urlparse(url).scheme else 'https://' + url
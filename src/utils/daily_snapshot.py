@@ -0,0 +1,255 @@
+"""
+Daily channel snapshots as memory-mappable NumPy arrays.
+
+Each day's snapshot is a directory of .npy files with one row per channel,
+in channel ID order:
+
+    data/snapshots/2024-12-01/v3/channel_ids.npy    fixed-width bytes (S24), sorted
+    data/snapshots/2024-12-01/v3/subscribers.npy    int64
+    data/snapshots/2024-12-01/v3/views.npy          int64, -1 where unknown
+    data/snapshots/2024-12-01/v3/ts.npy             int64 epoch seconds of each channel's last observation
+    data/snapshots/2024-12-01/CURRENT               name of the version to read ("v3")
+
+write_snapshot() dumps channel_latest, which is stored in channel ID order, so
+no sort is needed. It runs after every ingest, and a later run on the same UTC
+day writes a new version directory and then replaces CURRENT with os.replace,
+so readers see either the old or the new snapshot, never a mix. The version
+before the current one is kept for readers that resolved CURRENT just before
+the swap; older ones are removed. load_snapshot() opens the arrays with
+np.load(mmap_mode='r'). That takes milliseconds for millions of channels, and
+pages are only read when touched. Channels are found with searchsorted on the
+sorted ID array, so diff() aligns two days and computes changes and rank
+moves in whole-array passes.
+
+Example:
+    # Write today's snapshot from the statistics database
+    python daily_snapshot.py --db youtube_stats.db --write
+
+    # Biggest subscriber gains between two days
+    python daily_snapshot.py --diff 2024-11-01 2024-12-01 --sort subscriber_delta --top 20
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from growth_analytics import top
+import stats_db
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parents[2] / 'data' / 'snapshots'
+# Channel IDs are 'UC' plus 22 characters
+ID_DTYPE = 'S24'
+ARRAYS = ('channel_ids', 'subscribers', 'views', 'ts')
+POINTER = 'CURRENT'
+
+
+@dataclass
+class Snapshot:
+    """One day's channel arrays, sorted by channel ID"""
+    day: date
+    channel_ids: np.ndarray  # (n,) S24
+    subscribers: np.ndarray  # (n,) int64
+    views: np.ndarray  # (n,) int64, -1 where unknown
+    ts: np.ndarray  # (n,) int64
+
+    def __len__(self) -> int:
+        return len(self.channel_ids)
+
+    def positions(self, channel_ids: np.ndarray) -> np.ndarray:
+        """Row of each channel ID in this snapshot, -1 where it is absent."""
+        channel_ids = np.asarray(channel_ids, dtype=ID_DTYPE)
+        if len(self) == 0:
+            return np.full(len(channel_ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.channel_ids, channel_ids), len(self) - 1)
+        return np.where(self.channel_ids[positions] == channel_ids, positions, -1)
+
+
+def snapshot_path(day: date, snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> Path:
+    """Directory of the day's current snapshot version."""
+    day_dir = Path(snapshot_dir) / day.isoformat()
+    try:
+        return day_dir / (day_dir / POINTER).read_text().strip()
+    except FileNotFoundError:
+        # Snapshots written before versioning keep their arrays in the day directory itself
+        return day_dir
+
+
+def _versions(day_dir: Path) -> List[int]:
+    """Version numbers present in a day directory, oldest first."""
+    if not day_dir.exists():
+        return []
+    return sorted(int(path.name[1:]) for path in day_dir.iterdir()
+                  if path.is_dir() and path.name[:1] == 'v' and path.name[1:].isdigit())
+
+
+def list_days(snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> List[date]:
+    """Days with a complete snapshot, oldest first."""
+    if not Path(snapshot_dir).exists():
+        return []
+    days = []
+    for path in Path(snapshot_dir).iterdir():
+        try:
+            day = date.fromisoformat(path.name)
+        except ValueError:
+            continue
+        current = snapshot_path(day, snapshot_dir)
+        if all((current / f'{name}.npy').exists() for name in ARRAYS):
+            days.append(day)
+    return sorted(days)
+
+
+def write_snapshot(conn: sqlite3.Connection, day: Optional[date] = None,
+                   snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> Path:
+    """
+    Write channel_latest as a new version of day's snapshot and make it the current one.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the statistics database
+        day (Optional[date]): Snapshot day (default: today, UTC)
+        snapshot_dir (Path): Directory holding one subdirectory per day
+
+    Returns:
+        Path: The new version's directory
+    """
+    day = day or datetime.now(timezone.utc).date()
+    # One row of comma-joined columns: building a Python tuple per channel costs more than the scan
+    ids, subscribers, views, ts, count = conn.execute('''
+        SELECT group_concat(channel_id), group_concat(subscriber_count), group_concat(COALESCE(view_count, -1)),
+               group_concat(ts), COUNT(*)
+        FROM (SELECT * FROM channel_latest ORDER BY channel_id)
+    ''').fetchone()
+    arrays = {
+        'channel_ids': np.array(ids.split(',') if count else [], dtype=ID_DTYPE),
+        'subscribers': np.fromstring(subscribers or '', dtype=np.int64, sep=','),
+        'views': np.fromstring(views or '', dtype=np.int64, sep=','),
+        'ts': np.fromstring(ts or '', dtype=np.int64, sep=','),
+    }
+    # SQLite's BINARY collation and NumPy's bytes order agree for ASCII IDs; reorder if anything else slipped in
+    if count > 1 and np.any(arrays['channel_ids'][1:] <= arrays['channel_ids'][:-1]):
+        order = np.argsort(arrays['channel_ids'], kind='stable')
+        arrays = {name: values[order] for name, values in arrays.items()}
+
+    # A new version directory, published by atomically replacing the pointer file
+    day_dir = Path(snapshot_dir) / day.isoformat()
+    versions = _versions(day_dir)
+    previous = snapshot_path(day, snapshot_dir)
+    path = day_dir / f'v{versions[-1] + 1 if versions else 1}'
+    path.mkdir(parents=True)
+    for name, values in arrays.items():
+        np.save(path / f'{name}.npy', values)
+    pointer_tmp = day_dir / f'.{POINTER}.tmp'
+    pointer_tmp.write_text(path.name)
+    os.replace(pointer_tmp, day_dir / POINTER)
+
+    # Keep the previous version for readers that resolved the pointer just before the swap;
+    # drop older ones, versions a crashed run never published, and unversioned arrays
+    for version in versions:
+        if day_dir / f'v{version}' != previous:
+            shutil.rmtree(day_dir / f'v{version}', ignore_errors=True)
+    for name in ARRAYS:
+        (day_dir / f'{name}.npy').unlink(missing_ok=True)
+    return path
+
+
+def load_snapshot(day: date, snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> Snapshot:
+    """Open a day's snapshot; the arrays are read-only memory maps."""
+    path = snapshot_path(day, snapshot_dir)
+    return Snapshot(day, *(np.load(path / f'{name}.npy', mmap_mode='r') for name in ARRAYS))
+
+
+def rank(subscribers: np.ndarray) -> np.ndarray:
+    """Rank by descending subscriber count (1 = largest)."""
+    ranks = np.empty(len(subscribers), dtype=np.int64)
+    ranks[np.argsort(-np.asarray(subscribers), kind='stable')] = np.arange(1, len(subscribers) + 1)
+    return ranks
+
+
+def diff(before: Snapshot, after: Snapshot) -> Dict[str, np.ndarray]:
+    """
+    Compare two snapshots for every channel in after.
+
+    Returns:
+        Dict[str, np.ndarray]: Column name -> (len(after),) array. Columns are channel_id,
+            subscribers, views, rank, subscriber_delta, growth (fraction of the earlier
+            count), view_delta and rank_change (positive = climbed). Changes are NaN for
+            channels missing from before, and view_delta also where a view count is unknown.
+    """
+    # Consecutive days usually hold the same channels, which makes alignment free
+    if len(before) == len(after) and np.array_equal(before.channel_ids, after.channel_ids):
+        positions = np.arange(len(after), dtype=np.int64)
+    else:
+        positions = before.positions(after.channel_ids)
+    present = positions >= 0
+    subscribers = np.asarray(after.subscribers, dtype=np.float64)
+    views = np.asarray(after.views, dtype=np.float64)
+    previous = np.full(len(after), np.nan)
+    previous[present] = before.subscribers[positions[present]]
+    previous_views = np.full(len(after), np.nan)
+    previous_views[present] = before.views[positions[present]]
+    previous_rank = np.full(len(after), np.nan)
+    previous_rank[present] = rank(before.subscribers)[positions[present]]
+    after_rank = rank(after.subscribers)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        known_views = (views >= 0) & (previous_views >= 0)
+        return {
+            'channel_id': after.channel_ids.astype(str),
+            'subscribers': subscribers,
+            'views': np.where(views >= 0, views, np.nan),
+            'rank': after_rank,
+            'subscriber_delta': subscribers - previous,
+            'growth': np.where(previous > 0, subscribers / previous - 1, np.nan),
+            'view_delta': np.where(known_views, views - previous_views, np.nan),
+            'rank_change': previous_rank - after_rank,
+        }
+
+
+def main():
+    """Write a snapshot, list them, or compare two days."""
+    parser = argparse.ArgumentParser(description='Write and compare memory-mapped daily channel snapshots')
+    parser.add_argument('--db', default=stats_db.DEFAULT_STATS_DB, help='Path to the statistics database')
+    parser.add_argument('--snapshot_dir', default=str(DEFAULT_SNAPSHOT_DIR), help='Directory of daily snapshots')
+    parser.add_argument('--write', action='store_true', help="Write today's snapshot from the database")
+    parser.add_argument('--diff', nargs=2, type=date.fromisoformat, metavar=('BEFORE', 'AFTER'),
+                        help='Compare two days (YYYY-MM-DD)')
+    parser.add_argument('--sort', default='subscriber_delta',
+                        help='Column to rank the diff by: subscriber_delta, growth, view_delta or rank_change')
+    parser.add_argument('--top', type=int, default=20, help='Channels to show')
+    parser.add_argument('--ascending', action='store_true', help='Show the smallest values (e.g. biggest losers)')
+    args = parser.parse_args()
+    snapshot_dir = Path(args.snapshot_dir)
+
+    if args.write:
+        # connect() would create a mistyped path; it also adds columns an older database lacks
+        if not Path(args.db).exists():
+            parser.error(f"no statistics database at {args.db}")
+        conn = stats_db.connect(args.db)
+        try:
+            path = write_snapshot(conn, snapshot_dir=snapshot_dir)
+        finally:
+            conn.close()
+        print(f"Wrote {len(load_snapshot(date.fromisoformat(path.parent.name), snapshot_dir)):,} channels to {path}")
+
+    if args.diff:
+        report = diff(load_snapshot(args.diff[0], snapshot_dir), load_snapshot(args.diff[1], snapshot_dir))
+        if args.sort not in report or args.sort == 'channel_id':
+            parser.error(f"unknown column {args.sort}")
+        for position, row in enumerate(top(report, args.sort, args.top, args.ascending), 1):
+            rank_change = report['rank_change'][row]
+            rank_str = '' if np.isnan(rank_change) else f", rank {int(rank_change):+d}"
+            print(f"{position}. {report['channel_id'][row]}: {int(report['subscribers'][row]):,} subscribers "
+                  f"({report['subscriber_delta'][row]:+,.0f}{rank_str})")
+    elif not args.write:
+        for day in list_days(snapshot_dir):
+            print(f"{day}: {len(load_snapshot(day, snapshot_dir)):,} channels")
+
+
+if __name__ == "__main__":
+    main()
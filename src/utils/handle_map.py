@@ -0,0 +1,156 @@
+"""
+Persistent map from channel handles and legacy usernames to channel IDs.
+
+A handle only has to be resolved once: the API validator records every
+handle it resolves (through channels.list forHandle/forUsername or, as a last
+resort, search.list) and looks handles up here before spending quota. The map
+can also be seeded from channel IDs the page scraper (youtube_url_validator)
+has already stored in the channel cache.
+
+Keys are case-insensitive, so '@MrBeast' and '@mrbeast' share an entry.
+
+Example:
+    # Show how many handles are mapped, by source
+    python handle_map.py --stats
+
+    # Import handle/channel ID pairs found by the scraper
+    python handle_map.py --import_cache
+"""
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from channel_cache import DEFAULT_CACHE_FILE
+from sqlite_store import open_store, select_in
+
+DEFAULT_HANDLE_MAP_FILE = Path(__file__).resolve().parents[2] / 'data' / 'handle_map.db'
+
+
+def normalize_handle(identifier: str) -> str:
+    """Return the map key for a handle ('@name') or legacy username."""
+    return identifier.strip().lower()
+
+
+class HandleMap:
+    """SQLite-backed handle/username -> channel ID map."""
+
+    def __init__(self, map_file: Path = DEFAULT_HANDLE_MAP_FILE):
+        """
+        Open (or create) the handle map.
+
+        Args:
+            map_file (Path): Path to the SQLite file
+        """
+        self.hits = 0
+        self._conn = open_store(map_file)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS handle_map (
+                handle TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM handle_map').fetchone()[0]
+
+    def get(self, identifier: str) -> Optional[str]:
+        """Return the channel ID for a handle or username, or None if it has not been resolved."""
+        return self.get_many([identifier]).get(identifier)
+
+    def get_many(self, identifiers: Iterable[str]) -> Dict[str, str]:
+        """Return known channel IDs keyed by the identifiers as passed in."""
+        keys = {}
+        for identifier in identifiers:
+            if isinstance(identifier, str) and identifier.strip():
+                keys.setdefault(normalize_handle(identifier), []).append(identifier)
+
+        found = {}
+        for handle, channel_id in select_in(
+            self._conn, 'SELECT handle, channel_id FROM handle_map WHERE handle IN ({keys})', keys
+        ):
+            for identifier in keys[handle]:
+                found[identifier] = channel_id
+        self.hits += len(found)
+        return found
+
+    def put(self, identifier: str, channel_id: str, source: str) -> None:
+        """Record that identifier resolves to channel_id; source says how it was resolved."""
+        self.put_many({identifier: channel_id}, source)
+
+    def put_many(self, mapping: Dict[str, str], source: str) -> None:
+        now = time.time()
+        rows = [
+            (normalize_handle(identifier), channel_id, source, now)
+            for identifier, channel_id in mapping.items()
+            if identifier and channel_id
+        ]
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO handle_map (handle, channel_id, source, resolved_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+
+    def import_from_cache(self, cache_file: Path = DEFAULT_CACHE_FILE) -> int:
+        """
+        Add handle/channel ID pairs stored in the channel cache, e.g. by the page scraper.
+
+        Existing entries are kept. Returns the number of handles added, 0 if there is no cache yet.
+        """
+        if not Path(cache_file).exists():
+            return 0
+        # Read-only, so a wrong path is never created as an empty database
+        cache = sqlite3.connect(f'file:{cache_file}?mode=ro', uri=True)
+        try:
+            rows = cache.execute('''
+                SELECT handle, channel_id FROM channel_cache
+                WHERE is_valid = 1 AND handle LIKE '@%' AND channel_id LIKE 'UC%'
+            ''').fetchall()
+        finally:
+            cache.close()
+
+        before = len(self)
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO handle_map (handle, channel_id, source, resolved_at) VALUES (?, ?, ?, ?)',
+                [(normalize_handle(handle), channel_id, 'scraper', now) for handle, channel_id in rows]
+            )
+        return len(self) - before
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry counts per source."""
+        return dict(self._conn.execute('SELECT source, COUNT(*) FROM handle_map GROUP BY source'))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """Inspect or seed the handle map."""
+    parser = argparse.ArgumentParser(description='Inspect the handle -> channel ID map')
+    parser.add_argument('--map_file', default=str(DEFAULT_HANDLE_MAP_FILE), help='Path to the handle map')
+    parser.add_argument('--stats', action='store_true', help='Print entry counts per source')
+    parser.add_argument('--import_cache', action='store_true', help='Import handles found by the page scraper')
+    parser.add_argument('--cache_file', default=str(DEFAULT_CACHE_FILE), help='Channel cache to import from')
+    args = parser.parse_args()
+
+    handle_map = HandleMap(args.map_file)
+    try:
+        if args.import_cache:
+            print(f"Imported {handle_map.import_from_cache(args.cache_file)} handles from {args.cache_file}")
+        if args.stats or not args.import_cache:
+            for source, count in handle_map.stats().items():
+                print(f"{source}: {count}")
+            print(f"Total: {len(handle_map)}")
+    finally:
+        handle_map.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Retention policy and rollups for subscriber_history.
+
+Raw history rows are rolled up into daily, weekly (Monday-aligned) and
+monthly aggregates holding the minimum, maximum and last count of each period
+and the number of samples. The raw history only records changes (see
+stats_db), so rollups are change-only too: a period without a row kept the
+count of the row before it, and samples counts changes. Weekly and monthly rows are both computed from daily rows,
+since weeks do not nest in months. Each level rolls up only complete periods
+it has not rolled before; a watermark per level records where the previous run stopped.
+Once a period has been rolled up, the finer rows behind it can be pruned past
+their horizon. By default raw rows are kept for 90 days, daily rows for two
+years, weekly rows for five years, and monthly rows indefinitely.
+
+query_history() returns a channel's series for a time range at the finest
+resolution still retained for the range start. Each level supplies rows up to
+its watermark and the next finer level supplies the rest, so the result
+always runs up to the latest snapshot.
+
+Example:
+    # Roll up complete periods and prune expired rows
+    python history_retention.py --db youtube_stats.db
+
+    # Show a channel's last year at the best available resolution
+    python history_retention.py --db youtube_stats.db --channel_id UCX6OQ3DkcsbYNE6H8uQQuVA --days 365
+"""
+
+import argparse
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from stats_db import DEFAULT_STATS_DB, step_series
+
+DAY = 86400
+
+# Start of the period containing ts, as SQL over an integer epoch column
+PERIOD_SQL = {
+    'daily': '(({col}) / 86400) * 86400',
+    # 1970-01-01 was a Thursday; shift by 3 days so weeks start on Monday
+    'weekly': '((({col}) / 86400 + 3) / 7 * 7 - 3) * 86400',
+    'monthly': "CAST(strftime('%s', {col}, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+LEVELS = ('raw', 'daily', 'weekly', 'monthly')
+ROLLUP_TABLES = {level: f'subscriber_{level}' for level in LEVELS[1:]}
+# Level each rollup is computed from
+SOURCE_LEVEL = {'daily': 'raw', 'weekly': 'daily', 'monthly': 'daily'}
+
+SCHEMA = ''.join(f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+        channel_id TEXT NOT NULL,
+        period INTEGER NOT NULL,
+        min_count INTEGER NOT NULL,
+        max_count INTEGER NOT NULL,
+        last_count INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        samples INTEGER NOT NULL,
+        PRIMARY KEY (channel_id, period)
+    ) WITHOUT ROWID;
+''' for table in ROLLUP_TABLES.values()) + '''
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        level TEXT PRIMARY KEY,
+        rolled_until INTEGER NOT NULL
+    );
+'''
+
+
+@dataclass
+class RetentionPolicy:
+    """Days each resolution is kept; None keeps it forever"""
+    raw_days: Optional[int] = 90
+    daily_days: Optional[int] = 730
+    weekly_days: Optional[int] = 1825
+    monthly_days: Optional[int] = None
+
+    def horizon(self, level: str, now: float) -> Optional[int]:
+        """Oldest timestamp kept at level, or None if nothing expires."""
+        days = getattr(self, f'{level}_days')
+        return None if days is None else int(now) - days * DAY
+
+
+def init_retention(conn: sqlite3.Connection) -> None:
+    """Create the rollup tables if they do not exist."""
+    conn.executescript(SCHEMA)
+
+
+def _watermark(conn: sqlite3.Connection, level: str) -> int:
+    row = conn.execute('SELECT rolled_until FROM rollup_state WHERE level = ?', (level,)).fetchone()
+    return row[0] if row else 0
+
+
+def _period_start(level: str, ts: float) -> int:
+    """Python counterpart of PERIOD_SQL."""
+    ts = int(ts)
+    if level == 'daily':
+        return ts // DAY * DAY
+    if level == 'weekly':
+        return ((ts // DAY + 3) // 7 * 7 - 3) * DAY
+    month = datetime.fromtimestamp(ts, timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return int(month.timestamp())
+
+
+def _source_select(level: str) -> str:
+    """SELECT producing (channel_id, period, min, max, last, last_ts, samples) for level from its source level."""
+    period = PERIOD_SQL[level]
+    if level == 'daily':
+        source, ts_col, min_col, max_col, last_col, samples = (
+            'subscriber_history', 'ts', 'subscriber_count', 'subscriber_count', 'subscriber_count', '1'
+        )
+        where = 'ts >= ? AND ts < ?'
+    else:
+        source = ROLLUP_TABLES[SOURCE_LEVEL[level]]
+        ts_col, min_col, max_col, last_col, samples = 'last_ts', 'min_count', 'max_count', 'last_count', 'samples'
+        where = 'period >= ? AND period < ?'
+    return f'''
+        SELECT channel_id, period, MIN(min_value), MAX(max_value), MIN(last_value), MAX(ts), SUM(samples)
+        FROM (
+            SELECT channel_id, {period.format(col=ts_col)} AS period, {ts_col} AS ts,
+                   {min_col} AS min_value, {max_col} AS max_value, {samples} AS samples,
+                   LAST_VALUE({last_col}) OVER (
+                       PARTITION BY channel_id, {period.format(col=ts_col)} ORDER BY {ts_col}
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                   ) AS last_value
+            FROM {source}
+            WHERE {where}
+        )
+        GROUP BY channel_id, period
+    '''
+
+
+def roll_up(conn: sqlite3.Connection, level: str, now: Optional[float] = None) -> int:
+    """
+    Aggregate the complete periods of level that were not rolled up yet, in one transaction.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    now = time.time() if now is None else now
+    start = _watermark(conn, level)
+    # Only periods that have ended, and whose source rows are all rolled up
+    if level != 'daily':
+        now = min(now, _watermark(conn, SOURCE_LEVEL[level]))
+    until = _period_start(level, now)
+    if until <= start:
+        return 0
+
+    table = ROLLUP_TABLES[level]
+    with conn:
+        cursor = conn.execute(f'''
+            INSERT INTO {table} (channel_id, period, min_count, max_count, last_count, last_ts, samples)
+            {_source_select(level)}
+            ON CONFLICT (channel_id, period) DO UPDATE SET
+                min_count = MIN(min_count, excluded.min_count),
+                max_count = MAX(max_count, excluded.max_count),
+                last_count = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_count ELSE last_count END,
+                last_ts = MAX(last_ts, excluded.last_ts),
+                samples = samples + excluded.samples
+        ''', (start, until))
+        conn.execute(
+            'INSERT OR REPLACE INTO rollup_state (level, rolled_until) VALUES (?, ?)', (level, until)
+        )
+    return cursor.rowcount
+
+
+def prune(conn: sqlite3.Connection, policy: RetentionPolicy, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Delete rows past their level's horizon that a coarser level has already rolled up,
+    keeping each channel's last row before the horizon.
+
+    Returns:
+        Dict[str, int]: Rows deleted per level
+    """
+    now = time.time() if now is None else now
+    deleted = {}
+    with conn:
+        for level in LEVELS:
+            horizon = policy.horizon(level, now)
+            if horizon is None:
+                continue
+            # Keep rows that a level computed from them has not rolled up yet
+            cutoff = min([horizon] + [
+                _watermark(conn, rollup) for rollup, source in SOURCE_LEVEL.items() if source == level
+            ])
+            table, column = ('subscriber_history', 'ts') if level == 'raw' else (ROLLUP_TABLES[level], 'period')
+            # Rows are change-only, so each channel keeps its last row before the cutoff:
+            # it holds the count carried into the retained range
+            cursor = conn.execute(f'''
+                DELETE FROM {table} WHERE {column} < ? AND {column} < (
+                    SELECT MAX(newer.{column}) FROM {table} AS newer
+                    WHERE newer.channel_id = {table}.channel_id AND newer.{column} < ?
+                )
+            ''', (cutoff, cutoff))
+            deleted[level] = cursor.rowcount
+    return deleted
+
+
+def apply_retention(conn: sqlite3.Connection, policy: Optional[RetentionPolicy] = None,
+                    now: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Roll up every level and prune expired rows. Cheap when nothing is due, so it can run after every ingest.
+
+    Returns:
+        Dict[str, Dict[str, int]]: {'rolled_up': rows per level, 'pruned': rows per level}
+    """
+    init_retention(conn)
+    rolled_up = {level: roll_up(conn, level, now) for level in LEVELS[1:]}
+    return {'rolled_up': rolled_up, 'pruned': prune(conn, policy or RetentionPolicy(), now)}
+
+
+def resolution_for(start_ts: int, policy: Optional[RetentionPolicy] = None, now: Optional[float] = None) -> str:
+    """Return the finest level still retained at start_ts."""
+    policy = policy or RetentionPolicy()
+    now = time.time() if now is None else now
+    for level in LEVELS:
+        horizon = policy.horizon(level, now)
+        if horizon is None or start_ts >= horizon:
+            return level
+    return LEVELS[-1]
+
+
+def query_history(conn: sqlite3.Connection, channel_id: str, start_ts: int, end_ts: Optional[int] = None,
+                  policy: Optional[RetentionPolicy] = None,
+                  now: Optional[float] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    """
+    Return a channel's series between start_ts and end_ts at the finest retained resolution.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the statistics database
+        channel_id (str): Channel to read
+        start_ts (int): Range start in epoch seconds
+        end_ts (Optional[int]): Range end in epoch seconds (default: now)
+        policy (Optional[RetentionPolicy]): Retention horizons the database is pruned with
+        now (Optional[float]): Current time, for tests
+
+    Returns:
+        Tuple[str, List[Tuple[int, int, int, int]]]: The level used for the range start, and
+            (ts, last_count, min_count, max_count) rows in time order. Rollup rows are stamped
+            with their period start; raw rows are the steps from stats_db.step_series() and
+            have min_count == max_count == last_count.
+    """
+    init_retention(conn)
+    end_ts = int(time.time() if end_ts is None else end_ts)
+    level = resolution_for(start_ts, policy, now)
+    rows = []
+    position = start_ts
+    # Coarse levels cover the range up to their watermark; finer levels take over from there
+    for current in reversed(LEVELS[:LEVELS.index(level) + 1]):
+        upper = end_ts + 1 if current == 'raw' else min(end_ts + 1, _watermark(conn, current))
+        if upper <= position:
+            continue
+        if current == 'raw':
+            # Steps from the value in effect at position up to the last observation
+            rows.extend((ts, count, count, count) for ts, count in step_series(conn, channel_id, position, end_ts))
+        else:
+            rows.extend(conn.execute(f'''
+                SELECT period, last_count, min_count, max_count FROM {ROLLUP_TABLES[current]}
+                WHERE channel_id = ? AND period >= ? AND period < ? ORDER BY period
+            ''', (channel_id, _period_start(current, position), upper)))
+        position = upper
+    return level, rows
+
+
+def main():
+    """Apply the retention policy or read a channel's history."""
+    parser = argparse.ArgumentParser(description='Roll up and prune subscriber history')
+    parser.add_argument('--db', default=DEFAULT_STATS_DB, help='Path to the statistics database')
+    parser.add_argument('--raw_days', type=int, default=90, help='Days of raw snapshots to keep')
+    parser.add_argument('--daily_days', type=int, default=730, help='Days of daily rollups to keep')
+    parser.add_argument('--weekly_days', type=int, default=1825, help='Days of weekly rollups to keep')
+    parser.add_argument('--channel_id', help='Print this channel\'s history instead of applying the policy')
+    parser.add_argument('--days', type=int, default=30, help='Days of history to print with --channel_id')
+    args = parser.parse_args()
+
+    policy = RetentionPolicy(args.raw_days, args.daily_days, args.weekly_days)
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        if args.channel_id:
+            level, rows = query_history(conn, args.channel_id, int(time.time()) - args.days * DAY, policy=policy)
+            print(f"{len(rows)} {level} points")
+            for ts, last, low, high in rows:
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(ts))} {last:>14,} (min {low:,}, max {high:,})")
+        else:
+            result = apply_retention(conn, policy)
+            for action, counts in result.items():
+                print(f"{action}: " + ", ".join(f"{level} {count}" for level, count in counts.items()))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Negative-result store for dead, terminated and non-channel URLs.
+
+Failed fetches are classified as permanent (404/410, not a YouTube URL, no
+channel information on the page, channel not found) or transient (429, 5xx,
+timeouts, connection errors). Each consecutive failure doubles the time until
+the URL may be re-checked, starting from a longer base interval for permanent
+failures, so known-dead channels stop costing requests. A success removes the
+entry.
+
+Example:
+    # Show how many URLs are currently being skipped, by classification
+    python negative_cache.py --stats
+
+    # Forget all entries so every URL is re-checked
+    python negative_cache.py --clear
+"""
+
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from channel_url import canonical_channel_url
+from sqlite_store import open_store, select_in
+
+DEFAULT_NEGATIVE_CACHE_FILE = Path(__file__).resolve().parents[2] / 'data' / 'negative_cache.db'
+
+PERMANENT = 'permanent'
+TRANSIENT = 'transient'
+
+# Errors that say the URL itself is bad rather than that the request failed
+PERMANENT_ERRORS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'^HTTP (404|410)\b',
+        r'\b(404|410) Client Error\b',
+        r'^Not a YouTube URL$',
+        r'^Could not extract channel information$',
+        r'^Invalid URL format$',
+        r'^Channel not found$',
+        r'^Empty URL$',
+    ]
+]
+
+# Base and maximum re-check interval in seconds for each classification
+RECHECK_INTERVALS = {
+    PERMANENT: (7 * 24 * 3600, 180 * 24 * 3600),
+    TRANSIENT: (3600, 24 * 3600),
+}
+
+
+def classify_error(error_message: str) -> str:
+    """Return PERMANENT or TRANSIENT for a fetch error message."""
+    if any(pattern.search(error_message or '') for pattern in PERMANENT_ERRORS):
+        return PERMANENT
+    return TRANSIENT
+
+
+@dataclass
+class NegativeEntry:
+    """A URL that failed, and when it may be fetched again"""
+    url: str
+    error_message: str
+    classification: str
+    failures: int
+    last_checked: float
+    next_check: float
+
+
+class NegativeCache:
+    """SQLite-backed store of failed URLs with exponential re-check intervals."""
+
+    def __init__(self, cache_file: Path = DEFAULT_NEGATIVE_CACHE_FILE, intervals: Optional[dict] = None):
+        """
+        Open (or create) the negative cache.
+
+        Args:
+            cache_file (Path): Path to the SQLite file
+            intervals (Optional[dict]): Classification -> (base, max) re-check seconds,
+                defaulting to RECHECK_INTERVALS
+        """
+        self._intervals = intervals or RECHECK_INTERVALS
+        self.skipped = 0
+
+        self._conn = open_store(cache_file)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS negative_results (
+                url TEXT PRIMARY KEY,
+                error_message TEXT,
+                classification TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                last_checked REAL NOT NULL,
+                next_check REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def blocked(self, urls: Iterable[str]) -> Dict[str, NegativeEntry]:
+        """Return entries for the given URLs that are not yet due for a re-check."""
+        keys = {}
+        for url in urls:
+            if isinstance(url, str) and url.strip():
+                keys.setdefault(canonical_channel_url(url), []).append(url)
+
+        now = time.time()
+        found = {}
+        rows = select_in(self._conn, '''
+            SELECT url, error_message, classification, failures, last_checked, next_check
+            FROM negative_results
+            WHERE next_check > ? AND url IN ({keys})
+        ''', keys, (now,))
+        for key, error_message, classification, failures, last_checked, next_check in rows:
+            for url in keys[key]:
+                found[url] = NegativeEntry(url, error_message, classification, failures, last_checked, next_check)
+
+        self.skipped += len(found)
+        return found
+
+    def get(self, url: str) -> Optional[NegativeEntry]:
+        """Return the entry for url if it should be skipped, otherwise None."""
+        return self.blocked([url]).get(url)
+
+    def record_failure(self, url: str, error_message: str) -> NegativeEntry:
+        """Record a failed fetch and schedule the next re-check."""
+        return self.record_many({url: error_message or ''})[url]
+
+    def record_success(self, url: str) -> None:
+        """Forget a URL once it has been fetched successfully."""
+        self.record_many({url: None})
+
+    def record_many(self, outcomes: Dict[str, Optional[str]]) -> Dict[str, NegativeEntry]:
+        """
+        Record several fetch outcomes in one transaction.
+
+        Args:
+            outcomes (Dict[str, Optional[str]]): URL -> error message of a failed fetch,
+                or None for a successful one
+
+        Returns:
+            Dict[str, NegativeEntry]: The new entry for each failed URL
+        """
+        # A later outcome for the same channel wins, as with one call per URL
+        latest = {}
+        for url, error_message in outcomes.items():
+            if isinstance(url, str) and url.strip():
+                latest[canonical_channel_url(url)] = (url, error_message)
+        if not latest:
+            return {}
+
+        failed_keys = [key for key, (_, error_message) in latest.items() if error_message is not None]
+        previous = {
+            key: (failures, classification, first_seen)
+            for key, failures, classification, first_seen in select_in(
+                self._conn, 'SELECT url, failures, classification, first_seen FROM negative_results WHERE url IN ({keys})',
+                failed_keys
+            )
+        }
+
+        now = time.time()
+        rows = []
+        entries = {}
+        for key in failed_keys:
+            url, error_message = latest[key]
+            classification = classify_error(error_message)
+            row = previous.get(key)
+            # A change of classification restarts the backoff for the new class
+            failures = row[0] + 1 if row and row[1] == classification else 1
+            first_seen = row[2] if row else now
+            base, cap = self._intervals[classification]
+            next_check = now + min(base * 2 ** (failures - 1), cap)
+            rows.append((key, error_message, classification, failures, first_seen, now, next_check))
+            entries[url] = NegativeEntry(url, error_message, classification, failures, now, next_check)
+
+        with self._conn:
+            self._conn.executemany(
+                'DELETE FROM negative_results WHERE url = ?',
+                [(key,) for key, (_, error_message) in latest.items() if error_message is None]
+            )
+            self._conn.executemany('''
+                INSERT OR REPLACE INTO negative_results
+                    (url, error_message, classification, failures, first_seen, last_checked, next_check)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return entries
+
+    def stats(self) -> dict:
+        """Return counts of blocked and due entries per classification."""
+        now = time.time()
+        stats = {}
+        for classification, blocked, due in self._conn.execute('''
+            SELECT classification, SUM(next_check > ?), SUM(next_check <= ?)
+            FROM negative_results GROUP BY classification
+        ''', (now, now)):
+            stats[classification] = {'blocked': blocked, 'due': due}
+        return stats
+
+    def clear(self) -> None:
+        with self._conn:
+            self._conn.execute('DELETE FROM negative_results')
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """Inspect or clear the negative cache."""
+    parser = argparse.ArgumentParser(description='Inspect the negative-result store')
+    parser.add_argument('--cache_file', default=str(DEFAULT_NEGATIVE_CACHE_FILE), help='Path to the negative cache file')
+    parser.add_argument('--stats', action='store_true', help='Print blocked/due counts per classification')
+    parser.add_argument('--clear', action='store_true', help='Delete all entries')
+    args = parser.parse_args()
+
+    cache = NegativeCache(args.cache_file)
+    try:
+        if args.clear:
+            cache.clear()
+            print("Cleared negative cache")
+        else:
+            for classification, counts in cache.stats().items():
+                print(f"{classification}: {counts['blocked']} blocked, {counts['due']} due for re-check")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
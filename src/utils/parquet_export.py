@@ -0,0 +1,402 @@
+"""
+Export subscriber history, channels and parsed videos to a partitioned Parquet lake.
+
+Each table is written as hive-style partitions by UTC fetch date:
+
+    data/lake/subscriber_history/fetch_date=2024-12-01/part-0.parquet
+    data/lake/channels/fetch_date=2024-12-01/part-0.parquet
+    data/lake/videos/fetch_date=2024-12-02/<parser output name>.parquet
+
+- subscriber_history: the change points from youtube_stats.db (see stats_db),
+  partitioned by the day of ts.
+- channels: each channel's row, in the partition of the day it was last
+  updated. A channel that is updated again later appears in a newer
+  partition too; load_channels() keeps the newest version.
+- videos: YoutubeParser CSVs, one file per CSV. The fetch time and channel
+  handle come from the saved page's file name. Durations, view counts and
+  publish dates are stored typed; the video and thumbnail URLs are dropped
+  because they derive from video_id.
+
+Exports are incremental. Only completed days whose partition does not exist
+yet are written (and only parser CSVs not exported yet), so re-running it
+daily adds yesterday's partitions. Each table also records the first day it
+has not exported yet in _exported_until; days before it are never queried
+again, so days without data, which get no partition, are not re-checked on
+every run. Files are written to a temporary name and renamed, so a partition
+is either complete or absent.
+
+IDs and other repetitive strings are dictionary encoded. Rows are sorted by
+channel, and row groups carry min/max statistics. load() therefore skips
+partitions outside the date range and row groups outside the channel filter,
+and reads only the requested columns.
+
+Example:
+    # Export yesterday and any other missing days, plus new parser output
+    python parquet_export.py --db youtube_stats.db --videos_dir output
+
+    # Read one month of one channel's history
+    python parquet_export.py --query subscriber_history --start 2024-11-01 --end 2024-11-30 \\
+        --channel UCX6OQ3DkcsbYNE6H8uQQuVA --columns channel_id,ts,subscriber_count
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import stats_db
+
+DAY = 86400
+DEFAULT_LAKE_DIR = Path(__file__).resolve().parents[2] / 'data' / 'lake'
+PARTITION_FIELD = 'fetch_date'
+ROW_GROUP_SIZE = 128 * 1024
+
+SCHEMAS = {
+    'subscriber_history': pa.schema([
+        ('channel_id', pa.dictionary(pa.int32(), pa.string())),
+        ('ts', pa.int64()),
+        ('subscriber_count', pa.int64()),
+    ]),
+    'channels': pa.schema([
+        ('channel_id', pa.string()),
+        ('name', pa.string()),
+        ('url', pa.string()),
+        ('last_updated', pa.int64()),
+    ]),
+    'videos': pa.schema([
+        ('channel_handle', pa.dictionary(pa.int32(), pa.string())),
+        ('fetched_at', pa.int64()),
+        ('video_id', pa.string()),
+        ('video_title', pa.string()),
+        ('video_duration', pa.int32()),
+        ('video_view_count', pa.int64()),
+        ('video_upload_date', pa.dictionary(pa.int32(), pa.string())),
+        ('video_publish_date', pa.date32()),
+        ('video_description', pa.string()),
+    ]),
+}
+
+# Columns with few distinct values per file; channel IDs repeat in history, not in channels
+DICTIONARY_COLUMNS = {
+    'subscriber_history': ['channel_id'],
+    'channels': [],
+    'videos': ['channel_handle', 'video_upload_date'],
+}
+
+# The saved page name carries the channel and the fetch time, e.g.
+# output_https_www_youtube_com_@1aauto_videos_20241202_112448.csv
+FETCH_TIME_PATTERN = re.compile(r'_(\d{8}_\d{6})(?:\.\w+)?$')
+HANDLE_PATTERN = re.compile(r'@([\w.-]+?)(?:_videos|_shorts|_streams|_featured)?_\d{8}_\d{6}')
+
+
+def _day(ts: int) -> date:
+    return datetime.fromtimestamp(ts, timezone.utc).date()
+
+
+def _day_start(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def partition_dir(lake_dir: Path, table: str, day: date) -> Path:
+    return Path(lake_dir) / table / f'{PARTITION_FIELD}={day.isoformat()}'
+
+
+def _write(table: pa.Table, path: Path, dictionary_columns: List[str]) -> None:
+    """Write a Parquet file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    pq.write_table(
+        table, tmp_path,
+        compression='zstd',
+        use_dictionary=dictionary_columns,
+        write_statistics=True,
+        row_group_size=ROW_GROUP_SIZE
+    )
+    os.replace(tmp_path, path)
+
+
+def _watermark_path(lake_dir: Path, table: str) -> Path:
+    # A leading underscore keeps the file out of the dataset, like Spark's _SUCCESS
+    return Path(lake_dir) / table / '_exported_until'
+
+
+def _read_watermark(lake_dir: Path, table: str) -> Optional[date]:
+    """First day of table that has not been exported yet, None before the first export."""
+    try:
+        return date.fromisoformat(_watermark_path(lake_dir, table).read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_watermark(lake_dir: Path, table: str, day: date) -> None:
+    """Record that every day of table before day has been exported."""
+    watermark = _read_watermark(lake_dir, table)
+    if watermark and watermark >= day:
+        return
+    path = _watermark_path(lake_dir, table)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(day.isoformat())
+    os.replace(tmp_path, path)
+
+
+def _missing_days(lake_dir: Path, table: str, first_ts: Optional[int], today: date) -> List[date]:
+    """Completed days from the watermark (or first_ts's day) up to yesterday that have no partition yet."""
+    if first_ts is None:
+        return []
+    watermark = _read_watermark(lake_dir, table)
+    day, days = max(_day(first_ts), watermark) if watermark else _day(first_ts), []
+    while day < today:
+        if not (partition_dir(lake_dir, table, day) / 'part-0.parquet').exists():
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def export_history(conn: sqlite3.Connection, lake_dir: Path = DEFAULT_LAKE_DIR, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Write a partition for every completed day of subscriber_history not exported yet.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the statistics database
+        lake_dir (Path): Root of the Parquet lake
+        today (Optional[date]): Current UTC day; its partition is left until the day is over
+
+    Returns:
+        Dict[str, int]: Partitions and rows written
+    """
+    today = today or datetime.now(timezone.utc).date()
+    first_ts = conn.execute('SELECT MIN(ts) FROM subscriber_history').fetchone()[0]
+    written = {'partitions': 0, 'rows': 0}
+    for day in _missing_days(lake_dir, 'subscriber_history', first_ts, today):
+        # idx_history_ts finds the day's rows; sorting by channel makes the row group statistics selective
+        rows = conn.execute('''
+            SELECT channel_id, ts, subscriber_count FROM subscriber_history
+            WHERE ts >= ? AND ts < ? ORDER BY channel_id, ts
+        ''', (_day_start(day), _day_start(day) + DAY)).fetchall()
+        if not rows:
+            continue
+        channel_ids, ts, counts = zip(*rows)
+        table = pa.table({
+            'channel_id': pa.array(channel_ids, pa.string()).dictionary_encode(),
+            'ts': pa.array(ts, pa.int64()),
+            'subscriber_count': pa.array(counts, pa.int64()),
+        }, schema=SCHEMAS['subscriber_history'])
+        _write(table, partition_dir(lake_dir, 'subscriber_history', day) / 'part-0.parquet',
+               DICTIONARY_COLUMNS['subscriber_history'])
+        written['partitions'] += 1
+        written['rows'] += len(rows)
+    if first_ts is not None:
+        _write_watermark(lake_dir, 'subscriber_history', today)
+    return written
+
+
+def export_channels(conn: sqlite3.Connection, lake_dir: Path = DEFAULT_LAKE_DIR, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Write each completed day's updated channels not exported yet, by last_updated.
+
+    Returns:
+        Dict[str, int]: Partitions and rows written
+    """
+    today = today or datetime.now(timezone.utc).date()
+    first_ts = conn.execute('SELECT MIN(last_updated) FROM channels').fetchone()[0]
+    days = _missing_days(lake_dir, 'channels', first_ts, today)
+    written = {'partitions': 0, 'rows': 0}
+    if not days:
+        if first_ts is not None:
+            _write_watermark(lake_dir, 'channels', today)
+        return written
+    # channels has no index on last_updated, so read the whole span once and split it by day
+    by_day: Dict[date, list] = {}
+    for row in conn.execute('''
+        SELECT channel_id, name, url, last_updated FROM channels
+        WHERE last_updated >= ? AND last_updated < ? ORDER BY channel_id
+    ''', (_day_start(days[0]), _day_start(today))):
+        by_day.setdefault(_day(row[3]), []).append(row)
+
+    for day in days:
+        rows = by_day.get(day)
+        if not rows:
+            continue
+        table = pa.Table.from_pylist(
+            [dict(zip(SCHEMAS['channels'].names, row)) for row in rows], schema=SCHEMAS['channels']
+        )
+        _write(table, partition_dir(lake_dir, 'channels', day) / 'part-0.parquet', DICTIONARY_COLUMNS['channels'])
+        written['partitions'] += 1
+        written['rows'] += len(rows)
+    _write_watermark(lake_dir, 'channels', today)
+    return written
+
+
+def _parse_view_count(value: str) -> int:
+    digits = re.sub(r'[^\d]', '', str(value))
+    return int(digits) if digits else 0
+
+
+def _parse_duration(value: str) -> int:
+    try:
+        seconds = 0
+        for part in str(value).split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return 0
+
+
+def export_videos(videos_dir: Path, lake_dir: Path = DEFAULT_LAKE_DIR) -> Dict[str, int]:
+    """
+    Write every YoutubeParser CSV in videos_dir that has not been exported yet.
+
+    CSVs whose name has no fetch time are skipped, since they cannot be partitioned.
+
+    Returns:
+        Dict[str, int]: Files and rows written, and CSVs skipped
+    """
+    written = {'files': 0, 'rows': 0, 'skipped': 0}
+    for csv_file in sorted(Path(videos_dir).glob('*.csv')):
+        match = FETCH_TIME_PATTERN.search(csv_file.stem)
+        if not match:
+            written['skipped'] += 1
+            continue
+        fetched = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').replace(tzinfo=timezone.utc)
+        path = partition_dir(lake_dir, 'videos', fetched.date()) / f'{csv_file.stem}.parquet'
+        if path.exists():
+            continue
+
+        df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        if df.empty:
+            continue
+        handle = HANDLE_PATTERN.search(csv_file.stem)
+        publish_dates = pd.to_datetime(df['video_publish_date_absolute'], errors='coerce')
+        table = pa.table({
+            'channel_handle': pa.array([f'@{handle.group(1)}' if handle else ''] * len(df)).dictionary_encode(),
+            'fetched_at': pa.array([int(fetched.timestamp())] * len(df), pa.int64()),
+            'video_id': pa.array(df['video_id'], pa.string()),
+            'video_title': pa.array(df['video_title'], pa.string()),
+            'video_duration': pa.array(df['video_duration'].map(_parse_duration), pa.int32()),
+            'video_view_count': pa.array(df['video_view_count'].map(_parse_view_count), pa.int64()),
+            'video_upload_date': pa.array(df['video_upload_date'], pa.string()).dictionary_encode(),
+            'video_publish_date': pa.array(publish_dates.dt.date.where(publish_dates.notna(), None), pa.date32()),
+            'video_description': pa.array(df['video_description'], pa.string()),
+        }, schema=SCHEMAS['videos'])
+        _write(table, path, DICTIONARY_COLUMNS['videos'])
+        written['files'] += 1
+        written['rows'] += len(df)
+    return written
+
+
+def dataset(table: str, lake_dir: Path = DEFAULT_LAKE_DIR) -> ds.Dataset:
+    """Open one table of the lake with its fetch_date partitions."""
+    partitioning = ds.partitioning(pa.schema([(PARTITION_FIELD, pa.date32())]), flavor='hive')
+    return ds.dataset(Path(lake_dir) / table, format='parquet', partitioning=partitioning,
+                      schema=SCHEMAS[table].append(pa.field(PARTITION_FIELD, pa.date32())),
+                      exclude_invalid_files=False)
+
+
+def build_filter(start: Optional[date] = None, end: Optional[date] = None,
+                 channel_ids: Optional[Sequence[str]] = None, channel_column: str = 'channel_id') -> Optional[ds.Expression]:
+    """Filter on the fetch_date partition (inclusive range) and optionally on channels."""
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field(PARTITION_FIELD) >= pa.scalar(start, pa.date32()))
+    if end is not None:
+        conditions.append(ds.field(PARTITION_FIELD) <= pa.scalar(end, pa.date32()))
+    if channel_ids:
+        conditions.append(ds.field(channel_column).isin(list(channel_ids)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def load(table: str, columns: Optional[Iterable[str]] = None, start: Optional[date] = None,
+         end: Optional[date] = None, channel_ids: Optional[Sequence[str]] = None,
+         lake_dir: Path = DEFAULT_LAKE_DIR) -> pd.DataFrame:
+    """
+    Read part of a table, pushing the column projection and filters down to Parquet.
+
+    Partitions outside [start, end] are never opened. Within a file, row groups
+    whose channel statistics exclude every requested channel are skipped, and
+    only the requested columns are decoded.
+
+    Args:
+        table (str): 'subscriber_history', 'channels' or 'videos'
+        columns (Optional[Iterable[str]]): Columns to read (default: all, plus fetch_date)
+        start (Optional[date]): First fetch date to read
+        end (Optional[date]): Last fetch date to read
+        channel_ids (Optional[Sequence[str]]): Only these channels (handles for videos)
+        lake_dir (Path): Root of the Parquet lake
+
+    Returns:
+        pd.DataFrame: Matching rows; dictionary columns come back as categoricals
+    """
+    if not (Path(lake_dir) / table).exists():
+        return pd.DataFrame(columns=list(columns) if columns else SCHEMAS[table].names)
+    expression = build_filter(start, end, channel_ids, 'channel_handle' if table == 'videos' else 'channel_id')
+    return dataset(table, lake_dir).to_table(
+        columns=list(columns) if columns else None, filter=expression
+    ).to_pandas()
+
+
+def load_channels(lake_dir: Path = DEFAULT_LAKE_DIR, end: Optional[date] = None) -> pd.DataFrame:
+    """Return the newest exported version of every channel, as of end (default: all partitions)."""
+    df = load('channels', start=None, end=end, lake_dir=lake_dir)
+    return df.sort_values('last_updated').drop_duplicates('channel_id', keep='last').reset_index(drop=True)
+
+
+def scanned_bytes(table: str, start: Optional[date] = None, end: Optional[date] = None,
+                  lake_dir: Path = DEFAULT_LAKE_DIR) -> int:
+    """Size of the files load() opens for the date range, before row group and column pruning."""
+    if not (Path(lake_dir) / table).exists():
+        return 0
+    fragments = dataset(table, lake_dir).get_fragments(filter=build_filter(start, end))
+    return sum(os.path.getsize(fragment.path) for fragment in fragments)
+
+
+def main():
+    """Export to the lake, or query it."""
+    parser = argparse.ArgumentParser(description='Export statistics and parsed videos to partitioned Parquet')
+    parser.add_argument('--db', default=stats_db.DEFAULT_STATS_DB, help='Path to the statistics database')
+    parser.add_argument('--lake_dir', default=str(DEFAULT_LAKE_DIR), help='Root of the Parquet lake')
+    parser.add_argument('--videos_dir', help='Folder of YoutubeParser CSVs to export')
+    parser.add_argument('--query', choices=sorted(SCHEMAS), help='Read a table instead of exporting')
+    parser.add_argument('--start', type=date.fromisoformat, help='First fetch date to read (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last fetch date to read (YYYY-MM-DD)')
+    parser.add_argument('--channel', action='append', help='Channel ID (or handle for videos) to read; repeatable')
+    parser.add_argument('--columns', help='Comma-separated columns to read')
+    args = parser.parse_args()
+    lake_dir = Path(args.lake_dir)
+
+    if args.query:
+        columns = args.columns.split(',') if args.columns else None
+        df = load(args.query, columns, args.start, args.end, args.channel, lake_dir)
+        print(df)
+        print(f"{len(df):,} rows from {scanned_bytes(args.query, args.start, args.end, lake_dir) / 1e6:,.1f} MB of files")
+        return
+
+    # connect() would create a mistyped path; it also adds columns an older database lacks
+    if not Path(args.db).exists():
+        parser.error(f"no statistics database at {args.db}")
+    conn = stats_db.connect(args.db)
+    try:
+        history = export_history(conn, lake_dir)
+        channels = export_channels(conn, lake_dir)
+    finally:
+        conn.close()
+    print(f"subscriber_history: {history['partitions']:,} partitions, {history['rows']:,} rows")
+    print(f"channels: {channels['partitions']:,} partitions, {channels['rows']:,} rows")
+    if args.videos_dir:
+        videos = export_videos(Path(args.videos_dir), lake_dir)
+        print(f"videos: {videos['files']:,} files, {videos['rows']:,} rows ({videos['skipped']:,} CSVs without a fetch time)")
+
+
+if __name__ == "__main__":
+    main()
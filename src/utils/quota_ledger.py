@@ -0,0 +1,237 @@
+"""
+Persistent YouTube Data API quota ledger and cost-aware work planner.
+
+Quota resets at midnight Pacific time, so usage is recorded per API key and
+Pacific-time day in a small SQLite file shared by every process using the key.
+Each request reserves its cost (from ENDPOINT_COSTS) before it is sent; when a
+reservation would exceed the daily quota QuotaExhausted is raised, letting the
+caller checkpoint and stop instead of failing mid-batch. API keys are stored
+as a short SHA-256 fingerprint, never in clear.
+
+plan_by_cost() orders pending work cheapest-first and splits off what does
+not fit into the remaining budget, maximizing items processed per unit.
+
+Example:
+    # Show today's usage for every key
+    python quota_ledger.py
+
+    # Show the last 7 days
+    python quota_ledger.py --days 7
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlite_store import open_store
+
+DEFAULT_QUOTA_LEDGER_FILE = Path(__file__).resolve().parents[2] / 'data' / 'quota_ledger.db'
+DEFAULT_DAILY_QUOTA = 10000
+
+# Units charged per request (https://developers.google.com/youtube/v3/determine_quota_cost)
+ENDPOINT_COSTS = {
+    'channels.list': 1,
+    'search.list': 100,
+    'videos.list': 1,
+    'playlistItems.list': 1,
+}
+
+PACIFIC = ZoneInfo('America/Los_Angeles')
+
+
+class QuotaExhausted(Exception):
+    """Raised when a request would exceed the key's daily quota."""
+
+
+def pacific_day(now: Optional[datetime] = None) -> str:
+    """Return the quota day (YYYY-MM-DD in Pacific time) for now."""
+    return (now or datetime.now(PACIFIC)).astimezone(PACIFIC).strftime('%Y-%m-%d')
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Return a stable, non-reversible identifier for an API key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class QuotaLedger:
+    """Per-key, per-day quota accounting shared between processes through SQLite."""
+
+    def __init__(self, api_key: str, daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 ledger_file: Path = DEFAULT_QUOTA_LEDGER_FILE):
+        """
+        Open (or create) the ledger for one API key.
+
+        Args:
+            api_key (str): YouTube Data API key
+            daily_quota (int): Units available per Pacific-time day
+            ledger_file (Path): Path to the SQLite ledger file
+        """
+        self.key_id = key_fingerprint(api_key)
+        self.daily_quota = daily_quota
+
+        # Autocommit mode so reservations are opened explicitly with BEGIN IMMEDIATE. The async
+        # client calls in from worker threads, one at a time under _lock
+        self._conn = open_store(ledger_file, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                key_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                units INTEGER NOT NULL,
+                calls INTEGER NOT NULL,
+                PRIMARY KEY (key_id, day, endpoint)
+            )
+        ''')
+
+    def used(self, day: Optional[str] = None) -> int:
+        """Units used by this key on day (default: today)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE key_id = ? AND day = ?',
+                (self.key_id, day or pacific_day())
+            ).fetchone()
+        return row[0]
+
+    def remaining(self) -> int:
+        """Units left for today."""
+        return max(0, self.daily_quota - self.used())
+
+    def reserve(self, endpoint: str, calls: int = 1) -> int:
+        """
+        Charge calls requests to endpoint against today's quota.
+
+        Returns:
+            int: Units charged
+
+        Raises:
+            QuotaExhausted: If the request would exceed the daily quota; nothing is charged
+        """
+        with self._lock:
+            return self._reserve(endpoint, calls)
+
+    def _reserve(self, endpoint: str, calls: int) -> int:
+        cost = ENDPOINT_COSTS[endpoint] * calls
+        day = pacific_day()
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            used = self._conn.execute(
+                'SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE key_id = ? AND day = ?',
+                (self.key_id, day)
+            ).fetchone()[0]
+            if used + cost > self.daily_quota:
+                self._conn.execute('ROLLBACK')
+                raise QuotaExhausted(
+                    f"Daily quota exhausted for key {self.key_id}: {used}/{self.daily_quota} units used, "
+                    f"{endpoint} needs {cost}"
+                )
+            self._charge(day, endpoint, cost, calls)
+            self._conn.execute('COMMIT')
+            return cost
+        except QuotaExhausted:
+            raise
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def mark_exhausted(self) -> None:
+        """Record that the API reported quotaExceeded, so every process stops using the key today."""
+        with self._lock:
+            self._mark_exhausted()
+
+    def _mark_exhausted(self) -> None:
+        day = pacific_day()
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            remaining = self.daily_quota - self._conn.execute(
+                'SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE key_id = ? AND day = ?',
+                (self.key_id, day)
+            ).fetchone()[0]
+            if remaining > 0:
+                self._charge(day, 'quotaExceeded', remaining, 0)
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _charge(self, day: str, endpoint: str, units: int, calls: int) -> None:
+        self._conn.execute('''
+            INSERT INTO quota_usage (key_id, day, endpoint, units, calls) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key_id, day, endpoint)
+            DO UPDATE SET units = units + excluded.units, calls = calls + excluded.calls
+        ''', (self.key_id, day, endpoint, units, calls))
+
+    def usage(self, day: Optional[str] = None) -> Dict[str, Tuple[int, int]]:
+        """Return endpoint -> (units, calls) for this key on day (default: today)."""
+        with self._lock:
+            return {
+                endpoint: (units, calls)
+                for endpoint, units, calls in self._conn.execute(
+                    'SELECT endpoint, units, calls FROM quota_usage WHERE key_id = ? AND day = ? ORDER BY endpoint',
+                    (self.key_id, day or pacific_day())
+                )
+            }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def plan_by_cost(items: Iterable[Hashable], cost: Callable[[Hashable], float],
+                 budget: float) -> Tuple[List[Hashable], List[Hashable]]:
+    """
+    Order work cheapest-first and split it at the quota budget.
+
+    Args:
+        items (Iterable[Hashable]): Pending work items
+        cost (Callable[[Hashable], float]): Estimated units for one item
+        budget (float): Units available
+
+    Returns:
+        Tuple[List, List]: Items to run now in order, and items deferred to a later day
+    """
+    planned, deferred = [], []
+    spent = 0.0
+    # sorted() is stable, so equally priced items keep their input order
+    for item in sorted(items, key=cost):
+        item_cost = cost(item)
+        # Tolerance for fractional per-item costs such as 1/50 unit
+        if spent + item_cost <= budget + 1e-9:
+            planned.append(item)
+            spent += item_cost
+        else:
+            deferred.append(item)
+    return planned, deferred
+
+
+def main():
+    """Print recorded usage per key and day."""
+    parser = argparse.ArgumentParser(description='Show YouTube Data API quota usage')
+    parser.add_argument('--ledger_file', default=str(DEFAULT_QUOTA_LEDGER_FILE), help='Path to the quota ledger')
+    parser.add_argument('--days', type=int, default=1, help='Number of Pacific-time days to show (default: 1)')
+    args = parser.parse_args()
+
+    today = datetime.now(PACIFIC)
+    days = [pacific_day(today - timedelta(days=offset)) for offset in range(args.days)]
+    conn = sqlite3.connect(args.ledger_file)
+    try:
+        rows = conn.execute(f'''
+            SELECT day, key_id, endpoint, units, calls FROM quota_usage
+            WHERE day IN ({','.join('?' * len(days))})
+            ORDER BY day DESC, key_id, endpoint
+        ''', days).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        print("No quota usage recorded")
+    for day, key_id, endpoint, units, calls in rows:
+        print(f"{day} {key_id} {endpoint:<20} {units:>6} units {calls:>6} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Tiered refresh scheduler for the channels in youtube_stats.db.
+
+Every channel in channel_latest gets a refresh interval from its tier. Large
+channels are refreshed daily and the long tail monthly. A channel whose count
+moved more than VOLATILE_DAILY_CHANGE per day since its previous observation
+is promoted one tier. If the tiers would need more channels.list calls per
+day than the daily budget allows, all intervals are stretched by the same
+factor, so the whole set stays as fresh as the quota permits.
+
+refresh_schedule keeps each channel's next due time under an index, which
+serves as a persistent priority queue. due_batches() pops the most overdue
+channels that fit into a quota budget, as 50-ID channels.list batches (1 unit
+each). refresh_due() fetches them, records the counts through stats_db and
+reschedules the channels.
+
+Example:
+    # Show tiers, daily demand and how much is due now
+    python refresh_scheduler.py --db youtube_stats.db
+
+    # Refresh due channels with up to 2000 units
+    python refresh_scheduler.py --db youtube_stats.db --run --budget 2000 --api_key "KEY_ONE,KEY_TWO"
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import stats_db
+from api_key_pool import ApiKeyPool, parse_api_keys
+from quota_ledger import QuotaExhausted, DEFAULT_DAILY_QUOTA
+from youtube_api_async import AsyncYouTubeClient
+
+HOUR = 3600
+DAY = 86400
+BATCH_SIZE = 50
+
+# (minimum subscribers, refresh interval in hours), largest tier first
+TIERS = (
+    (10_000_000, 24),
+    (1_000_000, 48),
+    (100_000, 24 * 7),
+    (10_000, 24 * 14),
+    (0, 24 * 30),
+)
+
+# Relative change per day above which a channel is refreshed at the next faster tier
+VOLATILE_DAILY_CHANGE = 0.005
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS refresh_schedule (
+        channel_id TEXT PRIMARY KEY,
+        tier INTEGER NOT NULL,
+        interval INTEGER NOT NULL,
+        last_refreshed INTEGER NOT NULL,
+        last_attempted INTEGER NOT NULL DEFAULT 0,
+        next_due INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_schedule_due ON refresh_schedule (next_due);
+'''
+
+
+def init_schedule(conn: sqlite3.Connection) -> None:
+    """Create the schedule table if it does not exist."""
+    conn.executescript(SCHEMA)
+
+
+def _tier_sql() -> str:
+    """SQL expression for a channel_latest row's tier, including the volatility promotion."""
+    size_tier = 'CASE ' + ' '.join(
+        f'WHEN subscriber_count >= {minimum} THEN {tier}' for tier, (minimum, _) in enumerate(TIERS)
+    ) + f' ELSE {len(TIERS) - 1} END'
+    volatile = f'''(
+        previous_count IS NOT NULL AND ts > previous_ts
+        AND ABS(delta) * {DAY}.0 / MAX(subscriber_count, 1) / MAX(ts - previous_ts, {HOUR}) > {VOLATILE_DAILY_CHANGE}
+    )'''
+    return f'MAX(({size_tier}) - {volatile}, 0)'
+
+
+def sync(conn: sqlite3.Connection, daily_budget: float) -> Dict[str, object]:
+    """
+    Assign tiers and intervals to every channel in channel_latest, in one transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection from stats_db.connect()
+        daily_budget (float): channels.list units per day available for refreshes
+
+    Returns:
+        Dict[str, object]: channels per tier, the channels.list units per day the tiers
+            need, and the factor intervals were stretched by to fit the budget
+    """
+    init_schedule(conn)
+    with conn:
+        conn.execute(f'''
+            INSERT INTO refresh_schedule (channel_id, tier, interval, last_refreshed, next_due)
+            SELECT channel_id, {_tier_sql()}, 0, ts, ts FROM channel_latest WHERE true
+            ON CONFLICT (channel_id) DO UPDATE SET
+                tier = excluded.tier, last_refreshed = excluded.last_refreshed
+        ''')
+        tier_counts = dict(conn.execute('SELECT tier, COUNT(*) FROM refresh_schedule GROUP BY tier'))
+        demand = sum(
+            count * DAY / (TIERS[tier][1] * HOUR) / BATCH_SIZE for tier, count in tier_counts.items()
+        )
+        stretch = max(1.0, demand / daily_budget) if daily_budget > 0 else 1.0
+        interval_sql = 'CASE tier ' + ' '.join(
+            f'WHEN {tier} THEN {int(hours * HOUR * stretch)}' for tier, (_, hours) in enumerate(TIERS)
+        ) + ' END'
+        conn.execute(f'''
+            UPDATE refresh_schedule SET
+                interval = {interval_sql},
+                next_due = MAX(last_refreshed, last_attempted) + {interval_sql}
+        ''')
+    return {
+        'tiers': {f'>= {TIERS[tier][0]:,}': count for tier, count in sorted(tier_counts.items())},
+        'units_per_day': round(demand, 1),
+        'stretch': round(stretch, 2)
+    }
+
+
+def due_batches(conn: sqlite3.Connection, budget_units: int, now: Optional[float] = None) -> List[List[str]]:
+    """
+    Return the most overdue channels that fit into budget_units, as channels.list batches.
+
+    Args:
+        conn (sqlite3.Connection): Connection from stats_db.connect()
+        budget_units (int): Units available; one unit fetches up to 50 channels
+        now (Optional[float]): Current time in epoch seconds
+
+    Returns:
+        List[List[str]]: Batches of up to 50 channel IDs, most overdue first
+    """
+    init_schedule(conn)
+    now = int(time.time() if now is None else now)
+    channel_ids = [row[0] for row in conn.execute(
+        'SELECT channel_id FROM refresh_schedule WHERE next_due <= ? ORDER BY next_due LIMIT ?',
+        (now, max(0, int(budget_units)) * BATCH_SIZE)
+    )]
+    return [channel_ids[i:i + BATCH_SIZE] for i in range(0, len(channel_ids), BATCH_SIZE)]
+
+
+def mark_attempted(conn: sqlite3.Connection, channel_ids: Iterable[str], now: Optional[float] = None) -> None:
+    """Reschedule channels that were requested, whether or not the API returned them."""
+    now = int(time.time() if now is None else now)
+    with conn:
+        conn.executemany(
+            'UPDATE refresh_schedule SET last_attempted = ?1, next_due = ?1 + interval WHERE channel_id = ?2',
+            [(now, channel_id) for channel_id in channel_ids]
+        )
+
+
+async def refresh_due(conn: sqlite3.Connection, client: AsyncYouTubeClient, budget_units: int,
+                      now: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Fetch the due channels that fit into budget_units and record their counts.
+
+    Batches run concurrently. If quota runs out, the batches that completed are
+    still recorded and the rest stay due.
+
+    Returns:
+        Tuple[int, int]: Channels refreshed and channels.list requests sent
+    """
+    batches = due_batches(conn, budget_units, now)
+
+    async def fetch_batch(batch):
+        response = await client.channels_list(ids=batch, fields='items(id,snippet(title),statistics(subscriberCount,viewCount))')
+        return batch, [
+            {
+                'channel_id': channel['id'],
+                'name': channel['snippet']['title'],
+                'subscribers': int(channel['statistics']['subscriberCount']),
+                'views': int(channel['statistics']['viewCount']) if 'viewCount' in channel['statistics'] else None,
+                'url': f"https://youtube.com/channel/{channel['id']}"
+            }
+            for channel in response.get('items', [])
+            # Some channels hide their subscriber count
+            if 'subscriberCount' in channel.get('statistics', {})
+        ]
+
+    results = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+    refreshed, attempted = [], []
+    for result in results:
+        if isinstance(result, QuotaExhausted):
+            continue
+        if isinstance(result, Exception):
+            print(f"Error refreshing channels: {str(result)}")
+            continue
+        batch, channels = result
+        attempted.extend(batch)
+        refreshed.extend(channels)
+
+    ts = int(time.time() if now is None else now)
+    stats_db.record_snapshot(conn, refreshed, ts)
+    mark_attempted(conn, attempted, ts)
+    return len(refreshed), len(batches)
+
+
+def main():
+    """Show the refresh plan, or refresh the channels that are due."""
+    parser = argparse.ArgumentParser(description='Schedule channel refreshes within the daily quota')
+    parser.add_argument('--db', default=stats_db.DEFAULT_STATS_DB, help='Path to the statistics database')
+    parser.add_argument('--api_key', default=os.getenv('YOUTUBE_API_KEYS') or os.getenv('YOUTUBE_API_KEY'),
+                        help='Comma-separated API keys (default: $YOUTUBE_API_KEYS or $YOUTUBE_API_KEY)')
+    parser.add_argument('--daily_budget', type=float,
+                        help='channels.list units per day for refreshes (default: daily quota of every key)')
+    parser.add_argument('--run', action='store_true', help='Refresh the channels that are due')
+    parser.add_argument('--budget', type=int, help='Units to spend on this run (default: remaining quota)')
+    args = parser.parse_args()
+
+    api_keys = parse_api_keys(args.api_key)
+    daily_budget = args.daily_budget or max(1, len(api_keys)) * DEFAULT_DAILY_QUOTA
+    conn = stats_db.connect(args.db)
+    try:
+        plan = sync(conn, daily_budget)
+        for tier, count in plan['tiers'].items():
+            print(f"Tier {tier} subscribers: {count:,} channels")
+        print(f"Needs {plan['units_per_day']:,} units/day of {daily_budget:,.0f}; intervals stretched x{plan['stretch']}")
+        print(f"Due now: {sum(len(batch) for batch in due_batches(conn, 10 ** 9)):,} channels")
+
+        if args.run:
+            if not api_keys:
+                parser.error('--run needs --api_key or YOUTUBE_API_KEY(S)')
+            key_pool = ApiKeyPool(api_keys)
+            budget = args.budget if args.budget is not None else key_pool.remaining()
+
+            async def run():
+                async with AsyncYouTubeClient(None, key_pool=key_pool) as client:
+                    return await refresh_due(conn, client, budget)
+
+            try:
+                refreshed, requests = asyncio.run(run())
+            finally:
+                key_pool.close()
+            print(f"Refreshed {refreshed:,} channels with {requests:,} channels.list requests")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
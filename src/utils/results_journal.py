@@ -0,0 +1,127 @@
+"""
+Results journal for the CSV validators.
+
+Validation results are appended to a small SQLite table keyed by URL instead of
+rewriting the whole input CSV at every checkpoint. Pending results are merged
+into the CSV in a single pass at the end of a run, or on demand.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from sqlite_store import open_store
+
+
+class ResultsJournal:
+    """Append-only store of per-URL validation results backed by SQLite."""
+
+    def __init__(self, journal_file: Path, columns: Dict[str, Any]):
+        """
+        Open (or create) a results journal.
+
+        Args:
+            journal_file (Path): Path to the SQLite journal file
+            columns (Dict[str, Any]): Result column names mapped to the default
+                value used when the column is missing from the CSV
+        """
+        self._journal_file = Path(journal_file)
+        self._columns = columns
+        self._conn = open_store(self._journal_file)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                url TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def append(self, results: List[dict], url_column: str) -> None:
+        """Record a batch of results; a later result for the same URL replaces the earlier one."""
+        rows = [
+            (result[url_column], json.dumps({col: result[col] for col in self._columns if col in result}, default=str))
+            for result in results
+            if isinstance(result.get(url_column), str)
+        ]
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO results (url, data) VALUES (?, ?)', rows)
+
+    def load(self) -> pd.DataFrame:
+        """Return all journaled results as a DataFrame indexed by URL."""
+        rows = self._conn.execute('SELECT url, data FROM results').fetchall()
+        return pd.DataFrame(
+            [json.loads(data) for _, data in rows],
+            index=pd.Index([url for url, _ in rows], name='url'),
+            columns=list(self._columns)
+        )
+
+    def apply(self, df: pd.DataFrame, url_column: str) -> pd.DataFrame:
+        """
+        Write journaled results into the matching rows of df in one vectorized pass.
+
+        Every row with a journaled URL is updated, including repeated URLs. A column the
+        result recorded is written even when its value is null, so a later result can
+        clear an earlier value; columns the result did not record are left as they are.
+        """
+        for col, default_value in self._columns.items():
+            if col not in df.columns:
+                df[col] = default_value
+
+        results = {url: json.loads(data) for url, data in self._conn.execute('SELECT url, data FROM results')}
+        if not results:
+            return df
+
+        urls = df.loc[df[url_column].isin(results.keys()), url_column]
+        for col in self._columns:
+            recorded = {url: result[col] for url, result in results.items() if col in result}
+            rows = urls[urls.isin(recorded.keys())]
+            if rows.empty:
+                continue
+            if df[col].dtype != object:
+                df[col] = df[col].astype(object)
+            df.loc[rows.index, col] = [recorded[url] for url in rows]
+        return df
+
+    def merge_into_csv(self, csv_file: Path, url_column: str) -> int:
+        """
+        Merge pending results into csv_file and clear the journal.
+
+        The CSV is re-read in full, updated once and replaced atomically, so an
+        interrupted merge leaves the original file intact.
+
+        Returns:
+            int: Number of journaled results merged
+        """
+        pending = len(self)
+        if pending == 0:
+            return 0
+
+        csv_file = Path(csv_file)
+        df = self.apply(pd.read_csv(csv_file), url_column)
+
+        fd, tmp_path = tempfile.mkstemp(dir=csv_file.parent, prefix=f".{csv_file.stem}_", suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                df.to_csv(f, index=False)
+            os.replace(tmp_path, csv_file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._conn:
+            self._conn.execute('DELETE FROM results')
+        logging.info(f"Merged {pending} journaled results into {csv_file}")
+        return pending
+
+    def close(self) -> None:
+        self._conn.close()
+
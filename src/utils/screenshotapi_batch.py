@@ -12,12 +12,12 @@ Required Environment Variable:
 """
 
 import os
-import time
 import logging
 import argparse
 import pandas as pd
-from typing import List, Set
+from typing import List, Optional, Set
 from screenshotapi_url import ScreenshotAPI
+from shared_rate_limiter import SharedRateLimiter, configure_bucket
 
 # Configure logging
 logging.basicConfig(
@@ -42,12 +42,18 @@ def save_completed_url(checkpoint_file: str, url: str):
     with open(checkpoint_file, 'a', encoding='utf-8') as f:
         f.write(f"{url}\n")
 
-def take_screenshots(urls: List[str], api_token: str, output_dir: str, delay: float = 1.0) -> int:
+def take_screenshots(urls: List[str], api_token: str, output_dir: str, delay: Optional[float] = None) -> int:
     """
     Take screenshots of URLs sequentially.
+    Requests are paced by the 'screenshotapi' token bucket, shared with any other
+    batch process. A `delay` sets that bucket to one request per `delay` seconds
+    for every process; otherwise its stored rate (by default one per second) applies.
     Returns the number of successful captures.
     """
     api = ScreenshotAPI(api_token, output_dir=output_dir)
+    if delay:
+        configure_bucket('screenshotapi', rate=1 / delay, burst=1)
+    rate_limiter = SharedRateLimiter('screenshotapi')
     success_count = 0
     
     # Create checkpoint file path
@@ -64,6 +70,7 @@ def take_screenshots(urls: List[str], api_token: str, output_dir: str, delay: fl
             success_count += 1
             continue
 
+        rate_limiter.acquire()  # Respect API rate limits
         try:
             if filepath := api.capture(url):
                 logger.info(f"✓ {url} -> {filepath}")
@@ -73,8 +80,6 @@ def take_screenshots(urls: List[str], api_token: str, output_dir: str, delay: fl
                 logger.error(f"✗ Failed: {url}")
         except Exception as e:
             logger.error(f"✗ Error with {url}: {str(e)}")
-        
-        time.sleep(delay)  # Respect API rate limits
     
     return success_count
 
@@ -82,7 +87,7 @@ def main():
     parser = argparse.ArgumentParser(description="Batch screenshot capture from CSV")
     parser.add_argument('--input', required=True, help='Input CSV file')
     parser.add_argument('--columns', required=True, help='Column names with URLs (comma-separated)')
-    parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests (seconds)')
+    parser.add_argument('--delay', type=float, help="Seconds between requests; sets the shared 'screenshotapi' bucket (default: its stored rate, 1/s)")
     parser.add_argument('--output', default='screenshots', help='Output directory for screenshots')
     args = parser.parse_args()
 
@@ -0,0 +1,152 @@
+"""
+Persistent cache of search.list responses.
+
+Channel discovery re-runs the same fixed queries every day. Each search costs
+100 units, but the channels a query finds barely change from one day to the
+next. Responses are therefore stored by (query, request parameters, page
+token) and reused until they are older than the TTL. Fresh quota then goes to
+channels.list statistics, which do change daily.
+
+Example:
+    # Show cache size and how many pages are still fresh
+    python search_cache.py --stats
+
+    # Delete expired pages
+    python search_cache.py --prune
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlite_store import open_store
+
+DEFAULT_SEARCH_CACHE_FILE = Path(__file__).resolve().parents[2] / 'data' / 'search_cache.db'
+
+
+def search_params_key(params: Dict[str, Any]) -> str:
+    """Return a stable key for search parameters, ignoring None values and argument order."""
+    return json.dumps({key: str(value) for key, value in params.items() if value is not None}, sort_keys=True)
+
+
+class SearchCache:
+    """SQLite-backed cache of search.list pages with a TTL."""
+
+    def __init__(self, cache_file: Path = DEFAULT_SEARCH_CACHE_FILE, ttl: float = 7 * 24 * 3600):
+        """
+        Open (or create) the cache.
+
+        Args:
+            cache_file (Path): Path to the SQLite cache file
+            ttl (float): Seconds a cached page stays fresh
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = open_store(cache_file)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                query TEXT NOT NULL,
+                params TEXT NOT NULL,
+                page_token TEXT NOT NULL,
+                response TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (query, params, page_token)
+            )
+        ''')
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+
+    def _fresh_response(self, query: str, params_key: str, page_token: Optional[str]) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            'SELECT response, fetched_at FROM search_cache WHERE query = ? AND params = ? AND page_token = ?',
+            (query.strip(), params_key, page_token or '')
+        ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def get(self, query: str, params: Dict[str, Any], page_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached response for one page if it is still fresh, otherwise None."""
+        response = self._fresh_response(query, search_params_key(params), page_token)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, query: str, params: Dict[str, Any], page_token: Optional[str], response: Dict[str, Any]) -> None:
+        """Store the response fetched for one page."""
+        with self._conn:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO search_cache (query, params, page_token, response, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (query.strip(), search_params_key(params), page_token or '', json.dumps(response), time.time()))
+
+    def cached_pages(self, query: str, params: Dict[str, Any], max_pages: int) -> int:
+        """
+        Count the fresh pages available for query, following nextPageToken from the first page.
+
+        Returns max_pages when the cached chain ends because the results ran out.
+        """
+        params_key = search_params_key(params)
+        page_token = None
+        for page in range(max_pages):
+            response = self._fresh_response(query, params_key, page_token)
+            if response is None:
+                return page
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return max_pages
+        return max_pages
+
+    def prune(self) -> int:
+        """Delete expired pages. Returns the number of pages removed."""
+        with self._conn:
+            cursor = self._conn.execute('DELETE FROM search_cache WHERE fetched_at <= ?', (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Return page counts and the hit rate of this process."""
+        total, fresh, queries = self._conn.execute('''
+            SELECT COUNT(*), SUM(fetched_at > ?), COUNT(DISTINCT query) FROM search_cache
+        ''', (time.time() - self.ttl,)).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'pages': total,
+            'fresh_pages': fresh or 0,
+            'queries': queries,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """Inspect or prune the search cache."""
+    parser = argparse.ArgumentParser(description='Inspect the search.list response cache')
+    parser.add_argument('--cache_file', default=str(DEFAULT_SEARCH_CACHE_FILE), help='Path to the cache file')
+    parser.add_argument('--ttl_hours', type=float, default=7 * 24, help='Hours a cached page stays fresh')
+    parser.add_argument('--stats', action='store_true', help='Print cache statistics')
+    parser.add_argument('--prune', action='store_true', help='Delete expired pages')
+    args = parser.parse_args()
+
+    cache = SearchCache(args.cache_file, args.ttl_hours * 3600)
+    try:
+        if args.prune:
+            print(f"Removed {cache.prune()} expired pages")
+        if args.stats or not args.prune:
+            for key, value in cache.stats().items():
+                print(f"{key}: {value}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
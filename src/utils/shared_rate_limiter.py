@@ -0,0 +1,209 @@
+"""
+Cross-process token-bucket rate limiter.
+
+Buckets live in a small SQLite file, so every validator, downloader and
+screenshot process that names the same bucket shares one aggregate rate.
+Each acquire is a single short write transaction: O(1) regardless of how many
+requests were made before. Usable from sync code (acquire) and asyncio code
+(acquire_async, which runs the transaction on a worker thread).
+
+Bucket rates are stored with the bucket. A rate/burst passed to
+SharedRateLimiter only seeds a bucket that does not exist yet (otherwise
+DEFAULT_BUCKETS does). Stored values are changed with configure_bucket(), which
+the command line below and the downloaders' --rate flags call.
+
+Example:
+    # Show configured buckets and their current fill
+    python shared_rate_limiter.py
+
+    # Allow 3 requests/s with bursts of 10 across all YouTube page fetchers
+    python shared_rate_limiter.py --bucket youtube_web --rate 3 --burst 10
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_RATE_LIMIT_FILE = Path(__file__).resolve().parents[2] / 'data' / 'rate_limits.db'
+
+# Bucket name -> (tokens per second, burst size) used when a bucket is first created.
+# youtube_web matches the scraper's original pacing of one page every 0.1-1 s (0.55 s on average).
+DEFAULT_BUCKETS = {
+    'youtube_web': (1.8, 1),
+    'youtube_data_api': (100.0, 100),
+    'screenshotapi': (1.0, 1),
+}
+
+
+def _validate(rate: Optional[float], burst: Optional[float]) -> None:
+    if rate is not None and rate <= 0:
+        raise ValueError(f"rate must be positive, got {rate}")
+    if burst is not None and burst < 1:
+        raise ValueError(f"burst must be at least 1, got {burst}")
+
+
+def _connect(state_file: Path) -> sqlite3.Connection:
+    state_file = Path(state_file)
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit mode so transactions are opened explicitly with BEGIN IMMEDIATE;
+    # acquire_async uses the connection from worker threads, one at a time
+    conn = sqlite3.connect(state_file, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS buckets (
+            name TEXT PRIMARY KEY,
+            rate REAL NOT NULL,
+            burst REAL NOT NULL,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    return conn
+
+
+def configure_bucket(bucket: str, rate: Optional[float] = None, burst: Optional[float] = None,
+              state_file: Path = DEFAULT_RATE_LIMIT_FILE) -> None:
+    """
+    Create a bucket or change its stored rate and burst for every process sharing it.
+
+    Args:
+        bucket (str): Bucket name
+        rate (Optional[float]): Tokens added per second; None keeps the stored rate
+        burst (Optional[float]): Bucket capacity; None keeps the stored capacity
+        state_file (Path): Path to the SQLite state file
+    """
+    _validate(rate, burst)
+    conn = _connect(state_file)
+    try:
+        default_rate, default_burst = DEFAULT_BUCKETS.get(bucket, (1.0, 1))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR IGNORE INTO buckets (name, rate, burst, tokens, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (bucket, default_rate, default_burst, default_burst, time.time())
+            )
+            if rate is not None:
+                conn.execute('UPDATE buckets SET rate = ? WHERE name = ?', (rate, bucket))
+            if burst is not None:
+                conn.execute('UPDATE buckets SET burst = ?, tokens = MIN(tokens, ?) WHERE name = ?',
+                             (burst, burst, bucket))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+
+
+class SharedRateLimiter:
+    """Token bucket shared between processes through SQLite."""
+
+    def __init__(self, bucket: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                 state_file: Path = DEFAULT_RATE_LIMIT_FILE):
+        """
+        Open a shared bucket, creating it if no process has used it yet.
+
+        Args:
+            bucket (str): Bucket name; processes using the same name share the rate
+            rate (Optional[float]): Tokens added per second if the bucket is new
+            burst (Optional[float]): Bucket capacity if the bucket is new
+            state_file (Path): Path to the SQLite state file
+        """
+        _validate(rate, burst)
+        self.bucket = bucket
+        self._conn = _connect(state_file)
+        self._lock = threading.Lock()
+        default_rate, default_burst = DEFAULT_BUCKETS.get(bucket, (1.0, 1))
+        rate, burst = rate or default_rate, burst or default_burst
+        # A single statement is its own transaction; an existing bucket keeps its stored values
+        self._conn.execute(
+            'INSERT OR IGNORE INTO buckets (name, rate, burst, tokens, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (bucket, rate, burst, burst, time.time())
+        )
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens if available.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they will be available
+
+        Raises:
+            ValueError: If tokens exceeds the bucket's burst, so could never be taken
+        """
+        with self._lock:
+            return self._try_acquire(tokens)
+
+    def _try_acquire(self, tokens: float) -> float:
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            rate, burst, available, updated_at = self._conn.execute(
+                'SELECT rate, burst, tokens, updated_at FROM buckets WHERE name = ?', (self.bucket,)
+            ).fetchone()
+            if tokens > burst:
+                raise ValueError(f"cannot take {tokens} tokens from bucket {self.bucket!r} with burst {burst:g}")
+            now = time.time()
+            available = min(burst, available + max(0.0, now - updated_at) * rate)
+            if available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / rate
+            self._conn.execute('UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?',
+                               (available, now, self.bucket))
+            self._conn.execute('COMMIT')
+            return wait
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until tokens are taken. Returns the total time waited in seconds."""
+        waited = 0.0
+        while (wait := self.try_acquire(tokens)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Wait without blocking the event loop until tokens are taken. Returns the time waited."""
+        waited = 0.0
+        # The transaction may wait on another process's lock for up to the busy timeout
+        while (wait := await asyncio.to_thread(self.try_acquire, tokens)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """Configure or inspect shared buckets."""
+    parser = argparse.ArgumentParser(description='Configure or inspect shared rate-limit buckets')
+    parser.add_argument('--state_file', default=str(DEFAULT_RATE_LIMIT_FILE), help='Path to the rate limit state file')
+    parser.add_argument('--bucket', help='Bucket to create or update')
+    parser.add_argument('--rate', type=float, help='Tokens per second for --bucket')
+    parser.add_argument('--burst', type=float, help='Capacity for --bucket')
+    args = parser.parse_args()
+
+    if args.bucket:
+        try:
+            configure_bucket(args.bucket, args.rate, args.burst, args.state_file)
+        except ValueError as e:
+            parser.error(str(e))
+
+    conn = sqlite3.connect(args.state_file)
+    now = time.time()
+    for name, rate, burst, tokens, updated_at in conn.execute('SELECT * FROM buckets ORDER BY name'):
+        current = min(burst, tokens + max(0.0, now - updated_at) * rate)
+        print(f"{name}: {rate:g}/s, burst {burst:g}, {current:.1f} tokens available")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
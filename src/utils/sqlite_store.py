@@ -0,0 +1,59 @@
+"""
+Connection setup and batched key lookups shared by the SQLite-backed stores.
+
+The caches, maps and journals under data/ are each a single small SQLite file
+written by one process at a time and read by several. open_store() creates
+the parent directory and opens the file in WAL mode with synchronous=NORMAL,
+so readers never block the writer and a commit costs no fsync of the main
+database. select_in() runs a "... IN (...)" query over any number of keys in
+chunks below SQLite's host-parameter limit.
+
+Example:
+    conn = open_store(DEFAULT_CACHE_FILE)
+    rows = select_in(conn, 'SELECT url, channel_id FROM channel_cache WHERE url IN ({keys})', urls)
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+# Stay below SQLite's host-parameter limit (999 before 3.32)
+IN_CHUNK_SIZE = 500
+
+
+def open_store(path: Path, **connect_args) -> sqlite3.Connection:
+    """
+    Open (or create) a store file in WAL mode.
+
+    Args:
+        path (Path): Path to the SQLite file; missing parent directories are created
+        **connect_args: Passed on to sqlite3.connect
+
+    Returns:
+        sqlite3.Connection: The open connection
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, **connect_args)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def select_in(conn: sqlite3.Connection, sql: str, keys: Iterable, params: Sequence = ()) -> Iterator[tuple]:
+    """
+    Run sql for every chunk of keys and yield the rows of all chunks.
+
+    Args:
+        conn (sqlite3.Connection): Connection to query
+        sql (str): Query with '{keys}' where the IN list's placeholders go
+        keys (Iterable): Values bound to the IN list
+        params (Sequence): Values bound to placeholders before the IN list
+
+    Returns:
+        Iterator[tuple]: Result rows
+    """
+    keys = list(keys)
+    for i in range(0, len(keys), IN_CHUNK_SIZE):
+        chunk = keys[i:i + IN_CHUNK_SIZE]
+        yield from conn.execute(sql.format(keys=','.join('?' * len(chunk))), (*params, *chunk)).fetchall()
@@ -0,0 +1,345 @@
+"""
+Read-only HTTP query service over youtube_stats.db.
+
+Serves the queries analysts otherwise run from notebooks against the live
+database, without holding locks that block the ingest writers:
+
+    GET /top?limit=20                            most subscribed channels
+    GET /movers?limit=20&losers=1                largest gains (or drops) between the last two snapshots
+    GET /channels/{channel_id}                   a channel and its latest snapshot
+    GET /channels/{channel_id}/history?days=30   subscriber series, also ?start=&end= in epoch seconds
+    GET /health                                  cache and pool counters
+
+Queries run on a pool of read-only connections, one per worker thread. In WAL
+mode readers never block the writer and the writer never blocks readers.
+Responses are kept in an LRU cache with a TTL, as encoded JSON. Before a
+cached response is served, PRAGMA data_version is checked; it changes when any
+other connection commits (youtube-api.py, refresh_scheduler.py, retention), so
+the cache is dropped as soon as new data is ingested. Concurrent requests for
+the same uncached result share one query.
+
+Example:
+    # Serve the statistics database on port 8080
+    python stats_api.py --db youtube_stats.db --port 8080
+
+    curl 'http://127.0.0.1:8080/top?limit=10'
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from aiohttp import web
+
+import history_retention
+import stats_db
+
+DAY = 86400
+MAX_LIMIT = 1000
+LATEST_COLUMNS = ('name', 'url', 'subscriber_count', 'ts', 'previous_count', 'delta')
+
+READ_PRAGMAS = (
+    'PRAGMA query_only=ON',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-32768',
+    'PRAGMA mmap_size=268435456',
+)
+
+
+class ReadPool:
+    """Read-only SQLite connections, one per worker thread."""
+
+    def __init__(self, db_file: str, size: int = 4):
+        """
+        Args:
+            db_file (str): Path to the statistics database
+            size (int): Worker threads, and so connections
+        """
+        self._uri = f'file:{db_file}?mode=ro'
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='stats-reader')
+        self.size = size
+        self.queries = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, uri=True, timeout=30, check_same_thread=False)
+            for pragma in READ_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, query: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run query(conn) on a pooled connection without blocking the event loop."""
+        self.queries += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: query(self._connection())
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class ResultCache:
+    """LRU cache with a TTL; concurrent misses for one key share a single load."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+            ttl (float): Seconds an entry is served
+        """
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._max_entries = max_entries
+        self._ttl = ttl
+        # Loads that started before a clear() must not repopulate the cache
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, or await load() and cache its result."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the shared load was cancelled, not this request: load for ourselves
+                if not pending.cancelled():
+                    raise
+                return await self.get_or_load(key, load)
+
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await load()
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; avoid "exception was never retrieved"
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled with the request that started the load; waiters must not hang on it
+            future.cancel()
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        future.set_result(value)
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+class StatsService:
+    """Cached queries over the statistics database."""
+
+    def __init__(self, db_file: str = stats_db.DEFAULT_STATS_DB, readers: int = 4,
+                 cache_entries: int = 1024, ttl: float = 60):
+        """
+        Args:
+            db_file (str): Path to the statistics database
+            readers (int): Read connections in the pool
+            cache_entries (int): Responses kept in the result cache
+            ttl (float): Seconds a cached response is served if no ingest happens first
+        """
+        # Create or migrate the schema once, so the read-only connections find every table
+        conn = stats_db.connect(db_file)
+        try:
+            history_retention.init_retention(conn)
+        finally:
+            conn.close()
+        self.pool = ReadPool(db_file, readers)
+        self.cache = ResultCache(cache_entries, ttl)
+        # Only used for PRAGMA data_version, which reads shared memory and takes microseconds
+        self._version_conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def check_ingest(self) -> None:
+        """Drop cached results if another connection has committed since the last check."""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self.cache.clear()
+
+    async def cached(self, key: Hashable, query: Callable[[sqlite3.Connection], Any]) -> bytes:
+        """Return query's result encoded as JSON, from the cache when it is still valid."""
+        self.check_ingest()
+
+        async def load():
+            return json.dumps(await self.pool.run(query)).encode()
+
+        return await self.cache.get_or_load(key, load)
+
+    async def top(self, limit: int) -> bytes:
+        return await self.cached(('top', limit), lambda conn: [
+            dict(zip(LATEST_COLUMNS, row)) for row in stats_db.top_channels(conn, limit)
+        ])
+
+    async def movers(self, limit: int, losers: bool) -> bytes:
+        return await self.cached(('movers', limit, losers), lambda conn: [
+            dict(zip(LATEST_COLUMNS, row)) for row in stats_db.movers(conn, limit, losers)
+        ])
+
+    async def channel(self, channel_id: str) -> bytes:
+        def query(conn):
+            cursor = conn.execute('''
+                SELECT c.channel_id, c.name, c.url, l.subscriber_count, l.ts, l.previous_count, l.previous_ts, l.delta
+                FROM channels c
+                LEFT JOIN channel_latest l ON l.channel_id = c.channel_id
+                WHERE c.channel_id = ?
+            ''', (channel_id,))
+            row = cursor.fetchone()
+            return dict(zip((column[0] for column in cursor.description), row)) if row else None
+
+        return await self.cached(('channel', channel_id), query)
+
+    async def history(self, channel_id: str, start: int, end: Optional[int]) -> bytes:
+        def query(conn):
+            level, rows = history_retention.query_history(conn, channel_id, start, end)
+            return {
+                'channel_id': channel_id,
+                'resolution': level,
+                'points': [
+                    {'ts': ts, 'subscriber_count': last, 'min_count': low, 'max_count': high}
+                    for ts, last, low, high in rows
+                ]
+            }
+
+        return await self.cached(('history', channel_id, start, end), query)
+
+    def health(self) -> Dict[str, Any]:
+        self.check_ingest()
+        return {
+            'data_version': self._data_version,
+            'readers': self.pool.size,
+            'queries': self.pool.queries,
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'cache_invalidations': self.cache.invalidations
+        }
+
+    def close(self) -> None:
+        self.pool.close()
+        self._version_conn.close()
+
+
+def _int_param(request: web.Request, name: str, default: Optional[int], minimum: int = 0,
+               maximum: Optional[int] = None) -> Optional[int]:
+    value = request.query.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text=f'{name} must be an integer')
+    if number < minimum or (maximum is not None and number > maximum):
+        raise web.HTTPBadRequest(text=f'{name} must be between {minimum} and {maximum}')
+    return number
+
+
+def _json(body: bytes) -> web.Response:
+    return web.Response(body=body, content_type='application/json')
+
+
+def create_app(service: StatsService) -> web.Application:
+    """Build the aiohttp application serving service."""
+
+    async def top(request):
+        return _json(await service.top(_int_param(request, 'limit', 20, 1, MAX_LIMIT)))
+
+    async def movers(request):
+        losers = request.query.get('losers', '').lower() in ('1', 'true', 'yes')
+        return _json(await service.movers(_int_param(request, 'limit', 20, 1, MAX_LIMIT), losers))
+
+    async def channel(request):
+        body = await service.channel(request.match_info['channel_id'])
+        if body == b'null':
+            raise web.HTTPNotFound(text='unknown channel')
+        return _json(body)
+
+    async def history(request):
+        end = _int_param(request, 'end', None)
+        days = _int_param(request, 'days', 30, 1)
+        start = _int_param(request, 'start', None)
+        if start is None:
+            # Whole days keep the cache key stable between requests
+            start = ((end or int(time.time())) - days * DAY) // DAY * DAY
+        return _json(await service.history(request.match_info['channel_id'], start, end))
+
+    async def health(request):
+        return web.json_response(service.health())
+
+    async def on_cleanup(app):
+        service.close()
+
+    app = web.Application()
+    app.add_routes([
+        web.get('/top', top),
+        web.get('/movers', movers),
+        web.get('/channels/{channel_id}', channel),
+        web.get('/channels/{channel_id}/history', history),
+        web.get('/health', health),
+    ])
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    """Run the query service."""
+    parser = argparse.ArgumentParser(description='Serve cached read-only queries over the statistics database')
+    parser.add_argument('--db', default=stats_db.DEFAULT_STATS_DB, help='Path to the statistics database')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--readers', type=int, default=4, help='Read connections (default: 4)')
+    parser.add_argument('--cache_entries', type=int, default=1024, help='Cached responses (default: 1024)')
+    parser.add_argument('--ttl', type=float, default=60, help='Seconds a cached response is served (default: 60)')
+    args = parser.parse_args()
+
+    service = StatsService(args.db, args.readers, args.cache_entries, args.ttl)
+    web.run_app(create_app(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
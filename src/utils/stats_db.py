@@ -0,0 +1,399 @@
+"""
+Storage layer for the channel statistics database (youtube_stats.db).
+
+subscriber_history is a time series keyed by (channel_id, ts), where ts is an
+integer Unix timestamp in UTC. The table is WITHOUT ROWID, so rows are stored
+clustered by channel and time in the primary key B-tree, without a separate
+rowid table and index. Snapshots are written with executemany in a single
+transaction, on a WAL-mode connection with tuned PRAGMAs.
+
+Public subscriber counts are rounded to three significant figures, so most
+snapshots repeat the previous value. History is therefore change-only: a row
+is written when a channel is first seen and whenever its count changes. The
+series is a step function; step_series() reconstructs it for a time range.
+
+channel_latest holds each channel's current and previous observed count, the
+change between them, ts, the time the channel was last observed (which may be
+later than its last history row), and the last view count fetched with it. It is updated in the same
+transaction as every snapshot, so top-N and movers queries are index scans
+over one row per channel, however long the history grows.
+
+Databases created by earlier versions of youtube-api.py stored fetch_date as
+datetime text in an AUTOINCREMENT table. They are migrated in place the first
+time they are opened, or explicitly with --migrate.
+
+Example:
+    # Migrate an existing database to the current schema and compact it
+    python stats_db.py --db youtube_stats.db --migrate
+
+    # Show row counts
+    python stats_db.py --db youtube_stats.db --stats
+
+    # Drop history rows that repeat the previous count (databases written before change-only storage)
+    python stats_db.py --db youtube_stats.db --compact
+
+    # Show the 10 channels that gained the most since their previous snapshot
+    python stats_db.py --db youtube_stats.db --movers 10
+"""
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_STATS_DB = 'youtube_stats.db'
+
+# Per-connection settings for bulk time-series writes
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',  # 64 MB page cache
+    'PRAGMA mmap_size=268435456',  # 256 MB
+)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS channels (
+        channel_id TEXT PRIMARY KEY,
+        name TEXT,
+        url TEXT,
+        last_updated INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS subscriber_history (
+        channel_id TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        subscriber_count INTEGER NOT NULL,
+        PRIMARY KEY (channel_id, ts)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_history_ts ON subscriber_history (ts);
+
+    CREATE TABLE IF NOT EXISTS channel_latest (
+        channel_id TEXT PRIMARY KEY,
+        subscriber_count INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        previous_count INTEGER,
+        previous_ts INTEGER,
+        delta INTEGER,
+        view_count INTEGER
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_latest_subscribers ON channel_latest (subscriber_count DESC);
+    CREATE INDEX IF NOT EXISTS idx_latest_delta ON channel_latest (delta) WHERE delta IS NOT NULL;
+'''
+
+# Skips counts equal to the latest observation; older (backfilled) snapshots are always written
+INSERT_CHANGE = '''
+    INSERT OR REPLACE INTO subscriber_history (channel_id, ts, subscriber_count)
+    SELECT ?1, ?2, ?3
+    WHERE NOT EXISTS (
+        SELECT 1 FROM channel_latest WHERE channel_id = ?1 AND subscriber_count = ?3 AND ts <= ?2
+    )
+'''
+
+# Shifts the current count to previous when a newer snapshot changes it, so
+# previous_count/previous_ts are the value before the last change and the
+# history row it was recorded in, as rebuild_latest() derives them from the
+# change-only history. Runs after INSERT_CHANGE, so that row is the newest one
+# before this snapshot. SET expressions see the row before the update; older
+# (backfilled) snapshots are ignored, and a fetch without a view count keeps
+# the last one.
+UPSERT_LATEST = '''
+    INSERT INTO channel_latest (channel_id, subscriber_count, ts, view_count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (channel_id) DO UPDATE SET
+        previous_count = CASE WHEN excluded.ts > ts AND excluded.subscriber_count != subscriber_count
+            THEN subscriber_count ELSE previous_count END,
+        previous_ts = CASE WHEN excluded.ts > ts AND excluded.subscriber_count != subscriber_count
+            THEN COALESCE((
+                SELECT MAX(history.ts) FROM subscriber_history AS history
+                WHERE history.channel_id = excluded.channel_id AND history.ts < excluded.ts
+            ), ts) ELSE previous_ts END,
+        delta = excluded.subscriber_count - CASE WHEN excluded.ts > ts AND excluded.subscriber_count != subscriber_count
+            THEN subscriber_count ELSE previous_count END,
+        subscriber_count = excluded.subscriber_count,
+        ts = excluded.ts,
+        view_count = COALESCE(excluded.view_count, view_count)
+    WHERE excluded.ts >= ts
+'''
+
+
+def connect(db_file: str = DEFAULT_STATS_DB) -> sqlite3.Connection:
+    """
+    Open the statistics database, creating or migrating the schema as needed.
+
+    Args:
+        db_file (str): Path to the SQLite database
+
+    Returns:
+        sqlite3.Connection: Connection with the write PRAGMAs applied
+    """
+    Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_file, timeout=30)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    migrated = needs_migration(conn)
+    if migrated:
+        migrate(conn)
+        # Legacy history has a row per fetch; keep only the changes that channel_latest is derived from
+        compact_history(conn)
+    latest_columns = {row[1] for row in conn.execute('PRAGMA table_info(channel_latest)')}
+    has_latest = bool(latest_columns)
+    if has_latest and 'view_count' not in latest_columns:
+        conn.execute('ALTER TABLE channel_latest ADD COLUMN view_count INTEGER')
+    conn.executescript(SCHEMA)
+    if migrated or not has_latest:
+        rebuild_latest(conn)
+    return conn
+
+
+def needs_migration(conn: sqlite3.Connection) -> bool:
+    """Return True if subscriber_history still has the legacy fetch_date layout."""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(subscriber_history)')}
+    return 'fetch_date' in columns
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Convert a legacy database in one transaction.
+
+    fetch_date and last_updated were written from datetime.now(), i.e. local
+    time, and are converted to UTC epoch seconds. Returns the number of
+    history rows migrated.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('''
+            CREATE TABLE subscriber_history_new (
+                channel_id TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                subscriber_count INTEGER NOT NULL,
+                PRIMARY KEY (channel_id, ts)
+            ) WITHOUT ROWID
+        ''')
+        # Later rows win if two legacy rows round to the same second
+        conn.execute('''
+            INSERT OR REPLACE INTO subscriber_history_new (channel_id, ts, subscriber_count)
+            SELECT channel_id, CAST(strftime('%s', fetch_date, 'utc') AS INTEGER), subscriber_count
+            FROM subscriber_history
+            WHERE channel_id IS NOT NULL AND fetch_date IS NOT NULL AND subscriber_count IS NOT NULL
+            ORDER BY id
+        ''')
+        migrated = conn.execute('SELECT COUNT(*) FROM subscriber_history_new').fetchone()[0]
+        conn.execute('DROP INDEX IF EXISTS idx_channel_date')
+        conn.execute('DROP TABLE subscriber_history')
+        conn.execute('ALTER TABLE subscriber_history_new RENAME TO subscriber_history')
+        conn.execute('''
+            UPDATE channels SET last_updated = CAST(strftime('%s', last_updated, 'utc') AS INTEGER)
+            WHERE typeof(last_updated) = 'text'
+        ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return migrated
+
+
+def rebuild_latest(conn: sqlite3.Connection) -> int:
+    """
+    Recompute channel_latest from subscriber_history. Returns the number of channels.
+
+    The history only holds changes, so previous_count becomes the value before the last
+    change. Last-observed times and view counts already recorded are kept.
+    """
+    with conn:
+        conn.execute('CREATE TEMP TABLE observed AS SELECT channel_id, ts, view_count FROM channel_latest')
+        conn.execute('DELETE FROM channel_latest')
+        conn.execute('''
+            INSERT INTO channel_latest (channel_id, subscriber_count, ts, previous_count, previous_ts, delta)
+            SELECT channel_id, subscriber_count, ts, previous_count, previous_ts, subscriber_count - previous_count
+            FROM (
+                SELECT channel_id, subscriber_count, ts,
+                       LAG(subscriber_count) OVER w AS previous_count,
+                       LAG(ts) OVER w AS previous_ts,
+                       ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY ts DESC) AS recency
+                FROM subscriber_history
+                WINDOW w AS (PARTITION BY channel_id ORDER BY ts)
+            )
+            WHERE recency = 1
+        ''')
+        conn.execute('''
+            UPDATE channel_latest SET ts = MAX(channel_latest.ts, observed.ts), view_count = observed.view_count
+            FROM temp.observed AS observed
+            WHERE observed.channel_id = channel_latest.channel_id
+        ''')
+        conn.execute('DROP TABLE temp.observed')
+    return conn.execute('SELECT COUNT(*) FROM channel_latest').fetchone()[0]
+
+
+def compact_history(conn: sqlite3.Connection) -> int:
+    """Delete history rows that repeat the channel's previous count. Returns the number of rows removed."""
+    with conn:
+        cursor = conn.execute('''
+            DELETE FROM subscriber_history WHERE (channel_id, ts) IN (
+                SELECT channel_id, ts FROM (
+                    SELECT channel_id, ts, subscriber_count,
+                           LAG(subscriber_count) OVER (PARTITION BY channel_id ORDER BY ts) AS previous_count
+                    FROM subscriber_history
+                )
+                WHERE subscriber_count = previous_count
+            )
+        ''')
+    return cursor.rowcount
+
+
+def record_snapshot(conn: sqlite3.Connection, channels: Iterable[dict], ts: Optional[int] = None) -> int:
+    """
+    Write one fetch of channel statistics in a single transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection from connect()
+        channels (Iterable[dict]): Dicts with channel_id, name, url and subscribers, and optionally views
+        ts (Optional[int]): Snapshot time in epoch seconds (default: now)
+
+    Returns:
+        int: Number of history rows written, i.e. channels that are new or changed
+    """
+    ts = int(time.time()) if ts is None else int(ts)
+    channels = list(channels)
+    with conn:
+        conn.executemany('''
+            INSERT INTO channels (channel_id, name, url, last_updated) VALUES (?, ?, ?, ?)
+            ON CONFLICT (channel_id) DO UPDATE SET
+                name = excluded.name, url = excluded.url, last_updated = excluded.last_updated
+        ''', [(channel['channel_id'], channel['name'], channel['url'], ts) for channel in channels])
+        changes_before = conn.total_changes
+        # Compared with channel_latest before it is updated below
+        conn.executemany(
+            INSERT_CHANGE, [(channel['channel_id'], ts, channel['subscribers']) for channel in channels]
+        )
+        written = conn.total_changes - changes_before
+        conn.executemany(
+            UPSERT_LATEST,
+            [(channel['channel_id'], channel['subscribers'], ts, channel.get('views')) for channel in channels]
+        )
+    return written
+
+
+def step_series(conn: sqlite3.Connection, channel_id: str, start_ts: int,
+                end_ts: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Reconstruct a channel's count between start_ts and end_ts from its change points.
+
+    Returns:
+        List[Tuple[int, int]]: (ts, subscriber_count) steps in time order. The value in effect
+            at start_ts is stamped at start_ts, and the last value is repeated at the last
+            observation if that falls within the range.
+    """
+    end_ts = int(time.time()) if end_ts is None else int(end_ts)
+    steps = conn.execute('''
+        SELECT ts, subscriber_count FROM subscriber_history
+        WHERE channel_id = ? AND ts > ? AND ts <= ? ORDER BY ts
+    ''', (channel_id, start_ts, end_ts)).fetchall()
+    carried = conn.execute('''
+        SELECT subscriber_count FROM subscriber_history
+        WHERE channel_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1
+    ''', (channel_id, start_ts)).fetchone()
+    if carried is not None:
+        steps.insert(0, (start_ts, carried[0]))
+    observed = conn.execute('SELECT ts FROM channel_latest WHERE channel_id = ?', (channel_id,)).fetchone()
+    if steps and observed is not None and steps[-1][0] < observed[0] <= end_ts:
+        steps.append((observed[0], steps[-1][1]))
+    return steps
+
+
+def top_channels(conn: sqlite3.Connection, limit: int = 20) -> List[tuple]:
+    """
+    Return the most subscribed channels from their latest snapshot.
+
+    Returns:
+        List[tuple]: (name, url, subscriber_count, ts, previous_count, delta) rows;
+            delta is None for channels seen only once
+    """
+    return conn.execute('''
+        SELECT c.name, c.url, l.subscriber_count, l.ts, l.previous_count, l.delta
+        FROM channel_latest l
+        JOIN channels c ON c.channel_id = l.channel_id
+        ORDER BY l.subscriber_count DESC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def movers(conn: sqlite3.Connection, limit: int = 20, losers: bool = False) -> List[tuple]:
+    """
+    Return the channels whose count changed most between their last two snapshots.
+
+    Args:
+        conn (sqlite3.Connection): Connection from connect()
+        limit (int): Number of channels
+        losers (bool): Return the largest drops instead of the largest gains
+
+    Returns:
+        List[tuple]: Same columns as top_channels()
+    """
+    return conn.execute(f'''
+        SELECT c.name, c.url, l.subscriber_count, l.ts, l.previous_count, l.delta
+        FROM channel_latest l
+        JOIN channels c ON c.channel_id = l.channel_id
+        WHERE l.delta IS NOT NULL
+        ORDER BY l.delta {'ASC' if losers else 'DESC'}
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Return row counts and the database size."""
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    return {
+        'channels': conn.execute('SELECT COUNT(*) FROM channels').fetchone()[0],
+        'history_rows': conn.execute('SELECT COUNT(*) FROM subscriber_history').fetchone()[0],
+        'latest_channels': conn.execute('SELECT COUNT(*) FROM channel_latest').fetchone()[0],
+        'size_bytes': page_count * page_size
+    }
+
+
+def main():
+    """Migrate or inspect the statistics database."""
+    parser = argparse.ArgumentParser(description='Manage the channel statistics database')
+    parser.add_argument('--db', default=DEFAULT_STATS_DB, help='Path to the database (default: youtube_stats.db)')
+    parser.add_argument('--migrate', action='store_true', help='Migrate a legacy database, compact it and rebuild channel_latest')
+    parser.add_argument('--stats', action='store_true', help='Print row counts')
+    parser.add_argument('--movers', type=int, metavar='N', help='Print the N largest gains since the previous snapshot')
+    parser.add_argument('--rebuild_latest', action='store_true', help='Recompute channel_latest from the history')
+    parser.add_argument('--compact', action='store_true', help='Drop history rows that repeat the previous count')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        if args.migrate:
+            if needs_migration(conn):
+                print(f"Migrated {migrate(conn)} history rows")
+            else:
+                print("Database already uses the current schema")
+        conn.close()
+        conn = connect(args.db)
+        if args.migrate:
+            # Legacy history has a row per fetch; keep only the changes, then derive channel_latest from them
+            print(f"Removed {compact_history(conn)} repeated history rows")
+            print(f"Rebuilt channel_latest for {rebuild_latest(conn)} channels")
+            # Reclaim the space of the dropped legacy table and the removed rows
+            conn.execute('VACUUM')
+        if args.compact:
+            print(f"Removed {compact_history(conn)} repeated history rows")
+            conn.execute('VACUUM')
+        if args.rebuild_latest:
+            print(f"Rebuilt channel_latest for {rebuild_latest(conn)} channels")
+        if args.movers:
+            for name, url, count, ts, previous, delta in movers(conn, args.movers):
+                print(f"{delta:+,} {name} ({previous:,} -> {count:,}) {url}")
+        if args.stats or not (args.migrate or args.compact or args.rebuild_latest or args.movers):
+            for key, value in stats(conn).items():
+                print(f"{key}: {value}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Lightweight asyncio client for the YouTube Data API v3.
+
+Covers the endpoints this project uses (channels.list, search.list,
+videos.list, playlistItems.list) with plain aiohttp requests, so hundreds of
+calls can be in flight on one event loop without googleapiclient's blocking
+calls and thread hops. Responses are the same JSON dicts that
+googleapiclient's execute() returns, trimmed with a fields= projection and
+transferred gzip-compressed.
+
+Example:
+    # Look up two channels by ID
+    python youtube_api_async.py --api_key "YOUR_API_KEY" channels --id UCX6OQ3DkcsbYNE6H8uQQuVA,UCq-Fj5jknLsUf-MWSy4_brA
+
+    # Search for channels
+    python youtube_api_async.py --api_key "YOUR_API_KEY" search --q "music"
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+import aiohttp
+from aiohttp import ClientTimeout
+
+from api_key_pool import ApiKeyPool, KeysCoolingDown, INVALID_KEY_REASONS
+from quota_ledger import QuotaLedger
+
+DEFAULT_API_ENDPOINT = 'https://youtube.googleapis.com/'
+
+# Default response projections; only the fields read by our callers are transferred
+DEFAULT_FIELDS = {
+    'channels': 'items(id,snippet(title,customUrl,publishedAt),statistics(subscriberCount,viewCount,videoCount))',
+    'search': 'nextPageToken,pageInfo,items(id,snippet(channelId,channelTitle,title))',
+    'videos': 'items(id,snippet(channelId,title,publishedAt),statistics(viewCount,likeCount,commentCount))',
+    'playlistItems': 'nextPageToken,items(contentDetails(videoId,videoPublishedAt))',
+}
+
+# Error reasons meaning the key has no quota left for today
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+
+class YouTubeAPIError(Exception):
+    """Error response from the Data API."""
+
+    def __init__(self, status: int, reason: str, message: str):
+        super().__init__(f"HTTP {status} {reason}: {message}")
+        self.status = status
+        self.reason = reason
+
+    @property
+    def quota_exceeded(self) -> bool:
+        return self.reason in QUOTA_REASONS
+
+
+class AsyncYouTubeClient:
+    """aiohttp-based Data API client with a pooled connection and retries on 5xx."""
+
+    def __init__(self,
+                 api_key: Optional[str],
+                 api_endpoint: Optional[str] = None,
+                 concurrency: int = 100,
+                 timeout: int = 30,
+                 max_retries: int = 3,
+                 ledger: Optional[QuotaLedger] = None,
+                 key_pool: Optional[ApiKeyPool] = None):
+        """
+        Args:
+            api_key (Optional[str]): YouTube Data API key; may be None when key_pool is given
+            api_endpoint (Optional[str]): Base URL overriding the public endpoint, e.g. a local stand-in
+            concurrency (int): Maximum connections kept open to the API
+            timeout (int): Total timeout per request in seconds
+            max_retries (int): Retries for 5xx responses and connection errors
+            ledger (Optional[QuotaLedger]): Quota ledger charged before every request
+            key_pool (Optional[ApiKeyPool]): Keys to rotate between; replaces api_key and ledger
+        """
+        if api_key is None and key_pool is None:
+            raise ValueError("Either api_key or key_pool is required")
+        self.api_key = api_key
+        self.ledger = ledger
+        self.key_pool = key_pool
+        self._base_url = (api_endpoint or DEFAULT_API_ENDPOINT).rstrip('/') + '/youtube/v3/'
+        self._concurrency = concurrency
+        self._timeout = ClientTimeout(total=timeout)
+        self._max_retries = max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests_sent = 0
+
+    async def __aenter__(self) -> 'AsyncYouTubeClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                # Google only compresses responses for user agents that mention gzip
+                headers={'Accept-Encoding': 'gzip', 'User-Agent': 'youtube-stats (gzip)'}
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def request(self, resource: str, params: Dict[str, Any], fields: Optional[str] = None) -> Dict[str, Any]:
+        """
+        GET youtube/v3/<resource> and return the decoded JSON response.
+
+        Args:
+            resource (str): API resource, e.g. 'channels'
+            params (Dict[str, Any]): Query parameters; None values are dropped
+            fields (Optional[str]): fields= projection, defaulting to DEFAULT_FIELDS[resource];
+                pass '' to request the full response
+
+        Raises:
+            YouTubeAPIError: On an error response (after retries for 5xx)
+            QuotaExhausted: If no ledger or pooled key has quota left for the request
+        """
+        query = {key: str(value) for key, value in params.items() if value is not None}
+        fields = DEFAULT_FIELDS.get(resource) if fields is None else fields
+        if fields:
+            query['fields'] = fields
+
+        session = self._get_session()
+        url = self._base_url + resource
+        endpoint = f'{resource}.list'
+        attempt = 0
+        while True:
+            # Failed requests are charged too, so every attempt is reserved
+            api_key = await self._reserve(endpoint)
+            query['key'] = api_key
+            try:
+                self.requests_sent += 1
+                async with session.get(url, params=query) as response:
+                    body = await response.read()
+                    if response.status == 200:
+                        if self.key_pool is not None:
+                            self.key_pool.record_success(api_key)
+                        return json.loads(body)
+                    error = self._parse_error(response.status, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = YouTubeAPIError(0, 'connectionError', str(e))
+                error.__cause__ = e
+
+            if self.key_pool is not None:
+                # A quotaExceeded error is written to the shared ledger
+                await asyncio.to_thread(self.key_pool.record_error, api_key, error.reason, error.status)
+                # Another key may still have quota, be allowed through or be valid
+                if (error.quota_exceeded or error.reason in INVALID_KEY_REASONS
+                        or error.reason in ('rateLimitExceeded', 'userRateLimitExceeded')):
+                    continue
+            elif error.quota_exceeded and self.ledger is not None:
+                await asyncio.to_thread(self.ledger.mark_exhausted)
+
+            if 0 < error.status < 500 or attempt == self._max_retries:
+                raise error
+            delay = 2 ** attempt
+            attempt += 1
+            logging.warning(f"{endpoint} failed ({error}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+    async def _reserve(self, endpoint: str) -> str:
+        """Reserve quota for one request and return the key to send it with."""
+        # Reservations are SQLite transactions that may wait on another process's lock, so they
+        # run on a worker thread rather than stalling every request on the loop
+        if self.key_pool is None:
+            if self.ledger is not None:
+                await asyncio.to_thread(self.ledger.reserve, endpoint)
+            return self.api_key
+        while True:
+            try:
+                return await asyncio.to_thread(self.key_pool.acquire, endpoint)
+            except KeysCoolingDown as e:
+                logging.warning(str(e))
+                await asyncio.sleep(e.wait)
+
+    @staticmethod
+    def _parse_error(status: int, body: bytes) -> YouTubeAPIError:
+        try:
+            error = json.loads(body)['error']
+            reason = (error.get('errors') or [{}])[0].get('reason', '')
+            return YouTubeAPIError(status, reason, error.get('message', ''))
+        except (ValueError, KeyError, TypeError):
+            return YouTubeAPIError(status, '', body[:200].decode('utf-8', errors='replace'))
+
+    async def channels_list(self,
+                            ids: Optional[Iterable[str]] = None,
+                            for_handle: Optional[str] = None,
+                            for_username: Optional[str] = None,
+                            part: str = 'snippet,statistics',
+                            fields: Optional[str] = None) -> Dict[str, Any]:
+        """channels.list by up to 50 IDs, a handle or a legacy username (1 unit)."""
+        return await self.request('channels', {
+            'part': part,
+            'id': ','.join(ids) if ids else None,
+            'forHandle': for_handle,
+            'forUsername': for_username,
+            'maxResults': 50,
+        }, fields)
+
+    async def search_list(self,
+                          q: str,
+                          type: str = 'channel',
+                          max_results: int = 50,
+                          page_token: Optional[str] = None,
+                          part: str = 'snippet',
+                          fields: Optional[str] = None,
+                          **params) -> Dict[str, Any]:
+        """search.list (100 units)."""
+        return await self.request('search', {
+            'part': part,
+            'q': q,
+            'type': type,
+            'maxResults': max_results,
+            'pageToken': page_token,
+            **params,
+        }, fields)
+
+    async def videos_list(self,
+                          ids: Iterable[str],
+                          part: str = 'snippet,statistics',
+                          fields: Optional[str] = None) -> Dict[str, Any]:
+        """videos.list by up to 50 IDs (1 unit)."""
+        return await self.request('videos', {'part': part, 'id': ','.join(ids), 'maxResults': 50}, fields)
+
+    async def playlist_items_list(self,
+                                  playlist_id: str,
+                                  max_results: int = 50,
+                                  page_token: Optional[str] = None,
+                                  part: str = 'contentDetails',
+                                  fields: Optional[str] = None) -> Dict[str, Any]:
+        """playlistItems.list for one page of a playlist (1 unit)."""
+        return await self.request('playlistItems', {
+            'part': part,
+            'playlistId': playlist_id,
+            'maxResults': max_results,
+            'pageToken': page_token,
+        }, fields)
+
+
+async def _run_cli(args) -> Dict[str, Any]:
+    async with AsyncYouTubeClient(args.api_key, args.api_endpoint) as client:
+        if args.command == 'channels':
+            return await client.channels_list(ids=args.id.split(',') if args.id else None,
+                                              for_handle=args.handle, for_username=args.username)
+        if args.command == 'search':
+            return await client.search_list(args.q)
+        if args.command == 'videos':
+            return await client.videos_list(args.id.split(','))
+        return await client.playlist_items_list(args.playlist_id)
+
+
+def main():
+    """Issue a single request from the command line and print the JSON response."""
+    parser = argparse.ArgumentParser(description='Query the YouTube Data API with the async client')
+    parser.add_argument('--api_key', required=True, help='YouTube Data API key')
+    parser.add_argument('--api_endpoint', help='Override the API base URL (e.g. a local stand-in)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    channels = subparsers.add_parser('channels', help='channels.list')
+    channels.add_argument('--id', help='Comma-separated channel IDs')
+    channels.add_argument('--handle', help='Channel handle, e.g. @MrBeast')
+    channels.add_argument('--username', help='Legacy username')
+
+    search = subparsers.add_parser('search', help='search.list')
+    search.add_argument('--q', required=True, help='Search query')
+
+    videos = subparsers.add_parser('videos', help='videos.list')
+    videos.add_argument('--id', required=True, help='Comma-separated video IDs')
+
+    playlist_items = subparsers.add_parser('playlist_items', help='playlistItems.list')
+    playlist_items.add_argument('--playlist_id', required=True, help='Playlist ID')
+
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_run_cli(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
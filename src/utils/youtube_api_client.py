@@ -0,0 +1,168 @@
+"""
+Reusable googleapiclient YouTube Data API clients, kept as a benchmark baseline.
+
+Production code talks to the API through youtube_api_async.AsyncYouTubeClient
+only. This module exists so benchmark_api_client.py and benchmark_api_paths.py
+can measure the synchronous googleapiclient path (one channels.list per ID)
+against it; do not build new callers on it.
+
+build('youtube', 'v3') loads and parses the ~400 KB discovery document and
+creates a fresh HTTP connection every time it is called. Here the document is
+parsed once per process, and each thread keeps one client per API key whose
+httplib2.Http holds its connection open between requests.
+
+The discovery document comes from the copy bundled with googleapiclient when
+available, otherwise from an on-disk cache under data/discovery_cache, and is
+only downloaded when neither exists.
+
+Example:
+    # Show where the discovery document is loaded from and how long a client takes to create
+    python youtube_api_client.py
+
+    # Re-download the cached discovery document
+    python youtube_api_client.py --refresh
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache.base import Cache
+
+DEFAULT_DISCOVERY_CACHE_DIR = Path(__file__).resolve().parents[2] / 'data' / 'discovery_cache'
+DISCOVERY_URL = 'https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest'
+
+
+class DiscoveryCache(Cache):
+    """Discovery document cache kept in memory and mirrored to disk."""
+    _CACHE = {}
+
+    def __init__(self, cache_dir: Path = DEFAULT_DISCOVERY_CACHE_DIR, max_age: float = 7 * 24 * 3600):
+        """
+        Args:
+            cache_dir (Path): Directory holding cached documents
+            max_age (float): Seconds before a document on disk is considered stale
+        """
+        self._cache_dir = Path(cache_dir)
+        self._max_age = max_age
+
+    def _path(self, url: str) -> Path:
+        return self._cache_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def get(self, url):
+        if url in DiscoveryCache._CACHE:
+            return DiscoveryCache._CACHE[url]
+        path = self._path(url)
+        if path.exists() and time.time() - path.stat().st_mtime < self._max_age:
+            content = path.read_text(encoding='utf-8')
+            DiscoveryCache._CACHE[url] = content
+            return content
+        return None
+
+    def set(self, url, content):
+        DiscoveryCache._CACHE[url] = content
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(url)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        tmp_path.replace(path)
+
+
+_documents = {}
+_documents_lock = threading.Lock()
+_local = threading.local()
+
+
+def _static_document() -> Optional[str]:
+    """Return the discovery document bundled with googleapiclient, if this version ships one."""
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc('youtube', 'v3')
+
+
+def load_discovery_document(cache: Optional[DiscoveryCache] = None, refresh: bool = False) -> dict:
+    """
+    Return the parsed YouTube v3 discovery document, loading it at most once per process.
+
+    Args:
+        cache (Optional[DiscoveryCache]): On-disk cache to read and populate
+        refresh (bool): Ignore the bundled and cached copies and download the document
+
+    Returns:
+        dict: Parsed discovery document
+    """
+    with _documents_lock:
+        if not refresh and DISCOVERY_URL in _documents:
+            return _documents[DISCOVERY_URL]
+
+        cache = cache or DiscoveryCache()
+        content = None if refresh else (_static_document() or cache.get(DISCOVERY_URL))
+        if content is None:
+            response, body = httplib2.Http(timeout=30).request(DISCOVERY_URL)
+            if response.status != 200:
+                raise Exception(f"Failed to download discovery document: HTTP {response.status}")
+            content = body.decode('utf-8')
+            cache.set(DISCOVERY_URL, content)
+
+        _documents[DISCOVERY_URL] = json.loads(content)
+        return _documents[DISCOVERY_URL]
+
+
+def get_youtube_client(api_key: str, api_endpoint: Optional[str] = None, timeout: float = 30):
+    """
+    Return this thread's YouTube client for api_key, creating it on first use.
+
+    googleapiclient clients and httplib2.Http are not thread-safe, so clients
+    are kept per thread rather than shared.
+
+    Args:
+        api_key (str): YouTube Data API key
+        api_endpoint (Optional[str]): Base URL overriding https://youtube.googleapis.com/,
+            e.g. a local stand-in server
+        timeout (float): Socket timeout in seconds
+
+    Returns:
+        googleapiclient.discovery.Resource: YouTube v3 client
+    """
+    clients = getattr(_local, 'clients', None)
+    if clients is None:
+        clients = _local.clients = {}
+
+    key = (api_key, api_endpoint)
+    if key not in clients:
+        clients[key] = build_from_document(
+            load_discovery_document(),
+            developerKey=api_key,
+            http=httplib2.Http(timeout=timeout),
+            client_options={'api_endpoint': api_endpoint} if api_endpoint else None
+        )
+    return clients[key]
+
+
+def main():
+    """Load the discovery document and report client creation time."""
+    parser = argparse.ArgumentParser(description='Prepare the cached YouTube discovery document')
+    parser.add_argument('--refresh', action='store_true', help='Download the discovery document again')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    document = load_discovery_document(refresh=args.refresh)
+    loaded = time.perf_counter()
+    get_youtube_client('unused')
+    built = time.perf_counter()
+    source = 'downloaded' if args.refresh else ('bundled' if _static_document() else 'cached')
+
+    print(f"Discovery document {document.get('revision')} ({source}) loaded in {(loaded - start) * 1000:.1f} ms")
+    print(f"First client created in {(built - loaded) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""
+Local stand-in for the YouTube Data API v3, backed by our channel CSVs.
+
+Serves channels.list (by id, forHandle or forUsername), search.list
+(type=channel), videos.list and playlistItems.list on a local port, so the
+API validator, youtube-api.py and the refresh scheduler can be exercised
+without a real key or quota. Channels come from the CSVs; rows without a
+channel ID get a stable synthetic one. Uploads and videos are generated
+deterministically per channel.
+
+The stand-in simulates:
+- latency, fixed plus random jitter, per request;
+- quota: each key is charged ENDPOINT_COSTS per request and receives
+  403 quotaExceeded once it has used its daily quota;
+- injected failures: a fraction of requests answered with 503 backendError,
+  and a fraction with 403 quotaExceeded;
+- invalid keys, answered with 400 keyInvalid.
+
+Counters are served as JSON at /stand-in/stats. fields= projections are
+accepted but not applied.
+
+Example:
+    # Serve the top 10000 channels on port 8089 with 50 ms latency and 1% 5xx errors
+    python youtube_api_stand_in.py --port 8089 --latency 50 --error_rate 0.01
+
+    # Point a client at it
+    python youtube_csv_validator_api.py --input_file data/youtube_channel_500.csv --url_column youtube_channel_url \\
+        --api_key test --api_endpoint http://127.0.0.1:8089/
+"""
+
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from quota_ledger import ENDPOINT_COSTS, DEFAULT_DAILY_QUOTA, pacific_day
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+DEFAULT_CSV_FILES = (DATA_DIR / 'youtube_channel_500.csv', DATA_DIR / 'archive' / 'youtube-top-10000-channels.csv')
+
+# Column names used by our CSVs for each field, first match wins
+ID_COLUMNS = ('channel_id', 'Channel_ID')
+HANDLE_COLUMNS = ('handle', 'Channel_Handle', 'Channel_Name')
+TITLE_COLUMNS = ('channel_title', 'Title', 'Display_Name')
+SUBSCRIBER_COLUMNS = ('subscribers', 'Subscribers')
+URL_COLUMNS = ('youtube_channel_url', 'YouTube_Channel_URL')
+
+# search.list never pages past this many results, like the real API
+MAX_SEARCH_RESULTS = 500
+
+
+@dataclass
+class StandInChannel:
+    """One channel served by the stand-in"""
+    index: int
+    channel_id: str
+    handle: Optional[str]
+    title: str
+    subscribers: int
+
+    @property
+    def video_count(self) -> int:
+        return 20 + _stable_hash(self.channel_id) % 480
+
+    @property
+    def uploads_playlist(self) -> str:
+        return 'UU' + self.channel_id[2:]
+
+
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], 'big')
+
+
+def _synthetic_channel_id(key: str) -> str:
+    return 'UC' + base64.urlsafe_b64encode(hashlib.sha256(key.encode()).digest()).decode()[:22]
+
+
+def _first(row: Dict[str, str], columns: Iterable[str]) -> str:
+    for column in columns:
+        if (row.get(column) or '').strip():
+            return row[column].strip()
+    return ''
+
+
+class ChannelDirectory:
+    """In-memory channel and video data served by the stand-in."""
+
+    def __init__(self, csv_files: Iterable[Path] = DEFAULT_CSV_FILES):
+        """
+        Load channels from CSV files. Earlier files win when two rows share a channel ID or handle.
+
+        Args:
+            csv_files (Iterable[Path]): CSVs with channel ID, handle, title, subscriber or URL columns
+        """
+        self.channels: List[StandInChannel] = []
+        self.by_id: Dict[str, StandInChannel] = {}
+        self.by_handle: Dict[str, StandInChannel] = {}
+        for csv_file in csv_files:
+            with open(csv_file, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self._add(row)
+        # search.list ranks matches by subscribers, like relevance tends to
+        self.ranked = sorted(self.channels, key=lambda channel: -channel.subscribers)
+
+    def _add(self, row: Dict[str, str]) -> None:
+        url = _first(row, URL_COLUMNS)
+        channel_id = _first(row, ID_COLUMNS)
+        handle = _first(row, HANDLE_COLUMNS).lstrip('@')
+        if not channel_id.startswith('UC'):
+            match = re.search(r'/channel/(UC[\w-]+)', url)
+            channel_id = match.group(1) if match else ''
+        if handle.startswith('UC') or not handle:
+            match = re.search(r'/@([\w.-]+)', url)
+            handle = match.group(1) if match else ''
+        if not channel_id:
+            if not handle:
+                return
+            channel_id = _synthetic_channel_id(handle.lower())
+        if channel_id in self.by_id or (handle and handle.lower() in self.by_handle):
+            return
+
+        try:
+            subscribers = int(float(_first(row, SUBSCRIBER_COLUMNS) or 0))
+        except ValueError:
+            subscribers = 0
+        channel = StandInChannel(len(self.channels), channel_id, handle or None,
+                                 _first(row, TITLE_COLUMNS) or handle or channel_id, subscribers)
+        self.channels.append(channel)
+        self.by_id[channel_id] = channel
+        if handle:
+            self.by_handle[handle.lower()] = channel
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def search(self, query: str) -> List[StandInChannel]:
+        """Channels whose handle or title contains query; a stable sample when nothing matches."""
+        needle = query.lower().replace(' ', '')
+        matches = [
+            channel for channel in self.ranked
+            if needle in channel.title.lower().replace(' ', '') or needle in (channel.handle or '').lower()
+        ]
+        if matches or not self.channels:
+            return matches[:MAX_SEARCH_RESULTS]
+        start = _stable_hash(query) % len(self.ranked)
+        return (self.ranked[start:] + self.ranked[:start])[:MAX_SEARCH_RESULTS]
+
+    @staticmethod
+    def video_id(channel: StandInChannel, number: int) -> str:
+        """Reversible ID of a channel's number-th upload (0 = newest)."""
+        packed = base64.urlsafe_b64encode(struct.pack('>IH', channel.index, number)).decode()
+        return packed + base64.urlsafe_b64encode(hashlib.sha256(packed.encode()).digest()).decode()[:3]
+
+    def video(self, video_id: str) -> Optional[Tuple[StandInChannel, int]]:
+        """Return (channel, upload number) for a video ID made by video_id(), or None."""
+        try:
+            index, number = struct.unpack('>IH', base64.urlsafe_b64decode(video_id[:8]))
+        except (ValueError, struct.error):
+            return None
+        if index >= len(self.channels) or number >= self.channels[index].video_count:
+            return None
+        channel = self.channels[index]
+        return (channel, number) if self.video_id(channel, number) == video_id else None
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP server holding the stand-in's data, settings and counters."""
+    # The default backlog of 5 drops connections when a pooled client opens many at once
+    request_queue_size = 256
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], directory: Optional[ChannelDirectory] = None,
+                 latency: float = 0.0, jitter: float = 0.0, daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 error_rate: float = 0.0, quota_error_rate: float = 0.0,
+                 invalid_keys: Iterable[str] = (), seed: Optional[int] = None):
+        """
+        Args:
+            address (Tuple[str, int]): Host and port; port 0 picks a free one
+            directory (Optional[ChannelDirectory]): Channels to serve; defaults to the bundled CSVs
+            latency (float): Seconds added to every API response
+            jitter (float): Up to this many extra seconds, drawn uniformly per request
+            daily_quota (int): Units each key may use per Pacific-time day
+            error_rate (float): Fraction of requests answered with 503 backendError
+            quota_error_rate (float): Fraction of requests answered with 403 quotaExceeded
+            invalid_keys (Iterable[str]): Keys answered with 400 keyInvalid
+            seed (Optional[int]): Seed for jitter and injected failures
+        """
+        super().__init__(address, StandInHandler)
+        self.directory = directory if directory is not None else ChannelDirectory()
+        self.latency = latency
+        self.jitter = jitter
+        self.daily_quota = daily_quota
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.invalid_keys = set(invalid_keys)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._units: Dict[Tuple[str, str], int] = Counter()
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL to pass as api_endpoint."""
+        return f'http://{self.server_address[0]}:{self.server_address[1]}/'
+
+    def admit(self, api_key: str, endpoint: str) -> Optional[Tuple[int, str, str]]:
+        """
+        Count a request and charge its quota.
+
+        Returns:
+            Optional[Tuple[int, str, str]]: (status, reason, message) if the request must fail, else None
+        """
+        with self._lock:
+            self.requests[endpoint] += 1
+            if not api_key:
+                failure = (403, 'forbidden', 'The request is missing a valid API key.')
+            elif api_key in self.invalid_keys:
+                failure = (400, 'keyInvalid', 'API key not valid. Please pass a valid API key.')
+            elif self._random.random() < self.error_rate:
+                failure = (503, 'backendError', 'Backend Error')
+            elif self._random.random() < self.quota_error_rate:
+                failure = (403, 'quotaExceeded', 'The request cannot be completed because you have exceeded your quota.')
+            else:
+                day_key = (api_key, pacific_day())
+                cost = ENDPOINT_COSTS[endpoint]
+                if self._units[day_key] + cost > self.daily_quota:
+                    failure = (403, 'quotaExceeded',
+                               'The request cannot be completed because you have exceeded your quota.')
+                else:
+                    self._units[day_key] += cost
+                    failure = None
+            if failure:
+                self.errors[failure[1]] += 1
+            return failure
+
+    def reject(self, endpoint: str, status: int, reason: str, message: str) -> Tuple[int, str, str]:
+        """Count a request that fails validation before any quota is charged, and return its failure."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.errors[reason] += 1
+        return status, reason, message
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def units(self, api_key: Optional[str] = None) -> int:
+        """Units charged today, for one key or all keys."""
+        day = pacific_day()
+        with self._lock:
+            return sum(units for (key, key_day), units in self._units.items()
+                       if key_day == day and (api_key is None or key == api_key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'channels': len(self.directory),
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'units': {key: units for (key, _), units in self._units.items()}
+            }
+
+
+def _page_start(params: Dict[str, str]) -> Optional[int]:
+    """Offset encoded in the request's pageToken (0 without one), or None if the token is not ours."""
+    token = params.get('pageToken') or '0'
+    return int(token) if token.isdigit() else None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers Data API requests from the server's ChannelDirectory."""
+    protocol_version = 'HTTP/1.1'
+    server: StandInServer
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/stand-in/stats':
+            self._send(200, self.server.stats())
+            return
+        match = re.fullmatch(r'/youtube/v3/(\w+)', parsed.path)
+        handler = getattr(self, f'_{match.group(1)}', None) if match else None
+        if handler is None or f'{match.group(1)}.list' not in ENDPOINT_COSTS:
+            self._send(404, {'error': {'code': 404, 'message': 'Not Found', 'errors': [{'reason': 'notFound'}]}})
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        endpoint = f'{match.group(1)}.list'
+        time.sleep(self.server.delay())
+        if _page_start(params) is None:
+            failure = self.server.reject(endpoint, 400, 'invalidPageToken', 'The request specifies an invalid page token.')
+        else:
+            failure = self.server.admit(params.get('key', ''), endpoint)
+        if failure:
+            status, reason, message = failure
+            self._send(status, {'error': {'code': status, 'message': message,
+                                          'errors': [{'message': message, 'domain': 'youtube', 'reason': reason}]}})
+            return
+        self._send(200, handler(params))
+
+    def _channels(self, params: Dict[str, str]) -> Dict[str, Any]:
+        directory = self.server.directory
+        if 'id' in params:
+            found = [directory.by_id.get(channel_id) for channel_id in params['id'].split(',')[:50]]
+        else:
+            name = params.get('forHandle') or params.get('forUsername') or ''
+            found = [directory.by_handle.get(name.lstrip('@').lower())]
+        items = [self._channel_item(channel) for channel in found if channel is not None]
+        return {'kind': 'youtube#channelListResponse', 'pageInfo': {'totalResults': len(items)}, 'items': items}
+
+    @staticmethod
+    def _channel_item(channel: StandInChannel) -> Dict[str, Any]:
+        published = datetime(2006, 1, 1, tzinfo=timezone.utc) + timedelta(days=_stable_hash(channel.channel_id) % 6000)
+        return {
+            'kind': 'youtube#channel',
+            'id': channel.channel_id,
+            'snippet': {
+                'title': channel.title,
+                'customUrl': f'@{channel.handle.lower()}' if channel.handle else '',
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ')
+            },
+            'statistics': {
+                'subscriberCount': str(channel.subscribers),
+                'viewCount': str(channel.subscribers * (50 + _stable_hash(channel.title) % 400)),
+                'videoCount': str(channel.video_count),
+                'hiddenSubscriberCount': False
+            },
+            'contentDetails': {'relatedPlaylists': {'uploads': channel.uploads_playlist}}
+        }
+
+    def _search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        matches = self.server.directory.search(params.get('q', ''))
+        start, size = _page_start(params), min(int(params.get('maxResults', 5)), 50)
+        page = matches[start:start + size]
+        response = {
+            'kind': 'youtube#searchListResponse',
+            'pageInfo': {'totalResults': len(matches), 'resultsPerPage': size},
+            'items': [
+                {
+                    'kind': 'youtube#searchResult',
+                    'id': {'kind': 'youtube#channel', 'channelId': channel.channel_id},
+                    'snippet': {'channelId': channel.channel_id, 'channelTitle': channel.title, 'title': channel.title}
+                }
+                for channel in page
+            ]
+        }
+        if start + size < len(matches):
+            response['nextPageToken'] = str(start + size)
+        return response
+
+    def _playlistItems(self, params: Dict[str, str]) -> Dict[str, Any]:
+        directory = self.server.directory
+        playlist_id = params.get('playlistId', '')
+        channel = directory.by_id.get('UC' + playlist_id[2:]) if playlist_id.startswith('UU') else None
+        total = channel.video_count if channel else 0
+        start, size = _page_start(params), min(int(params.get('maxResults', 5)), 50)
+        response = {
+            'kind': 'youtube#playlistItemListResponse',
+            'pageInfo': {'totalResults': total, 'resultsPerPage': size},
+            'items': [
+                {'contentDetails': {'videoId': directory.video_id(channel, number),
+                                    'videoPublishedAt': self._published(channel, number)}}
+                for number in range(start, min(start + size, total))
+            ]
+        }
+        if start + size < total:
+            response['nextPageToken'] = str(start + size)
+        return response
+
+    def _videos(self, params: Dict[str, str]) -> Dict[str, Any]:
+        items = []
+        for video_id in params.get('id', '').split(',')[:50]:
+            found = self.server.directory.video(video_id)
+            if found is None:
+                continue
+            channel, number = found
+            views = channel.subscribers // (5 + _stable_hash(video_id) % 200) + 1
+            items.append({
+                'kind': 'youtube#video',
+                'id': video_id,
+                'snippet': {'channelId': channel.channel_id, 'title': f'{channel.title} video {number}',
+                            'publishedAt': self._published(channel, number)},
+                'statistics': {'viewCount': str(views), 'likeCount': str(views // 25), 'commentCount': str(views // 900)}
+            })
+        return {'kind': 'youtube#videoListResponse', 'items': items}
+
+    @staticmethod
+    def _published(channel: StandInChannel, number: int) -> str:
+        # Uploads are spaced a few days apart, newest first
+        spacing = 1 + _stable_hash(channel.channel_id) % 7
+        published = datetime(2024, 1, 1, tzinfo=timezone.utc) - timedelta(days=number * spacing)
+        return published.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(port: int = 0, **options) -> StandInServer:
+    """
+    Start the stand-in in a background thread.
+
+    Args:
+        port (int): Local port; 0 picks a free one
+        **options: StandInServer settings (directory, latency, jitter, daily_quota, error_rate, ...)
+
+    Returns:
+        StandInServer: The running server; its endpoint property is the base URL for clients
+    """
+    server = StandInServer(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Run the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(description='Serve a local stand-in of the YouTube Data API')
+    parser.add_argument('--port', type=int, default=8089, help='Port to listen on (default: 8089)')
+    parser.add_argument('--csv', nargs='+', default=[str(path) for path in DEFAULT_CSV_FILES],
+                        help='Channel CSV files to serve')
+    parser.add_argument('--latency', type=float, default=0, help='Latency per request in ms (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0, help='Extra random latency up to this many ms')
+    parser.add_argument('--daily_quota', type=int, default=DEFAULT_DAILY_QUOTA, help='Units per key and day')
+    parser.add_argument('--error_rate', type=float, default=0, help='Fraction of requests failing with 503')
+    parser.add_argument('--quota_error_rate', type=float, default=0, help='Fraction of requests failing with quotaExceeded')
+    parser.add_argument('--invalid_keys', default='', help='Comma-separated keys rejected as invalid')
+    parser.add_argument('--seed', type=int, help='Random seed for jitter and injected failures')
+    args = parser.parse_args()
+
+    server = start_stand_in(
+        args.port,
+        directory=ChannelDirectory([Path(path) for path in args.csv]),
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        daily_quota=args.daily_quota,
+        error_rate=args.error_rate,
+        quota_error_rate=args.quota_error_rate,
+        invalid_keys=[key for key in args.invalid_keys.split(',') if key],
+        seed=args.seed
+    )
+    print(f"Serving {len(server.directory):,} channels at {server.endpoint} (stats at {server.endpoint}stand-in/stats)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
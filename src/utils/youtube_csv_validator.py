@@ -7,6 +7,12 @@ Example:
     # Validate YouTube channel URLs from a CSV file
     python youtube_csv_validator.py --input_file "youtube_channel_urls.csv" --url_column "Youtube_Channel_URL" --limit 100
     python youtube_csv_validator.py --input_file "/Users/yuanlu/Code/youtube-top-10000-channels/src/utils/youtube_channel_urls_web.csv" --url_column "Youtube_Channel_URL" --limit 100
+
+    # Merge results left in the journal by an interrupted run into the CSV
+    python youtube_csv_validator.py --input_file "youtube_channel_urls.csv" --url_column "Youtube_Channel_URL" --merge_only
+
+    # Revalidate cached valid results after one day instead of seven
+    python youtube_csv_validator.py --input_file "youtube_channel_urls.csv" --url_column "Youtube_Channel_URL" --valid_ttl_hours 24
 '''
 
 import pandas as pd
@@ -14,6 +20,11 @@ import logging
 from pathlib import Path
 from typing import Optional
 from youtube_url_validator import YouTubeValidator
+from channel_url import with_scheme
+from results_journal import ResultsJournal
+from channel_cache import ChannelCache, DEFAULT_CACHE_FILE
+from negative_cache import NegativeCache, DEFAULT_NEGATIVE_CACHE_FILE
+from shared_rate_limiter import SharedRateLimiter, configure_bucket
 import argparse
 import sys
 import json
@@ -32,6 +43,16 @@ logging.basicConfig(
     ]
 )
 
+# Result columns written by the validator, with their defaults for unprocessed rows
+VALIDATION_COLUMNS = {
+    'validated_url': '',
+    'is_valid': pd.NA,
+    'channel_id': '',
+    'handle': '',
+    'subscribers': pd.NA,
+    'error': ''
+}
+
 class ValidationStatus(Enum):
     """Enumeration for validation status tracking."""
     PENDING = "pending"
@@ -78,7 +99,9 @@ class YoutubeCSVValidator:
     and saves the results back to a new CSV file with additional validation information.
     """
 
-    def __init__(self, input_file: str, url_column: str, limit: Optional[int] = None):
+    def __init__(self, input_file: str, url_column: str, limit: Optional[int] = None,
+                 cache: Optional[ChannelCache] = None, negative_cache: Optional[NegativeCache] = None,
+                 rate_limiter: Optional[SharedRateLimiter] = None):
         """
         Initialize the YouTube CSV validator.
 
@@ -86,6 +109,10 @@ class YoutubeCSVValidator:
             input_file (str): Path to the input CSV file
             url_column (str): Name of the column containing YouTube URLs
             limit (Optional[int]): Maximum number of URLs to process. None means process all.
+            cache (Optional[ChannelCache]): Shared result cache; fresh entries skip the network
+            negative_cache (Optional[NegativeCache]): Failed URLs skipped until their re-check is due
+            rate_limiter (Optional[SharedRateLimiter]): Token bucket shared with other processes
+                fetching YouTube pages; defaults to the 'youtube_web' bucket
         
         Raises:
             ValueError: If input parameters are invalid
@@ -100,22 +127,25 @@ class YoutubeCSVValidator:
         self._input_file = Path(input_file)
         self._url_column = url_column
         self._limit = limit
-        self._validator = YouTubeValidator()
+        self._cache = cache
+        self._negative_cache = negative_cache
+        self._validator = YouTubeValidator(cache=cache, negative_cache=negative_cache)
         self._df: Optional[pd.DataFrame] = None
         self._checkpoint_size = 10
         self._rate_settings = {
-            'min_delay': 0.1,
             'max_delay': 1,
-            'burst_size': 20,
-            'burst_delay': 0.2,
             'error_delay': 1.0,
         }
-        self._request_times = []
+        self._rate_limiter = rate_limiter or SharedRateLimiter('youtube_web')
         self._error_count = 0
         self._last_error_time = None
         self._setup_logging()
         self._status_file = self._input_file.parent / f"{self._input_file.stem}_status.json"
         self._status = self._load_status()
+        self._journal = ResultsJournal(
+            self._input_file.parent / f"{self._input_file.stem}_journal.db",
+            VALIDATION_COLUMNS
+        )
 
     def _setup_logging(self) -> None:
         """Configure logging for the validator."""
@@ -137,20 +167,9 @@ class YoutubeCSVValidator:
             if self._url_column not in self._df.columns:
                 raise ValueError(f"Column '{self._url_column}' not found in CSV file")
             
-            # Initialize new columns if they don't exist, preserving existing data
-            new_columns = {
-                'validated_url': '',
-                'is_valid': pd.NA,
-                'channel_id': '',
-                'handle': '',
-                'subscribers': pd.NA,
-                'error': ''
-            }
-            
-            for col, default_value in new_columns.items():
-                if col not in self._df.columns:
-                    # Only add new column with default value if it doesn't exist
-                    self._df[col] = default_value
+            # Initialize new columns if they don't exist, preserving existing data,
+            # and apply results journaled by a previous run that were not merged yet
+            self._df = self._journal.apply(self._df, self._url_column)
             
             # Apply limit if specified, but only for processing
             if self._limit is not None:
@@ -163,70 +182,31 @@ class YoutubeCSVValidator:
             raise
 
     def _save_checkpoint(self, results: list, start_idx: int) -> None:
-        """Update the input CSV file with new results while preserving original data."""
-        max_retries = 3
-        retry_count = 0
-        
-        validation_columns = [
-            'validated_url', 'is_valid', 'channel_id',
-            'handle', 'subscribers', 'error'
-        ]
-        
-        while retry_count < max_retries:
-            try:
-                # Read the current state of the file
-                current_df = pd.read_csv(self._input_file)
-                
-                # Create backup of current file
-                backup_file = self._input_file.parent / f"{self._input_file.stem}_backup.csv"
-                current_df.to_csv(backup_file, index=False)
-                
-                # Ensure validation columns exist
-                for col in validation_columns:
-                    if col not in current_df.columns:
-                        current_df[col] = pd.NA if col in ['is_valid', 'subscribers'] else ''
-                
-                # Update only the new validation columns for processed URLs
-                for result in results:
-                    url = result[self._url_column]
-                    idx = current_df[current_df[self._url_column] == url].index
-                    if len(idx) > 0:
-                        # Only update the validation columns, preserve all other data
-                        for col in validation_columns:
-                            if col in result:
-                                current_df.loc[idx[0], col] = result[col]
-                
-                # Save the updated DataFrame back to the original file
-                current_df.to_csv(self._input_file, index=False)
-                
-                logging.info(f"Saved checkpoint at index {start_idx + len(results)}")
-                self._update_status(results)
-                
-                # Remove backup if save was successful
-                if backup_file.exists():
-                    backup_file.unlink()
-                return
-                
-            except Exception as e:
-                retry_count += 1
-                logging.error(f"Checkpoint save attempt {retry_count} failed: {e}")
-                if retry_count == max_retries:
-                    self._status['status'] = ValidationStatus.FAILED.value
-                    self._status['errors'].append(str(e))
-                    self._update_status([])
-                    raise
-                time.sleep(1)
+        """Append a batch of results to the journal; cost is proportional to the batch size."""
+        try:
+            self._journal.append(results, self._url_column)
+            logging.info(f"Saved checkpoint at index {start_idx + len(results)}")
+            self._update_status(results)
+        except Exception as e:
+            logging.error(f"Checkpoint save failed: {e}")
+            self._status['status'] = ValidationStatus.FAILED.value
+            self._status['errors'].append(str(e))
+            self._update_status([])
+            raise
+
+    def merge_results(self) -> int:
+        """Merge journaled results into the input CSV file in a single rewrite."""
+        return self._journal.merge_into_csv(self._input_file, self._url_column)
 
     def _get_delay(self) -> float:
         """
-        Determine the appropriate delay before the next request based on recent activity.
+        Determine the extra delay before the next request after recent errors.
+
+        Normal pacing comes from the shared token bucket, which limits all
+        validator and downloader processes together.
         """
         now = datetime.now()
         
-        # Clean up old request times (older than 60 seconds)
-        self._request_times = [t for t in self._request_times 
-                             if now - t < timedelta(seconds=60)]
-        
         # If we've had recent errors, increase delays
         if self._last_error_time and now - self._last_error_time < timedelta(seconds=300):
             return max(
@@ -234,19 +214,19 @@ class YoutubeCSVValidator:
                 random.uniform(self._rate_settings['max_delay'], 
                              self._rate_settings['max_delay'] * 2)
             )
-        
-        # Check if we're in a burst
-        recent_requests = len([t for t in self._request_times 
-                             if now - t < timedelta(seconds=5)])
-        
-        if recent_requests >= self._rate_settings['burst_size']:
-            return self._rate_settings['burst_delay']
-        
-        # Return random delay within configured range
-        return random.uniform(
-            self._rate_settings['min_delay'],
-            self._rate_settings['max_delay']
-        )
+        return 0.0
+
+    def _build_result(self, url: str, validation_result) -> dict:
+        """Convert a ChannelInfo into a row of validation columns."""
+        return {
+            self._url_column: url,
+            'validated_url': validation_result.url,
+            'is_valid': validation_result.is_valid,
+            'channel_id': validation_result.channel_id or '',
+            'handle': validation_result.handle or '',
+            'subscribers': validation_result.subscribers or 0,
+            'error': validation_result.error_message or ''
+        }
 
     def _validate_urls(self) -> None:
         """Validate URLs with improved rate limiting and resume capability."""
@@ -263,6 +243,18 @@ class YoutubeCSVValidator:
         
         logging.info(f"Found {len(remaining_df)} unprocessed URLs out of {total_urls} total URLs")
         
+        cached_results = {}
+        if self._cache is not None:
+            cached_results = self._cache.get_many(remaining_df[self._url_column], 'scraper')
+            logging.info(f"Found {len(cached_results)} fresh results in the channel cache")
+        
+        blocked_urls = {}
+        if self._negative_cache is not None:
+            blocked_urls = self._negative_cache.blocked(
+                url for url in remaining_df[self._url_column] if url not in cached_results
+            )
+            logging.info(f"Skipping {len(blocked_urls)} URLs that failed recently")
+        
         current_batch = []
         
         for index, row in remaining_df.iterrows():
@@ -270,9 +262,6 @@ class YoutubeCSVValidator:
             logging.info(f"Processing URL at index {index}: {url}")
             
             try:
-                delay = self._get_delay()
-                time.sleep(delay)
-                
                 if pd.isna(url):
                     result = {
                         self._url_column: url,
@@ -283,10 +272,28 @@ class YoutubeCSVValidator:
                         'subscribers': 0,
                         'error': 'Empty URL'
                     }
+                elif url in cached_results:
+                    result = self._build_result(url, cached_results[url])
+                elif url in blocked_urls:
+                    result = {
+                        self._url_column: url,
+                        'validated_url': with_scheme(url),
+                        'is_valid': False,
+                        'channel_id': '',
+                        'handle': '',
+                        'subscribers': 0,
+                        'error': blocked_urls[url].error_message or ''
+                    }
                 else:
+                    delay = self._get_delay()
+                    if delay:
+                        time.sleep(delay)
+                    self._rate_limiter.acquire()
+                    
                     # 添加详细的时间记录
                     start_time = time.time()
-                    validation_result = self._validator.validate_url(url)
+                    # Both caches were consulted above
+                    validation_result = self._validator.validate_url(url, lookup_caches=False)
                     end_time = time.time()
                     request_time = end_time - start_time
                     
@@ -294,18 +301,9 @@ class YoutubeCSVValidator:
                     if request_time > 1.0:  # 记录较慢的请求
                         logging.warning(f"Slow request detected: {request_time:.3f}s for {url}")
                     
-                    self._request_times.append(datetime.now())
                     self._error_count = max(0, self._error_count - 1)
                     
-                    result = {
-                        self._url_column: url,
-                        'validated_url': validation_result.url,
-                        'is_valid': validation_result.is_valid,
-                        'channel_id': validation_result.channel_id or '',
-                        'handle': validation_result.handle or '',
-                        'subscribers': validation_result.subscribers or 0,
-                        'error': validation_result.error_message or ''
-                    }
+                    result = self._build_result(url, validation_result)
             
             except Exception as e:
                 error_message = str(e).lower()
@@ -313,6 +311,7 @@ class YoutubeCSVValidator:
                     # Save the current batch before terminating
                     if current_batch:
                         self._save_checkpoint(current_batch, index - len(current_batch) + 1)
+                    self.merge_results()
                     logging.error(f"Rate limit detected. Terminating process. Error: {str(e)}")
                     self._status['status'] = ValidationStatus.FAILED.value
                     self._status['errors'].append(str(e))
@@ -353,6 +352,7 @@ class YoutubeCSVValidator:
         try:
             self._load_csv()
             self._validate_urls()
+            self.merge_results()
             logging.info("URL validation process completed successfully")
         except Exception as e:
             logging.error(f"Error during processing: {str(e)}")
@@ -396,16 +396,40 @@ def main():
     parser.add_argument('--input_file', required=True, help='Path to the input CSV file')
     parser.add_argument('--url_column', required=True, help='Name of the column containing YouTube URLs')
     parser.add_argument('--limit', type=int, help='Maximum number of URLs to process')
+    parser.add_argument('--merge_only', action='store_true', help='Only merge journaled results into the CSV file')
+    parser.add_argument('--cache_file', default=str(DEFAULT_CACHE_FILE), help='Path to the shared channel cache')
+    parser.add_argument('--no_cache', action='store_true', help='Validate every URL over the network')
+    parser.add_argument('--valid_ttl_hours', type=float, default=168, help='Hours a valid cached result stays fresh (default: 168)')
+    parser.add_argument('--invalid_ttl_hours', type=float, default=24, help='Hours an invalid cached result stays fresh (default: 24)')
+    parser.add_argument('--negative_cache_file', default=str(DEFAULT_NEGATIVE_CACHE_FILE), help='Path to the store of failed URLs')
+    parser.add_argument('--no_negative_cache', action='store_true', help='Re-check URLs that failed recently')
+    parser.add_argument('--rate', type=float, help="Set the requests/s of the 'youtube_web' bucket, shared by all processes")
     
     args = parser.parse_args()
+    if args.rate:
+        configure_bucket('youtube_web', rate=args.rate)
     
     try:
+        negative_cache = None if args.no_negative_cache else NegativeCache(args.negative_cache_file)
+        cache = None
+        if not args.no_cache:
+            cache = ChannelCache(
+                args.cache_file,
+                valid_ttl=args.valid_ttl_hours * 3600,
+                invalid_ttl=args.invalid_ttl_hours * 3600
+            )
         validator = YoutubeCSVValidator(
             input_file=args.input_file,
             url_column=args.url_column,
-            limit=args.limit
+            limit=args.limit,
+            cache=cache,
+            negative_cache=negative_cache,
+            rate_limiter=SharedRateLimiter('youtube_web')
         )
-        validator.process()
+        if args.merge_only:
+            validator.merge_results()
+        else:
+            validator.process()
     except Exception as e:
         logging.error(f"Main process failed: {str(e)}")
         raise
@@ -5,24 +5,33 @@ Validates YouTube channel URLs from a CSV file and extracts channel information.
 Example:
     python youtube_csv_validator_api.py --input_file "channels.csv" --url_column "Youtube_Channel_URL" --api_key "YOUR_API_KEY"
     python youtube_csv_validator_api.py --input_file "./data/youtube_channels.csv" --url_column "Youtube_Channel_URL" --api_key "YOUR_API_KEY"
+
+    # Rotate between several project keys
+    python youtube_csv_validator_api.py --input_file "channels.csv" --url_column "Youtube_Channel_URL" --api_key "KEY_ONE,KEY_TWO"
+
+    # Merge results left in the journal by an interrupted run into the CSV
+    python youtube_csv_validator_api.py --input_file "channels.csv" --url_column "Youtube_Channel_URL" --api_key "YOUR_API_KEY" --merge_only
 """
 
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from typing import Optional, Dict, Any, List, Set
 import argparse
 import sys
 import time
 import re
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from collections import deque
-import warnings
-from googleapiclient.discovery_cache.base import Cache
+from youtube_url_validator import ChannelInfo
+from channel_cache import ChannelCache, DEFAULT_CACHE_FILE
+from negative_cache import NegativeCache, DEFAULT_NEGATIVE_CACHE_FILE
+from shared_rate_limiter import SharedRateLimiter
+from youtube_api_async import AsyncYouTubeClient, YouTubeAPIError
+from quota_ledger import (QuotaExhausted, ENDPOINT_COSTS, plan_by_cost,
+                          DEFAULT_DAILY_QUOTA, DEFAULT_QUOTA_LEDGER_FILE)
+from api_key_pool import ApiKeyPool, parse_api_keys
+from handle_map import HandleMap, DEFAULT_HANDLE_MAP_FILE
+from results_journal import ResultsJournal
 
 logging.basicConfig(
     level=logging.INFO,
@@ -33,75 +42,135 @@ logging.basicConfig(
     ]
 )
 
-logging.getLogger('googleapiclient.discovery_cache').setLevel(logging.ERROR)
-warnings.filterwarnings('ignore', message='file_cache is unavailable when using oauth2client >= 4.0.0')
-
-class MemoryCache(Cache):
-    """A simple in-memory cache for Google API discovery documents."""
-    _CACHE = {}
-
-    def get(self, url):
-        return MemoryCache._CACHE.get(url)
-
-    def set(self, url, content):
-        MemoryCache._CACHE[url] = content
+# Result columns written by the validator, with their defaults for unprocessed rows
+API_RESULT_COLUMNS = {
+    'channel_id': '',
+    'channel_title': '',
+    'subscribers': pd.NA,
+    'handle': '',
+    'is_valid': pd.NA,
+    'error': ''
+}
 
 class RateLimiter:
-    """Manages API request rates."""
-    def __init__(self, max_requests_per_min: int = 1800000, daily_quota: int = 10000):
+    """Manages API request rates. Daily quota is accounted per key by the ApiKeyPool."""
+    def __init__(self, max_requests_per_min: Optional[int] = None, bucket: str = 'youtube_data_api'):
         """
         Initialize rate limiter.
         
         Args:
-            max_requests_per_min (int): Maximum requests allowed per minute
-            daily_quota (int): Daily quota limit
+            max_requests_per_min (Optional[int]): Maximum requests per minute across all processes
+                sharing the bucket, if the bucket is new; an existing bucket keeps its stored rate
+            bucket (str): Name of the shared token bucket
         """
-        self.max_requests_per_min = max_requests_per_min
-        self.daily_quota = daily_quota
-        self.requests = deque()
-        self.quota_used = 0
+        rate = max_requests_per_min / 60 if max_requests_per_min else None
+        self._bucket = SharedRateLimiter(bucket, rate=rate, burst=max(1, rate) if rate else None)
     
-    def can_proceed(self, quota_cost: int) -> bool:
-        """Check if a new request can proceed."""
-        now = datetime.now()
-        
-        # Check minute-based rate limit
-        while self.requests and (now - self.requests[0]).total_seconds() > 60:
-            self.requests.popleft()
-            
-        if len(self.requests) >= self.max_requests_per_min:
-            return False
-            
-        # Check daily quota limit
-        if self.quota_used + quota_cost > self.daily_quota:
-            return False
-            
-        return True
-    
-    def add_request(self, quota_cost: int):
-        """Record a new request."""
-        self.requests.append(datetime.now())
-        self.quota_used += quota_cost
+    async def acquire(self):
+        """Wait for a token from the shared bucket."""
+        await self._bucket.acquire_async()
+
+class ChannelBatcher:
+    """
+    Coalesces channels.list lookups by channel ID.
+
+    channels.list accepts up to 50 comma-joined IDs for the same 1-unit cost as a
+    single ID. Callers await get() per channel; pending IDs are flushed as soon
+    as 50 are queued, or after a short linger so a partial batch is not held
+    back, and each caller receives the result for its own ID.
+    """
+
+    def __init__(self, validator: 'YouTubeValidator', batch_size: int = 50, linger: float = 0.05):
+        """
+        Args:
+            validator (YouTubeValidator): Validator that executes the batched requests
+            batch_size (int): Maximum IDs per request (the API allows 50)
+            linger (float): Seconds to wait for more IDs before flushing a partial batch
+        """
+        self._validator = validator
+        self._batch_size = batch_size
+        self._linger = linger
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests_sent = 0
+
+    async def get(self, channel_id: str) -> Dict[str, Any]:
+        """Queue a channel ID and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(channel_id, []).append(future)
+
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._linger, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send every pending ID, in requests of at most batch_size IDs."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, {}
+        channel_ids = list(pending)
+        for i in range(0, len(channel_ids), self._batch_size):
+            batch = {channel_id: pending[channel_id] for channel_id in channel_ids[i:i + self._batch_size]}
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Send any pending IDs and wait for every request in flight."""
+        if self._pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        """Execute one batched request and fan the results out to the waiting callers."""
+        self.requests_sent += 1
+        try:
+            results = await self._validator.get_channels_by_ids_async(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for channel_id, futures in batch.items():
+            result = results.get(channel_id, {'error': 'Channel not found', 'is_valid': False})
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
 
 class YouTubeValidator:
     """Validates YouTube channel URLs and extracts channel information using YouTube Data API."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, api_endpoint: Optional[str] = None, key_pool: Optional[ApiKeyPool] = None,
+                 handle_map: Optional[HandleMap] = None):
         """
         Initialize YouTube API client.
         
         Args:
-            api_key (str): YouTube Data API key
+            api_key (str): YouTube Data API key, or several separated by commas
+            api_endpoint (Optional[str]): Base URL overriding the public API endpoint
+            key_pool (Optional[ApiKeyPool]): Keys and quota ledgers to use; defaults to a pool of api_key
+            handle_map (Optional[HandleMap]): Persistent handle -> channel ID map; defaults to the shared map
         """
-        self._api_key = api_key
-        self._rate_limiter = RateLimiter(max_requests_per_min=1800000, daily_quota=10000)
-        self._executor = ThreadPoolExecutor(max_workers=10)
-        self._quota_used = 0
-        self._daily_quota = 10000  # Default quota
+        self.key_pool = key_pool or ApiKeyPool(parse_api_keys(api_key))
+        self.handle_map = handle_map or HandleMap()
+        self._client = AsyncYouTubeClient(None, api_endpoint, key_pool=self.key_pool)
+        self._rate_limiter = RateLimiter()
+        self._batcher = ChannelBatcher(self)
         
-    def _get_youtube_client(self):
-        """Create a new YouTube client instance for each thread."""
-        return build('youtube', 'v3', developerKey=self._api_key)
+    async def close(self) -> None:
+        """Finish batched lookups in flight, then close the API client's connection pool."""
+        await self._batcher.close()
+        await self._client.close()
 
     def _extract_channel_id(self, url: str) -> Optional[str]:
         """Extract channel ID from various YouTube URL formats."""
@@ -118,91 +187,181 @@ class YouTubeValidator:
                 return match.group(1)
         return None
 
-    async def _wait_for_rate_limit(self, quota_cost: int = 1):
+    async def _wait_for_rate_limit(self):
+        """Wait until we can make another request; quota is reserved by the client."""
+        await self._rate_limiter.acquire()
+
+    @staticmethod
+    def estimate_cost(identifier: Optional[str]) -> float:
         """
-        Wait until we can make another request.
-        
-        Args:
-            quota_cost (int): Cost in quota units for the upcoming request
+        Most quota units validating one identifier can cost, following _resolve_channel_async.
+
+        Pass the channel ID instead of the handle when the handle map already has it;
+        the lookup is then free and only the batched channels.list share is charged.
         """
-        while not self._rate_limiter.can_proceed(quota_cost):
-            await asyncio.sleep(0.005)
-        self._rate_limiter.add_request(quota_cost)
-
-    def _track_quota(self, cost: int):
-        """Track quota usage"""
-        self._quota_used += cost
-        if self._quota_used >= self._daily_quota:
-            raise Exception("Daily quota limit reached")
-            
+        if not identifier:
+            return 0.0
+        # Channel IDs share one channels.list request per 50
+        batched = ENDPOINT_COSTS['channels.list'] / 50
+        if identifier.startswith('UC'):
+            return batched
+        if identifier.startswith('@'):
+            # forHandle, then search.list and the batched lookup of the ID it found
+            return ENDPOINT_COSTS['channels.list'] + ENDPOINT_COSTS['search.list'] + batched
+        # forUsername, then forHandle; both return the statistics in the same request
+        return 2 * ENDPOINT_COSTS['channels.list']
+
+    @staticmethod
+    def _parse_channel(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a channels.list item into result columns."""
+        snippet = item.get('snippet', {})
+        statistics = item.get('statistics', {})
+        return {
+            'channel_id': item['id'],
+            'channel_title': snippet.get('title', ''),
+            # Channels that hide their count are recorded as 0, like the scraper does
+            'subscribers': int(statistics.get('subscriberCount', 0)),
+            'handle': snippet.get('customUrl', ''),
+            'is_valid': True,
+            'error': ''
+        }
+
     async def get_channel_info_async(self, identifier: str) -> Dict[str, Any]:
         """Asynchronous version of channel info retrieval."""
-        # Use different quota costs based on the request type
-        quota_cost = 100 if identifier.startswith('@') else 1
-        await self._wait_for_rate_limit(quota_cost)
+        if identifier.startswith('UC'):
+            return await self._batcher.get(identifier)
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self._executor,
-            self._get_channel_info_sync,
-            identifier
-        )
+        channel_id = self.handle_map.get(identifier)
+        if channel_id:
+            return await self._batcher.get(channel_id)
+        
+        result = await self._resolve_channel_async(identifier)
+        if 'channel_id' in result and 'is_valid' not in result:
+            return await self._batcher.get(result['channel_id'])
+        return result
+
+    async def get_channels_by_ids_async(self, channel_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch up to 50 channels by ID in a single 1-unit channels.list request; IDs missing from the response are left out."""
+        await self._wait_for_rate_limit()
+        try:
+            response = await self._client.channels_list(ids=channel_ids)
+            return {item['id']: self._parse_channel(item) for item in response.get('items', [])}
+        except QuotaExhausted:
+            raise
+        except YouTubeAPIError as e:
+            if e.quota_exceeded:
+                raise QuotaExhausted(str(e)) from e
+            error = {'error': f'API error: {str(e)}', 'is_valid': False}
+            return {channel_id: error for channel_id in channel_ids}
+        except Exception as e:
+            error = {'error': f'Validation error: {str(e)}', 'is_valid': False}
+            return {channel_id: error for channel_id in channel_ids}
     
-    def _get_channel_info_sync(self, identifier: str) -> Dict[str, Any]:
-        """Synchronous version of get_channel_info."""
+    async def _lookup_channel(self, identifier: str, **lookup) -> Optional[Dict[str, Any]]:
+        """channels.list by forHandle or forUsername (1 unit); records the result in the handle map."""
+        await self._wait_for_rate_limit()
+        response = await self._client.channels_list(**lookup)
+        items = response.get('items', [])
+        if not items:
+            return None
+        result = self._parse_channel(items[0])
+        self.handle_map.put(identifier, result['channel_id'], next(iter(lookup)))
+        return result
+
+    async def _resolve_channel_async(self, identifier: str) -> Dict[str, Any]:
+        """
+        Resolve a handle or legacy username, cheapest lookup first.
+
+        Returns the full channel result when the lookup already included it, or
+        only {'channel_id': ...} when it came from search.
+        """
         try:
-            youtube = self._get_youtube_client()
-            
-            # Try direct channel.list first for all types (costs only 1 unit)
-            try:
-                channel_response = youtube.channels().list(
-                    id=identifier if identifier.startswith('UC') else None,
-                    forUsername=identifier if not identifier.startswith(('@', 'UC')) else None,
-                    part='snippet,statistics'
-                ).execute()
-                
-                if channel_response['items']:
-                    # Process channel info...
-                    return {...}
-                    
-            except HttpError:
-                pass
-            
-            # Only use search as last resort for custom URLs
             if identifier.startswith('@'):
-                response = youtube.search().list(
-                    q=identifier,
-                    type='channel',
-                    part='id'
-                ).execute()
-                # Process search results...
-
-        except HttpError as e:
-            error_message = str(e)
-            if 'quotaExceeded' in error_message:
-                raise Exception("YouTube API quota exceeded") from e
-            return {'error': f'API error: {error_message}', 'is_valid': False}
+                result = await self._lookup_channel(identifier, for_handle=identifier)
+            else:
+                # /user/ and /c/ names: legacy username first, then the handle of the same name
+                result = (await self._lookup_channel(identifier, for_username=identifier)
+                          or await self._lookup_channel(identifier, for_handle=f'@{identifier}'))
+            if result:
+                return result
+            if not identifier.startswith('@'):
+                return {'error': 'Channel not found', 'is_valid': False}
+            
+            # Only use search (100 units) as last resort for handles
+            await self._wait_for_rate_limit()
+            response = await self._client.search_list(
+                q=identifier,
+                part='id',
+                max_results=1,
+                fields='items(id(channelId))'
+            )
+            items = response.get('items', [])
+            if items:
+                channel_id = items[0]['id']['channelId']
+                self.handle_map.put(identifier, channel_id, 'search')
+                return {'channel_id': channel_id}
+            return {'error': 'Channel not found', 'is_valid': False}
+
+        except QuotaExhausted:
+            raise
+        except YouTubeAPIError as e:
+            if e.quota_exceeded:
+                raise QuotaExhausted(str(e)) from e
+            return {'error': f'API error: {str(e)}', 'is_valid': False}
         except Exception as e:
             return {'error': f'Validation error: {str(e)}', 'is_valid': False}
 
 class YoutubeCSVValidator:
     """Validates YouTube channel URLs from CSV files using YouTube API."""
 
-    def __init__(self, input_file: str, url_column: str, api_key: str, limit: Optional[int] = None):
+    def __init__(self, input_file: str, url_column: str, api_key: str, limit: Optional[int] = None,
+                 cache: Optional[ChannelCache] = None, negative_cache: Optional[NegativeCache] = None,
+                 api_endpoint: Optional[str] = None, key_pool: Optional[ApiKeyPool] = None,
+                 handle_map: Optional[HandleMap] = None, snapshot_interval: float = 300,
+                 concurrency: int = 500, flush_rows: int = 500, flush_interval: float = 10):
         """
         Initialize the validator.
 
         Args:
             input_file (str): Path to input CSV file
             url_column (str): Name of column containing YouTube URLs
-            api_key (str): YouTube Data API key
+            api_key (str): YouTube Data API key, or several separated by commas
             limit (Optional[int]): Maximum number of URLs to process
+            cache (Optional[ChannelCache]): Shared result cache; fresh entries skip the API
+            negative_cache (Optional[NegativeCache]): Failed URLs skipped until their re-check is due
+            api_endpoint (Optional[str]): Base URL overriding the public API endpoint
+            key_pool (Optional[ApiKeyPool]): Keys and quota ledgers to use; defaults to a pool of api_key
+            handle_map (Optional[HandleMap]): Persistent handle -> channel ID map; defaults to the shared map
+            snapshot_interval (float): Seconds between merges of journaled results into the CSV
+            concurrency (int): Rows kept in flight; up to 50 channel ID rows share one request
+            flush_rows (int): Buffered results that trigger a journal flush
+            flush_interval (float): Seconds after which buffered results are flushed regardless
         """
         self._input_file = Path(input_file)
         self._url_column = url_column
         self._limit = limit
-        self._validator = YouTubeValidator(api_key)
+        self._validator = YouTubeValidator(api_key, api_endpoint, key_pool, handle_map)
+        self._cache = cache
+        self._negative_cache = negative_cache
         self._df: Optional[pd.DataFrame] = None
+        # Results are journaled per batch and merged into the CSV on a time cadence
+        self._journal = ResultsJournal(
+            self._input_file.parent / f"{self._input_file.stem}_api_journal.db",
+            API_RESULT_COLUMNS
+        )
+        self._snapshot_interval = snapshot_interval
+        self._last_snapshot = time.monotonic()
+        self._concurrency = concurrency
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_interval
+        # Row index -> result columns, and URL -> ChannelInfo, not yet flushed
+        self._buffer: Dict[Any, Dict[str, Any]] = {}
+        self._cache_buffer: Dict[str, ChannelInfo] = {}
+        # URL -> error message, or None after a success; written to the negative cache on flush
+        self._negative_buffer: Dict[str, Optional[str]] = {}
+        self._last_flush = time.monotonic()
+        self._planned = 0
+        self._processed = 0
 
     def _load_csv(self) -> None:
         """Load and prepare the CSV file."""
@@ -212,19 +371,9 @@ class YoutubeCSVValidator:
             if self._url_column not in self._df.columns:
                 raise ValueError(f"Column '{self._url_column}' not found in CSV file")
             
-            # Initialize result columns
-            new_columns = {
-                'channel_id': '',
-                'channel_title': '',
-                'subscribers': pd.NA,
-                'handle': '',
-                'is_valid': pd.NA,
-                'error': ''
-            }
-            
-            for col, default_value in new_columns.items():
-                if col not in self._df.columns:
-                    self._df[col] = default_value
+            # Initialize result columns and apply results journaled by a previous
+            # run that were not merged yet
+            self._df = self._journal.apply(self._df, self._url_column)
             
             if self._limit:
                 self._df = self._df.iloc[:self._limit].copy()
@@ -235,45 +384,172 @@ class YoutubeCSVValidator:
             logging.error(f"Error loading CSV: {str(e)}")
             raise
 
-    async def _process_batch(self, batch_df: pd.DataFrame) -> None:
-        """Process a batch of channels concurrently."""
-        tasks = []
-        logging.info(f"Starting batch processing of {len(batch_df)} channels")
+    @staticmethod
+    def _to_channel_info(url: str, result: Dict[str, Any]) -> ChannelInfo:
+        """Convert an API result dict into a ChannelInfo for the shared cache."""
+        return ChannelInfo(
+            url=url,
+            is_valid=bool(result.get('is_valid')),
+            channel_id=result.get('channel_id') or None,
+            handle=result.get('handle') or None,
+            subscribers=result.get('subscribers'),
+            error_message=result.get('error') or None,
+            channel_title=result.get('channel_title') or None
+        )
+
+    @staticmethod
+    def _from_channel_info(info: ChannelInfo) -> Dict[str, Any]:
+        """Convert a cached API ChannelInfo back into result columns."""
+        subscribers = info.subscribers
+        # The cache stores counts as text
+        if isinstance(subscribers, str) and subscribers.isdigit():
+            subscribers = int(subscribers)
+        return {
+            'channel_id': info.channel_id or '',
+            'channel_title': info.channel_title or '',
+            'subscribers': subscribers,
+            'handle': info.handle or '',
+            'is_valid': info.is_valid,
+            'error': info.error_message or ''
+        }
+
+    @staticmethod
+    def _is_cacheable(result: Dict[str, Any]) -> bool:
+        """Transient API and client errors are retried next run rather than cached."""
+        error = result.get('error') or ''
+        return 'is_valid' in result and not error.startswith(('API error', 'Validation error'))
+
+    def _known_channel_ids(self, urls: pd.Series) -> Dict[str, str]:
+        """Channel IDs already known for URLs, from earlier scrapes/validations or the handle map."""
+        known = self._cache.channel_ids(urls) if self._cache is not None else {}
+        identifiers = {
+            url: self._validator._extract_channel_id(url)
+            for url in urls if isinstance(url, str) and url not in known
+        }
+        mapped = self._validator.handle_map.get_many(
+            identifier for identifier in identifiers.values() if identifier and not identifier.startswith('UC')
+        )
+        for url, identifier in identifiers.items():
+            if identifier in mapped:
+                known[url] = mapped[identifier]
+        return known
+
+    def _apply_results(self, results: Dict[Any, Dict[str, Any]]) -> None:
+        """Write buffered results into the DataFrame with one assignment per column and journal them."""
+        if not results:
+            return
+        frame = pd.DataFrame.from_dict(results, orient='index')
+        for col in API_RESULT_COLUMNS:
+            if col not in frame.columns:
+                continue
+            values = frame[col].dropna()
+            if values.empty:
+                continue
+            if self._df[col].dtype != object:
+                self._df[col] = self._df[col].astype(object)
+            self._df.loc[values.index, col] = values
+        
+        urls = self._df.loc[frame.index, self._url_column]
+        self._journal.append(
+            [{self._url_column: url, **result} for url, result in zip(urls, results.values())],
+            self._url_column
+        )
+
+    def merge_results(self) -> int:
+        """Merge journaled results into the input CSV file in a single atomic rewrite."""
+        self._last_snapshot = time.monotonic()
+        return self._journal.merge_into_csv(self._input_file, self._url_column)
+
+    def _maybe_snapshot(self) -> None:
+        """Merge the journal into the CSV when snapshot_interval has passed since the last merge."""
+        if time.monotonic() - self._last_snapshot >= self._snapshot_interval:
+            self.merge_results()
+
+    def _prepare_rows(self, rows_df: pd.DataFrame) -> List[tuple]:
+        """
+        Resolve rows that need no API call and return the rest as work items.
+
+        Cache hits, URLs blocked by the negative cache and malformed URLs are
+        answered locally and buffered. The remaining rows come back as
+        (index, url, identifier) tuples for the workers.
+        """
+        urls = rows_df[self._url_column]
+        # Scraper entries hold page text such as "1.2M" and no title, so only API results are reused
+        cached_results = self._cache.get_many(urls, 'api') if self._cache is not None else {}
+        blocked_urls = self._negative_cache.blocked(urls) if self._negative_cache is not None else {}
+        known_ids = self._known_channel_ids(urls)
         
-        for index, row in batch_df.iterrows():
-            url = row[self._url_column]
-            channel_id = self._validator._extract_channel_id(url)
+        pending = []
+        for index, url in urls.items():
+            if url in cached_results:
+                self._buffer[index] = self._from_channel_info(cached_results[url])
+                continue
+            if url in blocked_urls:
+                self._buffer[index] = {'error': blocked_urls[url].error_message, 'is_valid': False}
+                continue
+            
+            channel_id = known_ids.get(url) or (self._validator._extract_channel_id(url) if isinstance(url, str) else None)
             
             if not channel_id:
-                self._df.loc[index, 'error'] = 'Invalid URL format'
-                self._df.loc[index, 'is_valid'] = False
+                self._buffer[index] = {'error': 'Invalid URL format', 'is_valid': False}
                 logging.warning(f"Invalid URL format: {url}")
+                if self._negative_cache is not None and isinstance(url, str):
+                    self._negative_buffer[url] = 'Invalid URL format'
                 continue
-            
-            logging.debug(f"Creating task for channel ID: {channel_id}")
-            task = asyncio.create_task(
-                self._validator.get_channel_info_async(channel_id)
-            )
-            tasks.append((index, task))
-        
-        logging.info(f"Created {len(tasks)} tasks, waiting for completion...")
+            pending.append((index, url, channel_id))
+        return pending
+
+    def _record_result(self, index: Any, url: str, result: Dict[str, Any]) -> None:
+        """Buffer one API result and its cache updates until the next flush."""
+        if result.get('error'):
+            logging.warning(f"Error for channel at index {index}: {result['error']}")
+        self._buffer[index] = {key: value for key, value in result.items() if key in API_RESULT_COLUMNS}
         
-        for index, task in tasks:
+        if self._cache is not None and self._is_cacheable(result):
+            self._cache_buffer[url] = self._to_channel_info(url, result)
+        if self._negative_cache is not None:
+            if result.get('is_valid'):
+                self._negative_buffer[url] = None
+            elif result.get('error'):
+                self._negative_buffer[url] = result['error']
+
+    def _flush(self) -> None:
+        """Apply and journal buffered results, then snapshot the CSV if one is due."""
+        buffer, self._buffer = self._buffer, {}
+        cache_buffer, self._cache_buffer = self._cache_buffer, {}
+        negative_buffer, self._negative_buffer = self._negative_buffer, {}
+        self._apply_results(buffer)
+        if cache_buffer:
+            self._cache.put_many(cache_buffer, 'api')
+        if negative_buffer:
+            self._negative_cache.record_many(negative_buffer)
+        self._last_flush = time.monotonic()
+        self._processed += len(buffer)
+        logging.info(f"Progress: {self._processed}/{self._planned} channels processed")
+        self._maybe_snapshot()
+
+    async def _worker(self, queue: asyncio.Queue, stop: asyncio.Event) -> None:
+        """Take work items until the queue is empty or quota runs out."""
+        while not stop.is_set():
             try:
-                result = await task
-                logging.debug(f"Processed channel at index {index}")
-                
-                if 'error' in result and result['error']:
-                    logging.warning(f"Error for channel at index {index}: {result['error']}")
-                
-                for key, value in result.items():
-                    if key in self._df.columns:
-                        self._df.loc[index, key] = value
+                index, url, identifier = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await self._validator.get_channel_info_async(identifier)
+                self._record_result(index, url, result)
+            except QuotaExhausted as e:
+                # Leave the row unprocessed so the next run picks it up
+                if not stop.is_set():
+                    logging.warning(f"Stopping cleanly, progress saved: {str(e)}")
+                stop.set()
             except Exception as e:
                 error_msg = str(e)
                 logging.error(f"Error processing channel at index {index}: {error_msg}")
-                self._df.loc[index, 'error'] = error_msg
-                self._df.loc[index, 'is_valid'] = False
+                self._buffer[index] = {'error': error_msg, 'is_valid': False}
+            
+            if len(self._buffer) >= self._flush_rows or time.monotonic() - self._last_flush >= self._flush_interval:
+                self._flush()
 
     async def process_async(self) -> None:
         """Process the CSV file asynchronously."""
@@ -292,66 +568,109 @@ class YoutubeCSVValidator:
         
         if remaining_channels == 0:
             logging.info("All channels have been processed. Nothing to do.")
+            self.merge_results()
             return
         
-        # Calculate safe batch size based on remaining quota
-        remaining_quota = self._validator._daily_quota - self._validator._quota_used
-        estimated_cost_per_channel = 150  # Worst case: search + channel.list
-        safe_batch_size = min(20, remaining_quota // estimated_cost_per_channel)
-        
-        if safe_batch_size == 0:
+        # Run the cheapest rows first and defer what today's remaining quota cannot cover
+        remaining_quota = self._validator.key_pool.remaining()
+        known_ids = self._known_channel_ids(remaining_df[self._url_column])
+        costs = {
+            index: self._validator.estimate_cost(known_ids.get(url) or self._validator._extract_channel_id(url))
+            if isinstance(url, str) else 0.0
+            for index, url in remaining_df[self._url_column].items()
+        }
+        planned, deferred = plan_by_cost(costs, costs.get, remaining_quota)
+        logging.info(f"Quota remaining today: {remaining_quota} units, "
+                     f"planned {len(planned)} rows (~{sum(costs[i] for i in planned):.0f} units)")
+        if deferred:
+            logging.warning(f"Deferring {len(deferred)} rows that do not fit in today's quota")
+        if not planned:
             logging.warning("Insufficient quota remaining for processing")
+            self.merge_results()
             return
-            
-        batch_size = safe_batch_size
-        total_batches = (remaining_channels + batch_size - 1) // batch_size
         
-        for batch_num, start_idx in enumerate(range(0, len(remaining_df), batch_size)):
-            batch_df = remaining_df.iloc[start_idx:start_idx + batch_size]
-            logging.info(f"Processing batch {batch_num + 1}/{total_batches}")
-            
-            try:
-                await self._process_batch(batch_df)
-                
-                # Save progress after each batch
-                self._df.to_csv(self._input_file, index=False)
-                processed_count = min(start_idx + batch_size, remaining_channels)
-                logging.info(f"Progress: {processed_count}/{remaining_channels} channels processed")
-                
-                # Add a small delay between batches to prevent overwhelming
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                logging.error(f"Error processing batch {batch_num + 1}: {str(e)}")
-                # Save progress even if batch fails
-                self._df.to_csv(self._input_file, index=False)
-                # Continue with next batch instead of failing completely
-                continue
+        self._planned = len(planned)
+        self._processed = 0
+        self._last_flush = time.monotonic()
+        
+        # A fixed pool of workers keeps up to `concurrency` rows in flight; a slow
+        # call only occupies its own slot, and the shared rate limiter paces them all
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self._prepare_rows(self._df.loc[planned]):
+            queue.put_nowait(item)
+        logging.info(f"{queue.qsize()} channels need the API, running {self._concurrency} workers")
+        
+        stop = asyncio.Event()
+        try:
+            await asyncio.gather(*(self._worker(queue, stop) for _ in range(min(self._concurrency, queue.qsize()))))
+        finally:
+            self._flush()
+            self.merge_results()
         
         logging.info("Processing completed")
 
+    async def _process_and_close(self) -> None:
+        try:
+            await self.process_async()
+        finally:
+            for key in self._validator.key_pool.status():
+                logging.info(f"API key {key['key_id']}: {key['requests']} requests, "
+                             f"{key['remaining']} units left, error rate {key['error_rate']}")
+            await self._validator.close()
+
     def process(self) -> None:
         """Synchronous wrapper for async processing."""
-        asyncio.run(self.process_async())
+        asyncio.run(self._process_and_close())
 
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(description='Validate YouTube channel URLs using YouTube API')
     parser.add_argument('--input_file', required=True, help='Path to input CSV file')
     parser.add_argument('--url_column', required=True, help='Name of column containing YouTube URLs')
-    parser.add_argument('--api_key', required=True, help='YouTube Data API key')
+    parser.add_argument('--api_key', required=True, help='YouTube Data API key, or several comma-separated keys to rotate between')
     parser.add_argument('--limit', type=int, help='Maximum number of URLs to process')
+    parser.add_argument('--cache_file', default=str(DEFAULT_CACHE_FILE), help='Path to the shared channel cache')
+    parser.add_argument('--no_cache', action='store_true', help='Query the API for every URL')
+    parser.add_argument('--valid_ttl_hours', type=float, default=168, help='Hours a valid cached result stays fresh (default: 168)')
+    parser.add_argument('--invalid_ttl_hours', type=float, default=24, help='Hours an invalid cached result stays fresh (default: 24)')
+    parser.add_argument('--negative_cache_file', default=str(DEFAULT_NEGATIVE_CACHE_FILE), help='Path to the store of failed URLs')
+    parser.add_argument('--no_negative_cache', action='store_true', help='Re-check URLs that failed recently')
+    parser.add_argument('--api_endpoint', help='Override the API base URL (e.g. a local stand-in)')
+    parser.add_argument('--daily_quota', type=int, default=DEFAULT_DAILY_QUOTA, help=f'Daily quota units per key (default: {DEFAULT_DAILY_QUOTA})')
+    parser.add_argument('--handle_map_file', default=str(DEFAULT_HANDLE_MAP_FILE), help='Path to the persistent handle -> channel ID map')
+    parser.add_argument('--concurrency', type=int, default=500, help='Rows kept in flight (default: 500)')
+    parser.add_argument('--snapshot_minutes', type=float, default=5, help='Minutes between merges of journaled results into the CSV (default: 5)')
+    parser.add_argument('--merge_only', action='store_true', help='Only merge journaled results into the CSV file')
+    parser.add_argument('--quota_ledger_file', default=str(DEFAULT_QUOTA_LEDGER_FILE), help='Path to the shared quota ledger')
     
     args = parser.parse_args()
     
     try:
+        negative_cache = None if args.no_negative_cache else NegativeCache(args.negative_cache_file)
+        cache = None
+        if not args.no_cache:
+            cache = ChannelCache(
+                args.cache_file,
+                valid_ttl=args.valid_ttl_hours * 3600,
+                invalid_ttl=args.invalid_ttl_hours * 3600
+            )
         validator = YoutubeCSVValidator(
             input_file=args.input_file,
             url_column=args.url_column,
             api_key=args.api_key,
-            limit=args.limit
+            limit=args.limit,
+            cache=cache,
+            negative_cache=negative_cache,
+            api_endpoint=args.api_endpoint,
+            key_pool=ApiKeyPool(parse_api_keys(args.api_key), args.daily_quota, args.quota_ledger_file),
+            handle_map=HandleMap(args.handle_map_file),
+            snapshot_interval=args.snapshot_minutes * 60,
+            concurrency=args.concurrency
         )
-        validator.process()
+        if args.merge_only:
+            validator.merge_results()
+        else:
+            validator.process()
     except Exception as e:
         logging.error(f"Main process failed: {str(e)}")
         sys.exit(1)
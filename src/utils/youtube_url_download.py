@@ -21,6 +21,9 @@ python youtube_url_download.py --url /Users/yuanlu/Code/youtube-top-10000-channe
 
 # Specify custom output directory
 python youtube_url_download.py --url https://www.youtube.com/@lidangzzz/videos --output-dir /Users/yuanlu/Code/youtube-top-10000-channels/data/source_code
+
+# Also retry URLs that failed recently (404s, dead channels) instead of skipping them
+python youtube_url_download.py --url urls.csv --from-csv --no-negative-cache
 """
 
 import requests
@@ -31,23 +34,35 @@ import pandas as pd
 from datetime import datetime
 import time
 import random
+from negative_cache import NegativeCache, DEFAULT_NEGATIVE_CACHE_FILE
+from shared_rate_limiter import SharedRateLimiter, configure_bucket
 
 
-def download_html(url: str, delay_range: tuple = (1, 2)) -> Optional[str]:
+def download_html(url: str, delay_range: tuple = (1, 2),
+                  negative_cache: Optional[NegativeCache] = None,
+                  rate_limiter: Optional[SharedRateLimiter] = None) -> Optional[str]:
     """
     Download HTML content from the given URL with rate limiting.
     
     Args:
         url (str): The URL to download HTML from
         delay_range (tuple): Range of seconds to wait between requests (min, max)
+        negative_cache (Optional[NegativeCache]): Failed URLs to skip until their re-check is due
+        rate_limiter (Optional[SharedRateLimiter]): Token bucket shared with other fetching processes
         
     Returns:
-        Optional[str]: HTML content if successful, None if failed
+        Optional[str]: HTML content if successful, None if failed or skipped
     """
+    if negative_cache is not None and (entry := negative_cache.get(url)):
+        print(f"Skipping {url}: {entry.error_message} ({entry.classification}, failed {entry.failures}x)")
+        return None
+
     try:
         # Random delay before request
         delay = random.uniform(*delay_range)
         time.sleep(delay)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
         
         # Add headers to mimic a browser request
         headers = {
@@ -64,12 +79,20 @@ def download_html(url: str, delay_range: tuple = (1, 2)) -> Optional[str]:
         if 'Retry-After' in response.headers:
             retry_after = int(response.headers['Retry-After'])
             time.sleep(retry_after)
-            
+        
+        if negative_cache is not None:
+            negative_cache.record_success(url)
         return response.text
         
     except requests.RequestException as e:
         print(f"Error downloading URL: {e}")
         
+        if negative_cache is not None:
+            if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+                negative_cache.record_failure(url, f"HTTP {e.response.status_code}")
+            else:
+                negative_cache.record_failure(url, str(e))
+        
         # Handle rate limiting errors specifically
         if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 429:
             retry_after = int(e.response.headers.get('Retry-After', 60))
@@ -115,8 +138,15 @@ def main():
     parser.add_argument('--column', type=str, help='Specify the column name in CSV file containing URLs')
     parser.add_argument('--min-delay', type=float, default=1, help='Minimum delay between requests in seconds')
     parser.add_argument('--max-delay', type=float, default=3, help='Maximum delay between requests in seconds')
+    parser.add_argument('--negative-cache-file', type=str, default=str(DEFAULT_NEGATIVE_CACHE_FILE), help='Path to the store of failed URLs')
+    parser.add_argument('--no-negative-cache', action='store_true', help='Download URLs that failed recently')
+    parser.add_argument('--rate', type=float, help="Set the requests/s of the 'youtube_web' bucket, shared by all processes")
     
     args = parser.parse_args()
+    if args.rate:
+        configure_bucket('youtube_web', rate=args.rate)
+    negative_cache = None if args.no_negative_cache else NegativeCache(args.negative_cache_file)
+    rate_limiter = SharedRateLimiter('youtube_web')
     
     if args.from_csv:
         try:
@@ -149,7 +179,7 @@ def main():
                 print(f"\nProcessing domain: {domain} ({len(domain_url_list)} URLs)")
                 for i, url in enumerate(domain_url_list, 1):
                     print(f"Downloading {i}/{len(domain_url_list)}: {url}")
-                    html_content = download_html(url, delay_range=(args.min_delay, args.max_delay))
+                    html_content = download_html(url, delay_range=(args.min_delay, args.max_delay), negative_cache=negative_cache, rate_limiter=rate_limiter)
                     if html_content:
                         filepath = save_html(html_content, url, args.output_dir)
                         print(f"Saved to {filepath}")
@@ -165,7 +195,7 @@ def main():
             return
             
     else:
-        html_content = download_html(args.url, delay_range=(args.min_delay, args.max_delay))
+        html_content = download_html(args.url, delay_range=(args.min_delay, args.max_delay), negative_cache=negative_cache, rate_limiter=rate_limiter)
         if html_content:
             filepath = save_html(html_content, args.url, args.output_dir)
             print(f"HTML content saved to {filepath}")
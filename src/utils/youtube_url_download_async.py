@@ -21,6 +21,9 @@ python youtube_url_download_async.py --url /Users/yuanlu/Desktop/video_id.csv --
 
 # Specify custom output directory
 python youtube_url_download_async.py --url https://www.youtube.com/@lidangzzz/videos --output-dir data/source_code
+
+# Also retry URLs that failed recently (404s, dead channels) instead of skipping them
+python youtube_url_download_async.py --url urls.csv --from-csv --no-negative-cache
 """
 
 import aiohttp
@@ -39,6 +42,8 @@ from aiohttp_retry import RetryClient, ExponentialRetry
 from asyncio import Semaphore
 from tqdm import tqdm
 from collections import defaultdict
+from negative_cache import NegativeCache, DEFAULT_NEGATIVE_CACHE_FILE
+from shared_rate_limiter import SharedRateLimiter, configure_bucket
 
 class AsyncYouTubeDownloader:
     def __init__(self, 
@@ -46,8 +51,13 @@ class AsyncYouTubeDownloader:
                  min_delay: float = 0.02,
                  max_delay: float = 0.05,
                  output_dir: str = "output_dir",
-                 timeout: int = 30):
+                 timeout: int = 30,
+                 negative_cache: Optional[NegativeCache] = None,
+                 rate_limiter: Optional[SharedRateLimiter] = None):
         self.concurrency = concurrency
+        self.negative_cache = negative_cache
+        # Aggregate rate shared with other validator/downloader processes
+        self.rate_limiter = rate_limiter
         self.min_delay = min_delay
         self.max_delay = max_delay
         self.output_dir = output_dir
@@ -192,6 +202,13 @@ class AsyncYouTubeDownloader:
         pbar = tqdm(total=len(urls), desc="Downloading", unit="channel")
         results = {}
         
+        # Skip URLs that failed recently and are not yet due for a re-check
+        blocked_urls = {}
+        if self.negative_cache is not None:
+            blocked_urls = self.negative_cache.blocked(url for url in urls if url not in self.completed_urls)
+            if blocked_urls:
+                self.logger.info(f"Skipping {len(blocked_urls)} URLs that failed recently")
+        
         # Group URLs by domain to handle rate limiting per domain
         domain_urls = self._group_urls_by_domain(urls)
         
@@ -206,6 +223,10 @@ class AsyncYouTubeDownloader:
                         domain_results.append((url, True))
                         pbar.update(1)
                         continue
+                    if url in blocked_urls:
+                        domain_results.append((url, False))
+                        pbar.update(1)
+                        continue
                         
                     try:
                         success = await self.process_url(url, retry_client)
@@ -260,10 +281,16 @@ class AsyncYouTubeDownloader:
             ])
         }
         
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        
         try:
             async with session.get(url, headers=headers) as response:
                 if response.status == 200:
-                    return await response.text()
+                    html_content = await response.text()
+                    if self.negative_cache is not None:
+                        self.negative_cache.record_success(url)
+                    return html_content
                 elif response.status == 429:
                     wait_time = int(response.headers.get('Retry-After', 60))
                     self.logger.warning(f"Rate limited on {domain}. Waiting {wait_time}s...")
@@ -271,10 +298,14 @@ class AsyncYouTubeDownloader:
                     return await self.download_html(url, session)
                 else:
                     self.logger.warning(f"Unexpected status {response.status} for {url}")
+                    if self.negative_cache is not None:
+                        self.negative_cache.record_failure(url, f"HTTP {response.status}")
                     return None
                     
         except Exception as e:
             self.logger.error(f"Download error for {url}: {e}")
+            if self.negative_cache is not None:
+                self.negative_cache.record_failure(url, str(e))
             return None
 
     def _group_urls_by_domain(self, urls: List[str]) -> Dict[str, List[str]]:
@@ -369,15 +400,22 @@ async def main():
     parser.add_argument('--max-delay', type=float, default=0.2, help='Maximum delay between requests to same domain')
     parser.add_argument('--concurrency', type=int, default=100, help='Maximum number of concurrent downloads')
     parser.add_argument('--timeout', type=int, default=30, help='Request timeout in seconds')
+    parser.add_argument('--negative-cache-file', type=str, default=str(DEFAULT_NEGATIVE_CACHE_FILE), help='Path to the store of failed URLs')
+    parser.add_argument('--no-negative-cache', action='store_true', help='Download URLs that failed recently')
+    parser.add_argument('--rate', type=float, help="Set the requests/s of the 'youtube_web' bucket, shared by all processes")
     
     args = parser.parse_args()
+    if args.rate:
+        configure_bucket('youtube_web', rate=args.rate)
     
     downloader = AsyncYouTubeDownloader(
         concurrency=args.concurrency,
         min_delay=args.min_delay,
         max_delay=args.max_delay,
         output_dir=args.output_dir,
-        timeout=args.timeout
+        timeout=args.timeout,
+        negative_cache=None if args.no_negative_cache else NegativeCache(args.negative_cache_file),
+        rate_limiter=SharedRateLimiter('youtube_web')
     )
     
     if args.from_csv:
@@ -10,7 +10,6 @@ Example:
 import requests
 import re
 import logging
-from urllib.parse import urlparse
 import argparse
 from typing import Optional
 from dataclasses import dataclass
@@ -18,6 +17,8 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import sys
 
+from channel_url import with_scheme
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,12 +39,22 @@ class ChannelInfo:
     handle: Optional[str] = None
     subscribers: Optional[str] = None
     error_message: Optional[str] = None
+    channel_title: Optional[str] = None
 
 class YouTubeValidator:
     """Handles YouTube channel URL validation and information extraction"""
     
-    def __init__(self, max_retries: int = 3, timeout: int = 10):
+    def __init__(self, max_retries: int = 3, timeout: int = 10, cache=None, negative_cache=None):
+        """
+        Args:
+            max_retries (int): Retries for failed or throttled requests
+            timeout (int): Request timeout in seconds
+            cache (Optional[ChannelCache]): Shared result cache consulted before fetching
+            negative_cache (Optional[NegativeCache]): Failed URLs to skip until their re-check is due
+        """
         self.session = self._create_session(max_retries, timeout)
+        self.cache = cache
+        self.negative_cache = negative_cache
         self._compile_patterns()
 
     def _create_session(self, max_retries: int, timeout: int) -> requests.Session:
@@ -65,94 +76,124 @@ class YouTubeValidator:
         return session
 
     def _compile_patterns(self):
-        """Compile regex patterns for better performance"""
-        self.channel_id_patterns = [
-            re.compile(pattern) for pattern in [
-                r'"channelId":"([^"]+)"',
-                r'"externalChannelId":"([^"]+)"',
-                r'"ucid":"([^"]+)"',
-                r'channel/([^/"]+)',
-            ]
-        ]
-        self.handle_patterns = [
-            re.compile(pattern) for pattern in [
-                r'"channelHandle":"(@[^"]+)"',
-                r'"vanityChannelUrl":"http://www.youtube.com/(@[^"]+)"',
-                r'youtube\.com/(@[^"\s/]+)',
-            ]
-        ]
-        self.subscriber_patterns = [
-            re.compile(pattern, re.IGNORECASE) for pattern in [
-                r'"metadataParts":\[{"text":{"content":"([^"]+?\s*subscribers?)"}}\]',
-                r'"text":{"content":"([^"]+?\s*subscribers?)"}',
-                r'subscribers"[^>]*?>([^<]+?)\s*(?:subscriber|subscribers)',
-            ]
-        ]
-
-    def validate_url(self, url: str) -> ChannelInfo:
-        """Validate a YouTube channel URL and extract information"""
+        """Compile regex patterns for better performance.
+
+        Patterns are listed per field in priority order. Each case-sensitive
+        pattern is paired with the literal its matches must start with, so
+        str.find can jump to the first candidate instead of stepping the regex
+        engine through the whole page. The case-insensitive subscriber patterns
+        all start on a '"', which the regex engine already skips to quickly.
+        """
+        self.field_patterns = {
+            'channel_id': [
+                ('"channelId":"', re.compile(r'"channelId":"([^"]+)"')),
+                ('"externalChannelId":"', re.compile(r'"externalChannelId":"([^"]+)"')),
+                ('"ucid":"', re.compile(r'"ucid":"([^"]+)"')),
+                ('channel/', re.compile(r'channel/([^/"]+)')),
+            ],
+            'handle': [
+                ('"channelHandle":"', re.compile(r'"channelHandle":"(@[^"]+)"')),
+                ('"vanityChannelUrl":"http', re.compile(r'"vanityChannelUrl":"http://www.youtube.com/(@[^"]+)"')),
+                ('youtube.com/@', re.compile(r'youtube\.com/(@[^"\s/]+)')),
+            ],
+            'subscribers': [
+                (None, re.compile(r'"metadataParts":\[{"text":{"content":"([^"]+?\s*subscribers?)"}}\]', re.IGNORECASE)),
+                (None, re.compile(r'"text":{"content":"([^"]+?\s*subscribers?)"}', re.IGNORECASE)),
+                # Equivalent to subscribers"[^>]*?>..., anchored on the closing quote
+                (None, re.compile(r'"(?<=subscribers")[^>]*?>([^<]+?)\s*(?:subscriber|subscribers)', re.IGNORECASE)),
+            ],
+        }
+        self.subscriber_suffix = re.compile(r'\s*subscribers?\s*$', re.IGNORECASE)
+
+    def validate_url(self, url: str, lookup_caches: bool = True) -> ChannelInfo:
+        """
+        Validate a YouTube channel URL and extract information.
+
+        Args:
+            url (str): Channel URL as given in the input
+            lookup_caches (bool): Check the caches before fetching; pass False when the caller
+                already looked url up in both, so a miss is not counted twice
+
+        Returns:
+            ChannelInfo: Result whose url is the requested URL with its scheme, hit or miss
+        """
+        requested_url = url
+        if lookup_caches:
+            if self.cache is not None and (cached := self.cache.get(requested_url, 'scraper')):
+                return cached
+            if self.negative_cache is not None and (entry := self.negative_cache.get(requested_url)):
+                return ChannelInfo(url=with_scheme(url), is_valid=False, error_message=entry.error_message)
+
         try:
-            # Clean URL
-            parsed_url = urlparse(url)
-            if not parsed_url.scheme:
-                url = 'https://' + url
-            
-            if not any(domain in url.lower() for domain in ['youtube.com', 'youtu.be']):
-                return ChannelInfo(url=url, is_valid=False, error_message="Not a YouTube URL")
-
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code != 200:
-                return ChannelInfo(
-                    url=url,
-                    is_valid=False,
-                    error_message=f"HTTP {response.status_code}"
-                )
-
-            # Extract information
-            channel_info = self._extract_channel_info(response.text)
-            
-            if not channel_info.get('channel_id'):
-                return ChannelInfo(
-                    url=url,
-                    is_valid=False,
-                    error_message="Could not extract channel information"
-                )
+            result = self._fetch_channel_info(url)
+        except Exception as e:
+            # Request failures are not cached so the URL is retried next time
+            logger.error(f"Error processing {url}: {str(e)}")
+            if self.negative_cache is not None:
+                self.negative_cache.record_failure(requested_url, str(e))
+            return ChannelInfo(url=with_scheme(url), is_valid=False, error_message=str(e))
+
+        if self.cache is not None:
+            self.cache.put(requested_url, result, 'scraper')
+        if self.negative_cache is not None:
+            if result.is_valid:
+                self.negative_cache.record_success(requested_url)
+            else:
+                self.negative_cache.record_failure(requested_url, result.error_message)
+        return result
+
+    def _fetch_channel_info(self, url: str) -> ChannelInfo:
+        """Fetch a channel page and extract its information"""
+        # Clean URL
+        url = with_scheme(url)
+        
+        if not any(domain in url.lower() for domain in ['youtube.com', 'youtu.be']):
+            return ChannelInfo(url=url, is_valid=False, error_message="Not a YouTube URL")
 
+        response = self.session.get(url, timeout=10)
+        
+        if response.status_code != 200:
             return ChannelInfo(
                 url=url,
-                is_valid=True,
-                channel_id=channel_info.get('channel_id'),
-                handle=channel_info.get('handle'),
-                subscribers=channel_info.get('subscribers')
+                is_valid=False,
+                error_message=f"HTTP {response.status_code}"
             )
 
-        except Exception as e:
-            logger.error(f"Error processing {url}: {str(e)}")
-            return ChannelInfo(url=url, is_valid=False, error_message=str(e))
+        # Extract information
+        channel_info = self._extract_channel_info(response.text)
+        
+        if not channel_info.get('channel_id'):
+            return ChannelInfo(
+                url=url,
+                is_valid=False,
+                error_message="Could not extract channel information"
+            )
+
+        return ChannelInfo(
+            url=url,
+            is_valid=True,
+            channel_id=channel_info.get('channel_id'),
+            handle=channel_info.get('handle'),
+            subscribers=channel_info.get('subscribers')
+        )
 
     def _extract_channel_info(self, html_content: str) -> dict[str, Optional[str]]:
         """Extract channel information from HTML content"""
         info = {}
-        
-        # Extract channel ID
-        for pattern in self.channel_id_patterns:
-            if match := pattern.search(html_content):
-                info['channel_id'] = match.group(1)
-                break
-
-        # Extract handle
-        for pattern in self.handle_patterns:
-            if match := pattern.search(html_content):
-                info['handle'] = match.group(1)
-                break
-
-        # Extract subscribers
-        for pattern in self.subscriber_patterns:
-            if match := pattern.search(html_content):
-                subscriber_count = match.group(1).strip()
-                info['subscribers'] = re.sub(r'\s*subscribers?\s*$', '', subscriber_count, flags=re.IGNORECASE)
-                break
+
+        for field, patterns in self.field_patterns.items():
+            for anchor, pattern in patterns:
+                start = 0
+                if anchor is not None:
+                    start = html_content.find(anchor)
+                    if start == -1:
+                        continue
+                if match := pattern.search(html_content, start):
+                    info[field] = match.group(1)
+                    break
+
+        if 'subscribers' in info:
+            info['subscribers'] = self.subscriber_suffix.sub('', info['subscribers'].strip())
 
         return info
 
@@ -2,103 +2,183 @@
 Very easy to hit the API limit. Need to find a way to handle this.  
 '''
 
-from googleapiclient.discovery import build
+import asyncio
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-import sqlite3
-from datetime import datetime
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'utils'))
+from youtube_api_async import AsyncYouTubeClient
+from quota_ledger import QuotaExhausted, ENDPOINT_COSTS, DEFAULT_DAILY_QUOTA, plan_by_cost
+from api_key_pool import ApiKeyPool, parse_api_keys
+from search_cache import SearchCache
+import stats_db
+import growth_analytics
+import history_retention
+import refresh_scheduler
+import daily_snapshot
 
 # Load environment variables
 load_dotenv()
 
 # Get API key from environment variable
 API_KEY = os.getenv('YOUTUBE_API_KEY')
+# Optional comma-separated list of project keys to rotate between
+API_KEYS = parse_api_keys(os.getenv('YOUTUBE_API_KEYS') or API_KEY)
+# Hours a cached search page is reused before the query is searched again
+SEARCH_CACHE_TTL_HOURS = float(os.getenv('SEARCH_CACHE_TTL_HOURS', '168'))
+# Result pages (50 channels, 100 units each) followed per query
+SEARCH_PAGE_DEPTH = int(os.getenv('SEARCH_PAGE_DEPTH', '1'))
 
 def init_database():
-    conn = sqlite3.connect('youtube_stats.db')
-    cursor = conn.cursor()
-    
-    # Create channels table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS channels (
-            channel_id TEXT PRIMARY KEY,
-            name TEXT,
-            url TEXT,
-            last_updated TIMESTAMP
-        )
-    ''')
-    
-    # Create subscriber history table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS subscriber_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            channel_id TEXT,
-            subscriber_count INTEGER,
-            fetch_date TIMESTAMP,
-            FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
-        )
-    ''')
-    
-    # Create index for faster queries
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_channel_date 
-        ON subscriber_history (channel_id, fetch_date)
-    ''')
-    
-    conn.commit()
-    return conn
+    # Creates the tables, or migrates a database written by older versions
+    return stats_db.connect('youtube_stats.db')
 
-def search_channels(youtube, query):
-    channels = []
+# Searches kept in flight at once
+SEARCH_CONCURRENCY = 10
+
+# Parameters of every discovery search; part of the cache key
+SEARCH_PARAMS = {
+    'part': 'snippet',
+    'type': 'channel',
+    'maxResults': 50,  # Maximum allowed by API
+    'fields': 'nextPageToken,items(snippet(channelId))'
+}
+
+async def search_channel_ids(client, cache, query, max_pages=1):
+    """
+    Return the channel IDs found by one query, following nextPageToken for up
+    to max_pages pages. Fresh cached pages are reused; others cost 100 units each.
+    """
+    channel_ids = []
+    page_token = None
     try:
-        # Search for channels with the given query
-        request = youtube.search().list(
-            part='snippet',
-            q=query,
-            type='channel',
-            maxResults=50  # Maximum allowed by API
-        )
-        
-        response = request.execute()
-        
-        # Get channel IDs from search results
-        channel_ids = [item['snippet']['channelId'] for item in response['items']]
-        
-        # Get detailed channel information in batches
-        for i in range(0, len(channel_ids), 50):
-            batch = channel_ids[i:i+50]
-            channel_response = youtube.channels().list(
-                part='statistics,snippet',
-                id=','.join(batch)
-            ).execute()
-            
-            for channel in channel_response['items']:
-                # Some channels might hide their subscriber count
-                if 'subscriberCount' in channel['statistics']:
-                    channels.append({
-                        'channel_id': channel['id'],
-                        'name': channel['snippet']['title'],
-                        'subscribers': int(channel['statistics']['subscriberCount']),
-                        'url': f"https://youtube.com/channel/{channel['id']}"
-                    })
-    
+        for _ in range(max_pages):
+            response = cache.get(query, SEARCH_PARAMS, page_token)
+            if response is None:
+                # Search for channels with the given query
+                response = await client.search_list(
+                    q=query,
+                    type=SEARCH_PARAMS['type'],
+                    max_results=SEARCH_PARAMS['maxResults'],
+                    page_token=page_token,
+                    part=SEARCH_PARAMS['part'],
+                    fields=SEARCH_PARAMS['fields']
+                )
+                cache.put(query, SEARCH_PARAMS, page_token, response)
+            channel_ids.extend(item['snippet']['channelId'] for item in response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+    except QuotaExhausted:
+        raise
     except Exception as e:
         print(f"Error searching for '{query}': {str(e)}")
-    
-    return channels
+    return channel_ids
+
+async def fetch_channels(client, channel_ids):
+    """Fetch statistics for channel IDs in full channels.list batches of 50 (1 unit each)."""
+    async def fetch_batch(batch):
+        channel_response = await client.channels_list(ids=batch, fields='items(id,snippet(title),statistics(subscriberCount,viewCount))')
+        channels = []
+        for channel in channel_response.get('items', []):
+            # Some channels might hide their subscriber count
+            if 'subscriberCount' in channel.get('statistics', {}):
+                channels.append({
+                    'channel_id': channel['id'],
+                    'name': channel['snippet']['title'],
+                    'subscribers': int(channel['statistics']['subscriberCount']),
+                    'views': int(channel['statistics']['viewCount']) if 'viewCount' in channel['statistics'] else None,
+                    'url': f"https://youtube.com/channel/{channel['id']}"
+                })
+        return channels
+
+    batches = [channel_ids[i:i + 50] for i in range(0, len(channel_ids), 50)]
+    results = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+
+    all_channels = []
+    for result in results:
+        if isinstance(result, QuotaExhausted):
+            print(f"Statistics incomplete: {str(result)}")
+        elif isinstance(result, Exception):
+            print(f"Error fetching channel statistics: {str(result)}")
+        else:
+            all_channels.extend(result)
+    return all_channels, len(batches)
+
+async def collect_channels(queries):
+    """
+    Run the channel searches concurrently within today's quota, then fetch
+    statistics once for the deduplicated union of the channel IDs found.
+    """
+    key_pool = ApiKeyPool(API_KEYS)
+    cache = SearchCache(ttl=SEARCH_CACHE_TTL_HOURS * 3600)
+
+    def query_cost(query):
+        # Uncached pages, plus at most one channels.list per page of 50 results
+        uncached = SEARCH_PAGE_DEPTH - cache.cached_pages(query, SEARCH_PARAMS, SEARCH_PAGE_DEPTH)
+        return uncached * ENDPOINT_COSTS['search.list'] + SEARCH_PAGE_DEPTH * ENDPOINT_COSTS['channels.list']
+
+    planned, deferred = plan_by_cost(queries, query_cost, key_pool.remaining())
+    if deferred:
+        print(f"Quota left for {len(planned)} of {len(queries)} queries; skipping {len(deferred)}")
+
+    semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+    quota_hit = asyncio.Event()
+
+    async def run_search(query):
+        async with semaphore:
+            if quota_hit.is_set():
+                return []
+            print(f"Searching for channels related to '{query}'...")
+            try:
+                return await search_channel_ids(client, cache, query, SEARCH_PAGE_DEPTH)
+            except QuotaExhausted as e:
+                # Keep what was collected so far; it is saved below
+                if not quota_hit.is_set():
+                    print(f"Stopping searches: {str(e)}")
+                quota_hit.set()
+                return []
+
+    async with AsyncYouTubeClient(None, key_pool=key_pool) as client:
+        search_results = await asyncio.gather(*(run_search(query) for query in planned))
+        # Union in first-seen order; channels found by several queries are fetched once
+        channel_ids = list(dict.fromkeys(channel_id for ids in search_results for channel_id in ids))
+        found = sum(len(ids) for ids in search_results)
+        all_channels, requests = await fetch_channels(client, channel_ids)
+
+    print(f"{found} search results, {len(channel_ids)} unique channels, {requests} channels.list requests")
+    print(f"Search cache: {cache.hits} pages reused, {cache.misses} searched")
+    cache.close()
+    key_pool.close()
+    return all_channels
+
+# Share of the daily quota the refresh schedule is planned for; the rest is left for searches
+REFRESH_QUOTA_SHARE = 0.8
+
+async def refresh_stale_channels(conn):
+    """Refresh known channels that are due under the tiered schedule, within the refresh share of the quota."""
+    key_pool = ApiKeyPool(API_KEYS)
+    refresh_share = len(API_KEYS) * DEFAULT_DAILY_QUOTA * REFRESH_QUOTA_SHARE
+    plan = refresh_scheduler.sync(conn, refresh_share)
+    if plan['stretch'] > 1:
+        print(f"Refresh intervals stretched x{plan['stretch']} to fit the daily quota")
+    # Units already spent today (searches and earlier refreshes) count against the share,
+    # so the rest of the quota stays free for searches
+    budget = max(0, min(key_pool.remaining(), int(refresh_share) - key_pool.used()))
+    async with AsyncYouTubeClient(None, key_pool=key_pool) as client:
+        refreshed, requests = await refresh_scheduler.refresh_due(conn, client, budget)
+    print(f"Refreshed {refreshed} stale channels with {requests} channels.list requests")
+    key_pool.close()
 
 def get_top_channels():
     # Initialize database
     conn = init_database()
-    cursor = conn.cursor()
-    current_time = datetime.now()
-    
-    # Create YouTube API client
-    youtube = build('youtube', 'v3', developerKey=API_KEY)
+    current_time = int(time.time())
     
     try:
-        all_channels = []
-        
         # Search queries targeting high-subscriber channels
         search_queries = [
             # Music Channels and Record Labels
@@ -197,80 +277,30 @@ def get_top_channels():
         ]
         
         # Collect channels from all searches
-        for query in search_queries:
-            print(f"Searching for channels related to '{query}'...")
-            channels = search_channels(youtube, query)
-            all_channels.extend(channels)
+        all_channels = asyncio.run(collect_channels(search_queries))
         
         # Remove duplicates based on channel_id
         unique_channels = {channel['channel_id']: channel for channel in all_channels}.values()
         
-        # Update database with new data
-        for channel in unique_channels:
-            # Update or insert channel info
-            cursor.execute('''
-                INSERT OR REPLACE INTO channels (channel_id, name, url, last_updated)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                channel['channel_id'],
-                channel['name'],
-                channel['url'],
-                current_time
-            ))
-            
-            # Add new subscriber count record
-            cursor.execute('''
-                INSERT INTO subscriber_history (channel_id, subscriber_count, fetch_date)
-                VALUES (?, ?, ?)
-            ''', (
-                channel['channel_id'],
-                channel['subscribers'],
-                current_time
-            ))
+        # Update channels and record changed subscriber counts, in one transaction
+        changed = stats_db.record_snapshot(conn, unique_channels, current_time)
+        print(f"{changed} of {len(unique_channels)} subscriber counts are new or changed")
+        # Spend the remaining quota on known channels whose refresh is due
+        asyncio.run(refresh_stale_channels(conn))
         
-        conn.commit()
+        # Roll finished days, weeks and months up and prune expired raw rows
+        history_retention.apply_retention(conn)
+
+        # Today's channel arrays for mmap-based ranking and day-over-day diffs
+        snapshot_path = daily_snapshot.write_snapshot(conn)
+        print(f"Wrote daily snapshot to {snapshot_path}")
         
         # Get top 20 channels with their current and previous subscriber counts
-        cursor.execute('''
-            WITH RankedChannels AS (
-                -- Get the latest subscriber count for each channel
-                SELECT 
-                    c.name,
-                    c.url,
-                    sh.subscriber_count as current_subscribers,
-                    sh.fetch_date as current_date,
-                    (
-                        SELECT subscriber_count
-                        FROM subscriber_history sh2
-                        WHERE sh2.channel_id = c.channel_id
-                        AND sh2.fetch_date < sh.fetch_date
-                        ORDER BY fetch_date DESC
-                        LIMIT 1
-                    ) as previous_subscribers
-                FROM channels c
-                JOIN subscriber_history sh ON c.channel_id = sh.channel_id
-                WHERE sh.fetch_date = (
-                    SELECT MAX(fetch_date)
-                    FROM subscriber_history sh2
-                    WHERE sh2.channel_id = c.channel_id
-                )
-                ORDER BY sh.subscriber_count DESC
-                LIMIT 20
-            )
-            SELECT *,
-                CASE 
-                    WHEN previous_subscribers IS NOT NULL 
-                    THEN current_subscribers - previous_subscribers
-                    ELSE 0
-                END as subscriber_change
-            FROM RankedChannels
-        ''')
-        
-        results = cursor.fetchall()
+        results = stats_db.top_channels(conn, 20)
         
         print("\nTop 20 Most Subscribed YouTube Channels:")
         print("-" * 50)
-        for i, (name, url, current_subs, current_date, prev_subs, sub_change) in enumerate(results, 1):
+        for i, (name, url, current_subs, current_ts, prev_subs, sub_change) in enumerate(results, 1):
             print(f"{i}. {name}")
             print(f"   Subscribers: {current_subs:,}")
             if prev_subs:
@@ -278,6 +308,12 @@ def get_top_channels():
                 print(f"   Change: {change_str} since last update")
             print(f"   URL: {url}")
             print()
+        
+        # Growth over 1/7/30 days, computed over the whole history
+        growth = growth_analytics.compute_growth(growth_analytics.load_history(conn))
+        print("\nFastest Growing Channels (7 days):")
+        print("-" * 50)
+        print("\n".join(growth_analytics.format_report(conn, growth, 'delta_7d', 10)))
             
     except Exception as e:
         print(f"An error occurred: {str(e)}")
@@ -285,7 +321,7 @@ def get_top_channels():
         conn.close()
 
 if __name__ == "__main__":
-    if not API_KEY:
-        print("Please set your YouTube API key in the .env file")
+    if not API_KEYS:
+        print("Please set YOUTUBE_API_KEY, or several comma-separated keys in YOUTUBE_API_KEYS, in the .env file")
     else:
         get_top_channels()
\ No newline at end of file
@@ -0,0 +1,39 @@
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+# The utilities import each other by module name, as when run from src/utils
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src' / 'utils'))
+
+import stats_db  # noqa: E402
+from youtube_api_stand_in import ChannelDirectory, start_stand_in  # noqa: E402
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A new statistics database; modules needing more schema or data extend this fixture."""
+    conn = stats_db.connect(str(tmp_path / 'youtube_stats.db'))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    """Start local Data API stand-ins serving one channel; call with StandInServer options."""
+    csv_file = tmp_path / 'channels.csv'
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['channel_id', 'handle', 'channel_title', 'subscribers'])
+        writer.writerow(['UC' + 'a' * 22, 'alpha', 'Alpha', '1000'])
+
+    def start(**options):
+        server = start_stand_in(directory=ChannelDirectory([csv_file]), **options)
+        servers.append(server)
+        return server
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import quota_ledger
+from api_key_pool import ApiKeyPool
+from quota_ledger import QuotaExhausted
+from youtube_api_async import AsyncYouTubeClient, YouTubeAPIError
+
+
+@pytest.fixture(autouse=True)
+def fixed_day(monkeypatch):
+    monkeypatch.setattr(quota_ledger, 'pacific_day', lambda now=None: '2024-01-01')
+
+
+@pytest.fixture
+def pool_factory(tmp_path):
+    pools = []
+
+    def factory(keys, daily_quota=100):
+        pool = ApiKeyPool(keys, daily_quota=daily_quota, ledger_file=tmp_path / 'quota_ledger.db')
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()
+
+
+def by_key(pool):
+    return {state['key_id']: state for state in pool.status()}
+
+
+def test_quota_exceeded_moves_to_the_next_key(pool_factory):
+    pool = pool_factory(['a', 'b'])
+    first = pool.acquire('channels.list')
+    pool.record_error(first, 'quotaExceeded', 403)
+    assert {pool.acquire('channels.list') for _ in range(5)} == {'b' if first == 'a' else 'a'}
+    assert pool.remaining() == 100 - 5
+
+
+def test_invalid_key_is_disabled(pool_factory):
+    pool = pool_factory(['a', 'b'])
+    pool.record_error('a', 'keyInvalid', 400)
+    assert {pool.acquire('channels.list') for _ in range(5)} == {'b'}
+    assert pool.remaining() == 100 - 5
+
+
+def test_forbidden_does_not_disable_the_key(pool_factory):
+    pool = pool_factory(['a'])
+    pool.record_error('a', 'forbidden', 403)
+    assert pool.acquire('channels.list') == 'a'
+
+
+def test_all_keys_exhausted(pool_factory):
+    pool = pool_factory(['a', 'b'], daily_quota=1)
+    pool.acquire('channels.list')
+    pool.acquire('channels.list')
+    with pytest.raises(QuotaExhausted):
+        pool.acquire('channels.list')
+
+
+def fetch(server, pool, requests):
+    async def run():
+        async with AsyncYouTubeClient(None, server.endpoint, key_pool=pool) as client:
+            return [await client.channels_list(ids=['UC' + 'a' * 22]) for _ in range(requests)]
+
+    return asyncio.run(run())
+
+
+def test_client_rotates_past_an_invalid_key(stand_in, pool_factory):
+    server = stand_in(invalid_keys=['bad'])
+    pool = pool_factory(['bad', 'good'])
+    responses = fetch(server, pool, 3)
+    assert all(len(response['items']) == 1 for response in responses)
+    assert [state['disabled'] for state in pool.status()] == [True, False]
+
+
+def test_client_rotates_when_the_api_reports_quota_exceeded(stand_in, pool_factory):
+    # The API runs out before the ledgers do, e.g. because of usage outside this ledger
+    server = stand_in(daily_quota=2)
+    pool = pool_factory(['a', 'b'], daily_quota=100)
+    assert len(fetch(server, pool, 4)) == 4
+    with pytest.raises(QuotaExhausted):
+        fetch(server, pool, 1)
+    assert pool.remaining() == 0
+
+
+def test_client_does_not_retry_forbidden(stand_in, pool_factory):
+    server = stand_in()
+    pool = pool_factory([''])
+    with pytest.raises(YouTubeAPIError) as raised:
+        fetch(server, pool, 1)
+    assert raised.value.reason == 'forbidden'
+    assert server.requests['channels.list'] == 1
+
+
+def test_used_counts_every_key(pool_factory):
+    pool = pool_factory(['a', 'b'])
+    pool.acquire('search.list')
+    pool.acquire('channels.list')
+    assert pool.used() == 101
+    assert pool.remaining() == 200 - 101
+
@@ -0,0 +1,45 @@
+from channel_cache import ChannelCache
+from youtube_url_validator import ChannelInfo
+
+
+def info(channel_id, subscribers='1.2M'):
+    return ChannelInfo(url='', is_valid=True, channel_id=channel_id, subscribers=subscribers)
+
+
+def url(i):
+    return f'https://www.youtube.com/channel/UC{i:022d}'
+
+
+def test_writes_do_not_count_the_table(tmp_path):
+    cache = ChannelCache(tmp_path / 'channel_cache.db', max_entries=100)
+    queries = []
+    cache._conn.set_trace_callback(queries.append)
+    for i in range(50):
+        cache.put(url(i), info(f'UC{i:022d}'), 'scraper')
+    # Replacing an entry does not grow the cache
+    cache.put(url(0), info('UC' + '0' * 22), 'scraper')
+    assert not any('COUNT(*)' in query for query in queries)
+    assert cache._count == len(cache) == 50
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ChannelCache(tmp_path / 'channel_cache.db', max_entries=100)
+    cache.put_many({url(i): info(f'UC{i:022d}') for i in range(100)}, 'scraper')
+    # Touch the oldest entry so it survives
+    assert cache.get(url(0))
+    cache.put(url(100), info('UC' + '1' * 22), 'scraper')
+    # One over the limit, plus 1% headroom
+    assert len(cache) == 99
+    assert cache.get(url(0)) and cache.get(url(100))
+    cache.close()
+
+
+def test_lookups_can_be_limited_to_one_source(tmp_path):
+    cache = ChannelCache(tmp_path / 'channel_cache.db')
+    cache.put(url(1), info('UC' + '1' * 22, '1.2M'), 'scraper')
+    cache.put(url(2), info('UC' + '2' * 22, 1200000), 'api')
+    assert set(cache.get_many([url(1), url(2)], 'scraper')) == {url(1)}
+    assert cache.get(url(2), 'api').subscribers == '1200000'
+    assert set(cache.get_many([url(1), url(2)])) == {url(1), url(2)}
+    cache.close()
@@ -0,0 +1,76 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+import daily_snapshot
+import stats_db
+
+DAY = date(2024, 12, 1)
+START = 1_733_011_200
+
+
+def record(conn, count, ts):
+    stats_db.record_snapshot(conn, [{'channel_id': 'UCa', 'name': 'a', 'url': 'u', 'subscribers': count}], ts)
+
+
+def test_rewrites_publish_a_new_version(conn, tmp_path):
+    snapshot_dir = tmp_path / 'snapshots'
+    for version, count in enumerate([100, 120, 150], 1):
+        record(conn, count, START + version)
+        path = daily_snapshot.write_snapshot(conn, DAY, snapshot_dir)
+        assert path.name == f'v{version}'
+        assert (snapshot_dir / DAY.isoformat() / 'CURRENT').read_text() == path.name
+        assert list(daily_snapshot.load_snapshot(DAY, snapshot_dir).subscribers) == [count]
+
+    # The previous version stays for readers that resolved the pointer before the swap
+    assert sorted(p.name for p in (snapshot_dir / DAY.isoformat()).iterdir()) == ['CURRENT', 'v2', 'v3']
+    assert daily_snapshot.list_days(snapshot_dir) == [DAY]
+
+
+def test_unversioned_snapshots_are_read_and_replaced(conn, tmp_path):
+    day_dir = tmp_path / DAY.isoformat()
+    day_dir.mkdir()
+    for name, values in [('channel_ids', np.array(['UCa'], dtype='S24')), ('subscribers', [90]),
+                         ('views', [-1]), ('ts', [START])]:
+        np.save(day_dir / f'{name}.npy', np.asarray(values))
+    assert daily_snapshot.list_days(tmp_path) == [DAY]
+    assert list(daily_snapshot.load_snapshot(DAY, tmp_path).subscribers) == [90]
+
+    record(conn, 100, START + 1)
+    daily_snapshot.write_snapshot(conn, DAY, tmp_path)
+    assert list(daily_snapshot.load_snapshot(DAY, tmp_path).subscribers) == [100]
+    assert not list(day_dir.glob('*.npy'))
+
+
+def test_unpublished_versions_are_dropped(conn, tmp_path):
+    record(conn, 100, START + 1)
+    daily_snapshot.write_snapshot(conn, DAY, tmp_path)
+    # A run that crashed after writing its arrays but before replacing the pointer
+    (tmp_path / DAY.isoformat() / 'v2').mkdir()
+
+    record(conn, 120, START + 2)
+    assert daily_snapshot.write_snapshot(conn, DAY, tmp_path).name == 'v3'
+    assert sorted(p.name for p in (tmp_path / DAY.isoformat()).iterdir()) == ['CURRENT', 'v1', 'v3']
+
+
+def make_snapshot(day, rows):
+    channel_ids, subscribers, views = zip(*rows)
+    return daily_snapshot.Snapshot(day, np.array(channel_ids, dtype='S24'), np.array(subscribers, dtype=np.int64),
+                                   np.array(views, dtype=np.int64), np.zeros(len(rows), dtype=np.int64))
+
+
+def test_diff_aligns_channels_added_and_removed():
+    before = make_snapshot(DAY, [('UCa', 500, 10), ('UCb', 100, -1), ('UCc', 300, 30)])
+    after = make_snapshot(date(2024, 12, 2), [('UCb', 400, 40), ('UCc', 330, 35), ('UCd', 50, 5)])
+    report = daily_snapshot.diff(before, after)
+
+    # Rows follow after; UCa is gone and UCd has nothing to compare with
+    assert report['channel_id'].tolist() == ['UCb', 'UCc', 'UCd']
+    assert report['subscriber_delta'][:2].tolist() == [300, 30]
+    assert report['growth'][:2].tolist() == pytest.approx([3.0, 0.1])
+    # UCb climbed from 3rd to 1st; UCc stayed 2nd
+    assert report['rank_change'][:2].tolist() == [2, 0]
+    # UCb's earlier view count was unknown
+    assert np.isnan(report['view_delta'][0]) and report['view_delta'][1] == 5
+    assert all(np.isnan(report[column][2]) for column in ('subscriber_delta', 'growth', 'view_delta', 'rank_change'))
@@ -0,0 +1,23 @@
+from channel_cache import ChannelCache
+from handle_map import HandleMap
+from youtube_url_validator import ChannelInfo
+
+CHANNEL_ID = 'UC' + 'a' * 22
+
+
+def test_import_from_cache_adds_scraped_handles(tmp_path):
+    cache = ChannelCache(tmp_path / 'channel_cache.db')
+    cache.put('https://www.youtube.com/@Alpha',
+              ChannelInfo(url='', is_valid=True, channel_id=CHANNEL_ID, handle='@Alpha'), 'scraper')
+    cache.close()
+    handle_map = HandleMap(tmp_path / 'handle_map.db')
+    assert handle_map.import_from_cache(tmp_path / 'channel_cache.db') == 1
+    assert handle_map.get('@alpha') == CHANNEL_ID
+    handle_map.close()
+
+
+def test_import_from_a_missing_cache_adds_nothing(tmp_path):
+    handle_map = HandleMap(tmp_path / 'handle_map.db')
+    assert handle_map.import_from_cache(tmp_path / 'missing.db') == 0
+    assert not (tmp_path / 'missing.db').exists()
+    handle_map.close()
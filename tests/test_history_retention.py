@@ -0,0 +1,90 @@
+import pytest
+
+import history_retention
+import stats_db
+from history_retention import DAY, RetentionPolicy, apply_retention, query_history, roll_up
+
+# A Wednesday at 12:00 UTC, so the ranges below cross week and month boundaries
+NOW = 1_718_798_400
+POLICY = RetentionPolicy(raw_days=30, daily_days=120, weekly_days=None, monthly_days=None)
+
+
+def channel(count):
+    return {'channel_id': 'UCa', 'name': 'a', 'url': 'https://youtube.com/channel/UCa', 'subscribers': count}
+
+
+@pytest.fixture
+def conn(conn):
+    history_retention.init_retention(conn)
+    # Two snapshots a day for 200 days; the count changes once a day
+    for day in range(200, 0, -1):
+        ts = NOW - day * DAY
+        stats_db.record_snapshot(conn, [channel(1000 - day)], ts)
+        stats_db.record_snapshot(conn, [channel(1000 - day)], ts + DAY // 2)
+    return conn
+
+
+def watermarks(conn):
+    return dict(conn.execute('SELECT level, rolled_until FROM rollup_state'))
+
+
+def test_roll_up_stops_at_complete_periods(conn):
+    apply_retention(conn, POLICY, NOW)
+    marks = watermarks(conn)
+    assert marks['daily'] == NOW // DAY * DAY
+    # Weeks start on Monday and months on the 1st, and neither passes the daily watermark
+    assert marks['weekly'] == history_retention._period_start('weekly', NOW)
+    assert marks['monthly'] == history_retention._period_start('monthly', NOW)
+    assert marks['weekly'] <= marks['daily'] and marks['monthly'] <= marks['daily']
+
+
+def test_roll_up_is_incremental(conn):
+    roll_up(conn, 'daily', NOW - 10 * DAY)
+    first = watermarks(conn)
+    assert roll_up(conn, 'daily', NOW - 10 * DAY) == 0
+    roll_up(conn, 'daily', NOW)
+    second = watermarks(conn)
+    assert second['daily'] > first['daily']
+
+    # The same rollups as a single run over the whole range
+    daily = conn.execute('SELECT * FROM subscriber_daily ORDER BY period').fetchall()
+    conn.execute('DELETE FROM subscriber_daily')
+    conn.execute('DELETE FROM rollup_state')
+    roll_up(conn, 'daily', NOW)
+    assert conn.execute('SELECT * FROM subscriber_daily ORDER BY period').fetchall() == daily
+
+
+def test_prune_keeps_carry_in_rows(conn):
+    pruned = apply_retention(conn, POLICY, NOW)['pruned']
+    assert pruned['raw'] > 0 and pruned['daily'] > 0
+    horizon = POLICY.horizon('raw', NOW)
+    older = conn.execute('SELECT COUNT(*) FROM subscriber_history WHERE ts < ?', (horizon,)).fetchone()[0]
+    assert older == 1
+    # Nothing newer than a watermark is pruned from the level it was rolled up from
+    assert conn.execute('SELECT MIN(period) FROM subscriber_weekly').fetchone()[0] \
+        <= POLICY.horizon('daily', NOW)
+
+
+def test_query_history_across_resolutions(conn):
+    apply_retention(conn, POLICY, NOW)
+    start = NOW - 150 * DAY
+    level, rows = query_history(conn, 'UCa', start, NOW, POLICY, NOW)
+    assert level == 'weekly'
+
+    timestamps = [row[0] for row in rows]
+    assert timestamps == sorted(timestamps) and len(set(timestamps)) == len(timestamps)
+    assert timestamps[0] <= start
+    # Raw steps take over at the daily watermark and run to the latest snapshot
+    assert rows[-1][1] == 999
+    raw_from = watermarks(conn)['daily']
+    assert all(low == high == last for ts, last, low, high in rows if ts >= raw_from)
+    # Counts only grow in this history, whichever level supplied them
+    assert [row[1] for row in rows] == sorted(row[1] for row in rows)
+
+
+def test_query_history_uses_raw_rows_inside_the_raw_horizon(conn):
+    apply_retention(conn, POLICY, NOW)
+    level, rows = query_history(conn, 'UCa', NOW - 10 * DAY, NOW, POLICY, NOW)
+    assert level == 'raw'
+    assert rows[0] == (NOW - 10 * DAY, 990, 990, 990)
+    assert rows[-1][1] == 999
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timezone
+
+import parquet_export
+import stats_db
+
+DAY_ONE = date(2024, 12, 1)
+
+
+def at(day, hour=12):
+    return int(datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc).timestamp())
+
+
+def test_empty_days_are_not_queried_again(conn, tmp_path):
+    lake_dir = tmp_path / 'lake'
+    # Data on the 1st and 3rd only; the 2nd has no rows and therefore no partition
+    stats_db.record_snapshot(conn, [{'channel_id': 'UCa', 'name': 'a', 'url': 'u', 'subscribers': 100}], at(DAY_ONE))
+    stats_db.record_snapshot(conn, [{'channel_id': 'UCa', 'name': 'a', 'url': 'u', 'subscribers': 120}],
+                             at(date(2024, 12, 3)))
+
+    written = parquet_export.export_history(conn, lake_dir, today=date(2024, 12, 4))
+    assert written == {'partitions': 2, 'rows': 2}
+    assert not parquet_export.partition_dir(lake_dir, 'subscriber_history', date(2024, 12, 2)).exists()
+    assert parquet_export._missing_days(lake_dir, 'subscriber_history', at(DAY_ONE), date(2024, 12, 5)) == \
+        [date(2024, 12, 4)]
+
+    queries = []
+    conn.set_trace_callback(queries.append)
+    assert parquet_export.export_history(conn, lake_dir, today=date(2024, 12, 4)) == {'partitions': 0, 'rows': 0}
+    assert not any('WHERE ts >=' in query for query in queries)
+
+
+def test_channels_read_from_the_watermark(conn, tmp_path):
+    lake_dir = tmp_path / 'lake'
+    stats_db.record_snapshot(conn, [{'channel_id': 'UCa', 'name': 'a', 'url': 'u', 'subscribers': 100}], at(DAY_ONE))
+    parquet_export.export_channels(conn, lake_dir, today=date(2024, 12, 10))
+
+    stats_db.record_snapshot(conn, [{'channel_id': 'UCb', 'name': 'b', 'url': 'v', 'subscribers': 5}],
+                             at(date(2024, 12, 10)))
+    queries = []
+    conn.set_trace_callback(queries.append)
+    assert parquet_export.export_channels(conn, lake_dir, today=date(2024, 12, 11)) == {'partitions': 1, 'rows': 1}
+    assert any(str(parquet_export._day_start(date(2024, 12, 10))) in query for query in queries)
+    assert list(parquet_export.load_channels(lake_dir)['channel_id']) == ['UCa', 'UCb']
+
+
+def test_load_reads_only_the_requested_days_and_columns(conn, tmp_path):
+    lake_dir = tmp_path / 'lake'
+    for offset in range(3):
+        day = date(2024, 12, 1 + offset)
+        stats_db.record_snapshot(conn, [
+            {'channel_id': channel_id, 'name': channel_id, 'url': 'u', 'subscribers': 100 * (offset + 1) + i}
+            for i, channel_id in enumerate(['UCa', 'UCb', 'UCc'])
+        ], at(day))
+    parquet_export.export_history(conn, lake_dir, today=date(2024, 12, 4))
+
+    second = date(2024, 12, 2)
+    df = parquet_export.load('subscriber_history', ['channel_id', 'subscriber_count'], second, second,
+                             ['UCb'], lake_dir)
+    assert list(df.columns) == ['channel_id', 'subscriber_count']
+    assert df.astype({'channel_id': str}).values.tolist() == [['UCb', 201]]
+    # Only the one partition is opened
+    day_file = parquet_export.partition_dir(lake_dir, 'subscriber_history', second) / 'part-0.parquet'
+    assert parquet_export.scanned_bytes('subscriber_history', second, second, lake_dir) == day_file.stat().st_size
+    assert parquet_export.scanned_bytes('subscriber_history', lake_dir=lake_dir) > day_file.stat().st_size
+
+
+def test_export_videos_partitions_parser_output_by_fetch_time(tmp_path):
+    videos_dir, lake_dir = tmp_path / 'output', tmp_path / 'lake'
+    videos_dir.mkdir()
+    header = ('video_id,video_title,video_duration,video_view_count,video_upload_date,'
+              'video_publish_date_absolute,video_description\n')
+    (videos_dir / 'output_https_www_youtube_com_@alpha_videos_20241202_112448.csv').write_text(
+        header + 'abc,First,1:02:03,"1,234 views",2 days ago,2024-11-30,hello\n'
+                 'def,Second,0:45,No views,1 week ago,,\n'
+    )
+    (videos_dir / 'notes.csv').write_text(header)
+
+    assert parquet_export.export_videos(videos_dir, lake_dir) == {'files': 1, 'rows': 2, 'skipped': 1}
+    assert parquet_export.export_videos(videos_dir, lake_dir) == {'files': 0, 'rows': 0, 'skipped': 1}
+
+    df = parquet_export.load('videos', channel_ids=['@alpha'], lake_dir=lake_dir)
+    assert df['fetch_date'].tolist() == [date(2024, 12, 2)] * 2
+    assert df['video_duration'].tolist() == [3723, 45]
+    assert df['video_view_count'].tolist() == [1234, 0]
+    assert df['video_publish_date'].tolist()[0] == date(2024, 11, 30)
+    assert df['video_publish_date'].isna().tolist()[1]
+    assert parquet_export.load('videos', channel_ids=['@other'], lake_dir=lake_dir).empty
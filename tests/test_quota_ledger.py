@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import quota_ledger
+from quota_ledger import QuotaExhausted, QuotaLedger, pacific_day
+from youtube_api_async import AsyncYouTubeClient
+
+
+def test_pacific_day_rolls_over_at_pacific_midnight():
+    # PST is UTC-8 in winter
+    assert pacific_day(datetime(2024, 1, 2, 7, 59, tzinfo=timezone.utc)) == '2024-01-01'
+    assert pacific_day(datetime(2024, 1, 2, 8, 0, tzinfo=timezone.utc)) == '2024-01-02'
+    # PDT is UTC-7 in summer
+    assert pacific_day(datetime(2024, 7, 2, 6, 59, tzinfo=timezone.utc)) == '2024-07-01'
+    assert pacific_day(datetime(2024, 7, 2, 7, 0, tzinfo=timezone.utc)) == '2024-07-02'
+
+
+@pytest.fixture
+def day(monkeypatch):
+    current = ['2024-01-01']
+    monkeypatch.setattr(quota_ledger, 'pacific_day', lambda now=None: current[0])
+    return current
+
+
+def test_quota_resets_on_the_next_pacific_day(tmp_path, day):
+    ledger = QuotaLedger('key', daily_quota=150, ledger_file=tmp_path / 'quota_ledger.db')
+    ledger.reserve('search.list')
+    ledger.reserve('channels.list', calls=50)
+    assert ledger.remaining() == 0
+    with pytest.raises(QuotaExhausted):
+        ledger.reserve('channels.list')
+
+    day[0] = '2024-01-02'
+    assert ledger.remaining() == 150
+    ledger.reserve('channels.list')
+    assert ledger.used() == 1
+    # The previous day's usage is kept for reporting
+    assert ledger.usage('2024-01-01') == {'channels.list': (50, 50), 'search.list': (100, 1)}
+    ledger.close()
+
+
+def test_mark_exhausted_lasts_until_the_next_day(tmp_path, day):
+    ledger_file = tmp_path / 'quota_ledger.db'
+    ledger = QuotaLedger('key', daily_quota=100, ledger_file=ledger_file)
+    ledger.reserve('channels.list')
+    ledger.mark_exhausted()
+    # Shared with every process using the same ledger file
+    other = QuotaLedger('key', daily_quota=100, ledger_file=ledger_file)
+    assert other.remaining() == 0
+
+    day[0] = '2024-01-02'
+    assert other.remaining() == 100
+    ledger.close()
+    other.close()
+
+
+def test_reservations_wait_off_the_event_loop(tmp_path, day):
+    ledger_file = tmp_path / 'quota_ledger.db'
+    ledger = QuotaLedger('key', daily_quota=100, ledger_file=ledger_file)
+    client = AsyncYouTubeClient('key', ledger=ledger)
+    # Another process holding the ledger's write lock
+    blocker = sqlite3.connect(ledger_file, isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')
+
+    async def run():
+        reservation = asyncio.create_task(client._reserve('channels.list'))
+        # The loop keeps running while the reservation waits for the lock
+        await asyncio.sleep(0.05)
+        assert not reservation.done()
+        blocker.execute('COMMIT')
+        return await reservation
+
+    assert asyncio.run(run()) == 'key'
+    assert ledger.used() == 1
+    blocker.close()
+    ledger.close()
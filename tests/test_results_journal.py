@@ -0,0 +1,45 @@
+import pandas as pd
+
+from results_journal import ResultsJournal
+
+COLUMNS = {'is_valid': pd.NA, 'subscribers': pd.NA, 'error': ''}
+URL = 'https://www.youtube.com/@alpha'
+
+
+def test_apply_writes_recorded_nulls_and_keeps_unrecorded_columns(tmp_path):
+    journal = ResultsJournal(tmp_path / 'journal.db', COLUMNS)
+    df = pd.DataFrame({'url': [URL, 'https://www.youtube.com/@beta'], 'is_valid': [True, True],
+                       'subscribers': ['1.2M', '5K'], 'error': ['', '']})
+    # A later result that failed clears the earlier count but says nothing about is_valid
+    journal.append([{'url': URL, 'subscribers': None, 'error': 'HTTP 404'}], 'url')
+
+    df = journal.apply(df, 'url')
+    assert df.loc[0, 'subscribers'] is None
+    assert df.loc[0, 'error'] == 'HTTP 404'
+    assert bool(df.loc[0, 'is_valid'])
+    assert df.loc[1].tolist() == ['https://www.youtube.com/@beta', True, '5K', '']
+    journal.close()
+
+
+def test_apply_updates_every_row_with_the_url(tmp_path):
+    journal = ResultsJournal(tmp_path / 'journal.db', COLUMNS)
+    df = pd.DataFrame({'url': [URL, URL]})
+    journal.append([{'url': URL, 'is_valid': True, 'subscribers': '1.2M', 'error': ''}], 'url')
+
+    df = journal.apply(df, 'url')
+    assert df['subscribers'].tolist() == ['1.2M', '1.2M']
+    journal.close()
+
+
+def test_merge_into_csv_clears_the_journal(tmp_path):
+    csv_file = tmp_path / 'channels.csv'
+    pd.DataFrame({'url': [URL]}).to_csv(csv_file, index=False)
+    journal = ResultsJournal(tmp_path / 'journal.db', COLUMNS)
+    journal.append([{'url': URL, 'is_valid': False, 'subscribers': None, 'error': 'Channel not found'}], 'url')
+
+    assert journal.merge_into_csv(csv_file, 'url') == 1
+    assert len(journal) == 0
+    merged = pd.read_csv(csv_file)
+    assert merged.loc[0, 'error'] == 'Channel not found'
+    assert pd.isna(merged.loc[0, 'subscribers'])
+    journal.close()
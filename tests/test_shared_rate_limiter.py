@@ -0,0 +1,72 @@
+import pytest
+
+import shared_rate_limiter
+from shared_rate_limiter import SharedRateLimiter, configure_bucket
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_rate_limiter.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / 'rate_limits.db'
+
+
+def test_bucket_refills_at_its_rate(clock, state_file):
+    limiter = SharedRateLimiter('test', rate=2, burst=4, state_file=state_file)
+    assert [limiter.try_acquire() for _ in range(4)] == [0, 0, 0, 0]
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 1
+    assert [limiter.try_acquire() for _ in range(2)] == [0, 0]
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    # Refill stops at the burst size
+    clock.now += 60
+    assert [limiter.try_acquire() for _ in range(4)] == [0, 0, 0, 0]
+    assert limiter.try_acquire() > 0
+    limiter.close()
+
+
+def test_processes_share_one_bucket(clock, state_file):
+    first = SharedRateLimiter('test', rate=1, burst=2, state_file=state_file)
+    second = SharedRateLimiter('test', state_file=state_file)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() == pytest.approx(1)
+    first.close()
+    second.close()
+
+
+def test_constructor_only_seeds_new_buckets(clock, state_file):
+    SharedRateLimiter('test', rate=1, burst=1, state_file=state_file).close()
+    limiter = SharedRateLimiter('test', rate=100, burst=100, state_file=state_file)
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(1)
+
+    configure_bucket('test', rate=4, state_file=state_file)
+    assert limiter.try_acquire() == pytest.approx(0.25)
+    limiter.close()
+
+
+def test_invalid_settings(clock, state_file):
+    with pytest.raises(ValueError):
+        SharedRateLimiter('test', rate=0, state_file=state_file)
+    with pytest.raises(ValueError):
+        configure_bucket('test', burst=0, state_file=state_file)
+    limiter = SharedRateLimiter('test', rate=1, burst=2, state_file=state_file)
+    with pytest.raises(ValueError):
+        limiter.try_acquire(3)
+    limiter.close()
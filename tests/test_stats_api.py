@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+import stats_db
+from stats_api import ResultCache, StatsService
+
+START = 1_700_000_000
+
+
+def snapshot(channel_id, count):
+    return {'channel_id': channel_id, 'name': channel_id, 'url': f'https://youtube.com/channel/{channel_id}',
+            'subscribers': count}
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ResultCache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load('key', load) for _ in range(5)))
+
+    assert asyncio.run(run()) == ['value'] * 5
+    assert len(loads) == 1
+    assert (cache.misses, cache.hits) == (1, 4)
+
+
+def test_a_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = ResultCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('database is locked')
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load('key', fail) for _ in range(3)), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(run())] == ['database is locked'] * 3
+    assert len(cache) == 0
+
+
+def test_waiters_survive_the_cancellation_of_the_shared_load():
+    cache = ResultCache()
+    started = []
+
+    async def load():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return len(started)
+
+    async def run():
+        first = asyncio.create_task(cache.get_or_load('key', load))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_load('key', load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.wait_for(second, 1)
+
+    # The waiter ran the load again instead of hanging on the cancelled one
+    assert asyncio.run(run()) == 2
+
+
+def test_an_ingest_drops_cached_results(tmp_path):
+    db_file = str(tmp_path / 'youtube_stats.db')
+    writer = stats_db.connect(db_file)
+    stats_db.record_snapshot(writer, [snapshot('UCa', 100)], START)
+    service = StatsService(db_file, readers=1)
+
+    async def top():
+        return [row['subscriber_count'] for row in json.loads(await service.top(10))]
+
+    try:
+        assert asyncio.run(top()) == [100]
+        assert asyncio.run(top()) == [100]
+        assert service.cache.hits == 1
+
+        stats_db.record_snapshot(writer, [snapshot('UCa', 150)], START + 3600)
+        assert asyncio.run(top()) == [150]
+        assert service.cache.invalidations == 1
+    finally:
+        service.close()
+        writer.close()
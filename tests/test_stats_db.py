@@ -0,0 +1,75 @@
+import random
+import sqlite3
+
+import stats_db
+
+START = 1_700_000_000
+HOUR = 3600
+
+
+def snapshot(channel_id, count, views=None):
+    channel = {'channel_id': channel_id, 'name': channel_id, 'url': f'https://youtube.com/channel/{channel_id}',
+               'subscribers': count}
+    if views is not None:
+        channel['views'] = views
+    return channel
+
+
+def latest(conn):
+    return conn.execute('SELECT * FROM channel_latest ORDER BY channel_id').fetchall()
+
+
+def test_unchanged_snapshots_keep_the_previous_change(conn):
+    stats_db.record_snapshot(conn, [snapshot('UCa', 100)], START)
+    stats_db.record_snapshot(conn, [snapshot('UCa', 120)], START + HOUR)
+    stats_db.record_snapshot(conn, [snapshot('UCa', 120)], START + 2 * HOUR)
+    row = conn.execute('SELECT subscriber_count, ts, previous_count, previous_ts, delta FROM channel_latest').fetchone()
+    assert row == (120, START + 2 * HOUR, 100, START, 20)
+
+
+def test_incremental_latest_matches_rebuild(conn):
+    rng = random.Random(0)
+    channel_ids = [f'UC{i:022d}' for i in range(50)]
+    counts = {channel_id: rng.randint(0, 10_000) for channel_id in channel_ids}
+    for step in range(40):
+        batch = []
+        for channel_id in rng.sample(channel_ids, 30):
+            # Most fetches see no change, some grow, a few drop back
+            if rng.random() < 0.4:
+                counts[channel_id] += rng.randint(-50, 200)
+            batch.append(snapshot(channel_id, counts[channel_id], rng.choice([None, step * 1000])))
+        stats_db.record_snapshot(conn, batch, START + step * HOUR)
+    # A backfilled older snapshot is written to the history only
+    stats_db.record_snapshot(conn, [snapshot(channel_ids[0], 1)], START - HOUR)
+
+    incremental = latest(conn)
+    assert any(row[3] is not None for row in incremental)
+    stats_db.rebuild_latest(conn)
+    assert latest(conn) == incremental
+
+
+def test_connect_compacts_a_legacy_database(tmp_path):
+    db_file = str(tmp_path / 'youtube_stats.db')
+    legacy = sqlite3.connect(db_file)
+    legacy.executescript('''
+        CREATE TABLE channels (channel_id TEXT PRIMARY KEY, name TEXT, url TEXT, last_updated TIMESTAMP);
+        CREATE TABLE subscriber_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, channel_id TEXT, subscriber_count INTEGER, fetch_date TIMESTAMP
+        );
+    ''')
+    legacy.execute("INSERT INTO channels VALUES ('UCa', 'a', 'u', '2024-12-03 00:00:00')")
+    legacy.executemany('INSERT INTO subscriber_history (channel_id, subscriber_count, fetch_date) VALUES (?, ?, ?)', [
+        ('UCa', 100, '2024-12-01 00:00:00'),
+        ('UCa', 100, '2024-12-02 00:00:00'),
+        ('UCa', 120, '2024-12-03 00:00:00'),
+        ('UCa', 120, '2024-12-04 00:00:00'),
+    ])
+    legacy.commit()
+    legacy.close()
+
+    conn = stats_db.connect(db_file)
+    counts = [row[0] for row in conn.execute('SELECT subscriber_count FROM subscriber_history ORDER BY ts')]
+    assert counts == [100, 120]
+    assert conn.execute('SELECT subscriber_count, previous_count, delta FROM channel_latest').fetchone() == \
+        (120, 100, 20)
+    conn.close()
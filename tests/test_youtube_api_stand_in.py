@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from youtube_api_async import AsyncYouTubeClient, YouTubeAPIError
+
+
+def search(server, page_token):
+    async def run():
+        async with AsyncYouTubeClient('key', server.endpoint, max_retries=0) as client:
+            return await client.search_list('alpha', page_token=page_token)
+
+    return asyncio.run(run())
+
+
+def test_stand_in_rejects_invalid_page_tokens_without_charging(stand_in):
+    server = stand_in()
+    with pytest.raises(YouTubeAPIError) as raised:
+        search(server, 'not-a-token')
+    assert (raised.value.status, raised.value.reason) == (400, 'invalidPageToken')
+    assert server.units('key') == 0
+
+
+def test_stand_in_pages_with_its_own_tokens(stand_in):
+    server = stand_in()
+    assert len(search(server, None)['items']) == 1
+    assert search(server, '1')['items'] == []
+    assert server.units('key') == 200
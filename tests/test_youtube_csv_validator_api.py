@@ -0,0 +1,20 @@
+from quota_ledger import plan_by_cost
+from youtube_csv_validator_api import YouTubeValidator
+
+CHANNEL_ID = 'UC' + 'a' * 22
+
+
+def test_costs_follow_the_lookup_chain():
+    assert YouTubeValidator.estimate_cost(CHANNEL_ID) == 1 / 50
+    # forUsername, then forHandle
+    assert YouTubeValidator.estimate_cost('legacyname') == 2
+    # forHandle, then search and the batched lookup of its result
+    assert YouTubeValidator.estimate_cost('@handle') == 101 + 1 / 50
+    assert YouTubeValidator.estimate_cost(None) == 0
+
+
+def test_the_plan_defers_handles_it_cannot_afford():
+    identifiers = [CHANNEL_ID, 'legacyname', '@one', '@two']
+    planned, deferred = plan_by_cost(identifiers, YouTubeValidator.estimate_cost, 150)
+    assert planned == [CHANNEL_ID, 'legacyname', '@one']
+    assert deferred == ['@two']